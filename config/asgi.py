@@ -0,0 +1,25 @@
+# ruff: noqa
+"""
+ASGI config for Ravelry Enhancer project.
+
+Serves the same application as `config.wsgi`, but lets long-lived responses
+such as the sync progress stream wait on the event loop instead of holding a
+worker thread each. Run it with:
+
+    gunicorn -c config/gunicorn.py -k uvicorn.workers.UvicornWorker config.asgi
+
+"""
+
+import os
+import sys
+from pathlib import Path
+
+from django.core.asgi import get_asgi_application
+
+# This allows easy placement of apps within the interior
+# ravelry_enhancer directory.
+BASE_DIR = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(BASE_DIR / "ravelry_enhancer"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.production")
+
+application = get_asgi_application()
@@ -0,0 +1,40 @@
+"""
+Gunicorn settings: ``gunicorn -c config/gunicorn.py config.wsgi``.
+
+Prometheus metrics are written per process to ``PROMETHEUS_MULTIPROC_DIR``
+and merged at scrape time; see `ravelry_enhancer.monitoring.metrics`. Each
+worker warms its lazy caches before serving; see `ravelry_enhancer.utils.warmup`.
+"""
+
+import os
+import shutil
+from pathlib import Path
+
+# Before anything imports prometheus_client, which picks in-memory or
+# file-backed values once, at import.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/ravelry_enhancer_metrics")  # noqa: S108
+
+from prometheus_client import multiprocess  # noqa: E402
+from prometheus_client import values  # noqa: E402
+
+if values.ValueClass is values.MutexValue:
+    msg = "prometheus_client was imported before PROMETHEUS_MULTIPROC_DIR was set"
+    raise RuntimeError(msg)
+
+
+def on_starting(server):
+    # Samples left behind by a previous master would be summed into ours.
+    metrics_dir = Path(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    metrics_dir.mkdir(parents=True)
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    # Runs once the app is loaded, before the worker accepts connections.
+    from ravelry_enhancer.utils.warmup import warm_process
+
+    warm_process()
@@ -62,6 +62,8 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 ROOT_URLCONF = "config.urls"
 # https://docs.djangoproject.com/en/dev/ref/settings/#wsgi-application
 WSGI_APPLICATION = "config.wsgi.application"
+# https://docs.djangoproject.com/en/dev/howto/deployment/asgi/
+ASGI_APPLICATION = "config.asgi.application"
 
 # APPS
 # ------------------------------------------------------------------------------
@@ -74,6 +76,7 @@ DJANGO_APPS = [
     "django.contrib.staticfiles",
     # "django.contrib.humanize", # Handy template tags
     "django.contrib.admin",
+    "django.contrib.postgres",
     "django.forms",
 ]
 THIRD_PARTY_APPS = [
@@ -87,6 +90,10 @@ THIRD_PARTY_APPS = [
 
 LOCAL_APPS = [
     "ravelry_enhancer.users",
+    "ravelry_enhancer.ravelry",
+    "ravelry_enhancer.monitoring",
+    "ravelry_enhancer.library",
+    "ravelry_enhancer.mail",
     # Your stuff: custom apps go here
 ]
 # https://docs.djangoproject.com/en/dev/ref/settings/#installed-apps
@@ -135,6 +142,8 @@ AUTH_PASSWORD_VALIDATORS = [
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#middleware
 MIDDLEWARE = [
+    "ravelry_enhancer.monitoring.middleware.TracingMiddleware",
+    "ravelry_enhancer.monitoring.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -145,6 +154,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
+    "ravelry_enhancer.monitoring.middleware.ProfilingMiddleware",
 ]
 
 # STATIC
@@ -231,6 +241,8 @@ EMAIL_TIMEOUT = 5
 # ------------------------------------------------------------------------------
 # Django Admin URL.
 ADMIN_URL = "admin/"
+# Prometheus metrics URL; keep it unguessable in production like ADMIN_URL.
+METRICS_URL = "metrics/"
 # https://docs.djangoproject.com/en/dev/ref/settings/#admins
 ADMINS = [("""Leslie Emery""", "leslie.s.emery@gmail.com")]
 # https://docs.djangoproject.com/en/dev/ref/settings/#managers
@@ -238,6 +250,9 @@ MANAGERS = ADMINS
 # https://cookiecutter-django.readthedocs.io/en/latest/settings.html#other-environment-settings
 # Force the `admin` sign in process to go through the `django-allauth` workflow
 DJANGO_ADMIN_FORCE_ALLAUTH = env.bool("DJANGO_ADMIN_FORCE_ALLAUTH", default=False)
+# Above this many rows (per pg_class.reltuples) unfiltered admin changelists
+# show an estimated count instead of running COUNT(*).
+ESTIMATED_COUNT_THRESHOLD = env.int("DJANGO_ESTIMATED_COUNT_THRESHOLD", default=10000)
 
 # LOGGING
 # ------------------------------------------------------------------------------
@@ -288,3 +303,89 @@ SOCIALACCOUNT_FORMS = {"signup": "ravelry_enhancer.users.forms.UserSocialSignupF
 
 # Your stuff...
 # ------------------------------------------------------------------------------
+
+# Redis
+# ------------------------------------------------------------------------------
+# Pub/sub for sync progress; production also caches here.
+REDIS_URL = env("REDIS_URL", default="redis://localhost:6379/0")
+
+# Ravelry
+# ------------------------------------------------------------------------------
+# Point both at `manage.py fake_ravelry` to work offline.
+RAVELRY_API_URL = env("RAVELRY_API_URL", default="https://api.ravelry.com")
+RAVELRY_OAUTH_URL = env("RAVELRY_OAUTH_URL", default="https://www.ravelry.com/oauth2")
+
+# Tracing
+# ------------------------------------------------------------------------------
+# See `ravelry_enhancer.monitoring.tracing`. "otlp", "file", or empty for off.
+TRACING_EXPORTER = env("TRACING_EXPORTER", default="")
+TRACING_OTLP_ENDPOINT = env(
+    "OTEL_EXPORTER_OTLP_TRACES_ENDPOINT",
+    default="http://localhost:4318/v1/traces",
+)
+TRACING_FILE = env("TRACING_FILE", default=str(BASE_DIR / "traces.jsonl"))
+TRACING_SERVICE_NAME = env("OTEL_SERVICE_NAME", default="ravelry_enhancer")
+# Share of new traces recorded.
+TRACING_SAMPLE_RATE = 1.0
+
+# Slow query log
+# ------------------------------------------------------------------------------
+# See `ravelry_enhancer.monitoring.slow_queries`; None turns the log off.
+SLOW_QUERY_MS = env.int("DJANGO_SLOW_QUERY_MS", default=200)
+# Re-run a query under EXPLAIN ANALYZE at most this often, per process.
+SLOW_QUERY_EXPLAIN_INTERVAL = 3600
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = 10000
+
+# Profiling
+# ------------------------------------------------------------------------------
+# Where staff-triggered CPU and memory profiles are saved; shared by workers.
+PROFILE_DIR = env("DJANGO_PROFILE_DIR", default="/tmp/ravelry_enhancer_profiles")  # noqa: S108
+
+# Rate limits
+# ------------------------------------------------------------------------------
+# Budgets for `ravelry_enhancer.utils.ratelimit.ratelimit`, by scope: "client"
+# is per user (or IP address when signed out), "global" is shared by everyone.
+RATE_LIMITS = {
+    "pattern-library": {"client": "60/m", "global": "3000/m"},
+    "pattern-download": {"client": "30/m", "global": "600/m"},
+    "stash-import": {"client": "10/h", "global": "300/h"},
+    "project-rows": {"client": "240/m"},
+    "data-export": {"client": "5/h", "global": "60/h"},
+}
+
+# Mail queue
+# ------------------------------------------------------------------------------
+# With EMAIL_BACKEND = "ravelry_enhancer.mail.backends.QueuedEmailBackend",
+# `manage.py send_queued_mail` delivers through this backend.
+MAIL_QUEUE_BACKEND = env(
+    "DJANGO_MAIL_QUEUE_BACKEND",
+    default="django.core.mail.backends.smtp.EmailBackend",
+)
+MAIL_QUEUE_BATCH_SIZE = 100
+MAIL_QUEUE_MAX_ATTEMPTS = 8
+
+# Data export
+# ------------------------------------------------------------------------------
+# See `ravelry_enhancer.library.export`. Accounts with more file bytes than
+# this are exported by the worker rather than streamed to the browser.
+DATA_EXPORT_STREAM_MAX_BYTES = env.int(
+    "DATA_EXPORT_STREAM_MAX_BYTES",
+    default=200 * 1024 * 1024,
+)
+# Built exports are kept here, outside MEDIA_ROOT, and only served to their
+# owner by `data_export_download_view`.
+DATA_EXPORT_ROOT = env("DATA_EXPORT_ROOT", default=str(BASE_DIR / "exports"))
+# If set, downloads are handed to the proxy with an X-Accel-Redirect to this
+# internal location plus the file's name, rather than read by the web worker.
+DATA_EXPORT_ACCEL_REDIRECT = env("DATA_EXPORT_ACCEL_REDIRECT", default="")
+# Built exports are deleted after this many days.
+DATA_EXPORT_RETENTION_DAYS = env.int("DATA_EXPORT_RETENTION_DAYS", default=7)
+# A build running for longer than this many seconds is taken to have died
+# with its worker, and is marked failed.
+DATA_EXPORT_TIMEOUT = env.int("DATA_EXPORT_TIMEOUT", default=2 * 60 * 60)
+
+# Queue planner
+# ------------------------------------------------------------------------------
+# See `ravelry_enhancer.library.planner`. How long the worker's solver may
+# spend on one user's plan before settling for the best answer found.
+QUEUE_PLANNER_TIME_LIMIT = env.float("QUEUE_PLANNER_TIME_LIMIT", default=10)
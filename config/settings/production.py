@@ -17,10 +17,12 @@ DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)
 
 # CACHES
 # ------------------------------------------------------------------------------
+# No default in production; also used for sync progress pub/sub.
+REDIS_URL = env("REDIS_URL")
 CACHES = {
     "default": {
-        "BACKEND": "django_redis.cache.RedisCache",
-        "LOCATION": env("REDIS_URL"),
+        "BACKEND": "ravelry_enhancer.monitoring.cache.RedisCache",
+        "LOCATION": REDIS_URL,
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
             # Mimicing memcache behavior.
@@ -87,6 +89,8 @@ EMAIL_SUBJECT_PREFIX = env(
 # ------------------------------------------------------------------------------
 # Django Admin URL regex.
 ADMIN_URL = env("DJANGO_ADMIN_URL")
+# Prometheus metrics URL, kept secret the same way.
+METRICS_URL = env("DJANGO_METRICS_URL")
 
 # Anymail
 # ------------------------------------------------------------------------------
@@ -95,7 +99,10 @@ INSTALLED_APPS += ["anymail"]
 # https://docs.djangoproject.com/en/dev/ref/settings/#email-backend
 # https://anymail.readthedocs.io/en/stable/installation/#anymail-settings-reference
 # https://anymail.readthedocs.io/en/stable/esps/mailgun/
-EMAIL_BACKEND = "anymail.backends.mailgun.EmailBackend"
+# Queued, so a slow mail API never holds up a request; see
+# `ravelry_enhancer.mail`.
+EMAIL_BACKEND = "ravelry_enhancer.mail.backends.QueuedEmailBackend"
+MAIL_QUEUE_BACKEND = "anymail.backends.mailgun.EmailBackend"
 ANYMAIL = {
     "MAILGUN_API_KEY": env("MAILGUN_API_KEY"),
     "MAILGUN_SENDER_DOMAIN": env("MAILGUN_DOMAIN"),
@@ -150,3 +157,7 @@ LOGGING = {
 
 # Your stuff...
 # ------------------------------------------------------------------------------
+# Tracing
+# ------------------------------------------------------------------------------
+# Recording 1% of traces keeps the overhead well under 1% of request time.
+TRACING_SAMPLE_RATE = env.float("TRACING_SAMPLE_RATE", default=0.01)
@@ -25,6 +25,8 @@ PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#email-backend
 EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+# Queued mail is delivered to the same outbox.
+MAIL_QUEUE_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
 
 # DEBUGGING FOR TEMPLATES
 # ------------------------------------------------------------------------------
@@ -34,5 +36,15 @@ TEMPLATES[0]["OPTIONS"]["debug"] = True  # type: ignore[index]
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#media-url
 MEDIA_URL = "http://media.testserver"
+
+# RATE LIMITS
+# ------------------------------------------------------------------------------
+# Tests that exercise rate limiting set their own budgets.
+RATE_LIMITS: dict[str, dict[str, str]] = {}
+
+# SLOW QUERY LOG
+# ------------------------------------------------------------------------------
+# Its background thread would hold a connection to the test database.
+SLOW_QUERY_MS = None
 # Your stuff...
 # ------------------------------------------------------------------------------
@@ -7,6 +7,9 @@ from django.urls import path
 from django.views import defaults as default_views
 from django.views.generic import TemplateView
 
+from ravelry_enhancer.monitoring.views import metrics_view
+from ravelry_enhancer.utils.views import service_worker_view
+
 urlpatterns = [
     path("", TemplateView.as_view(template_name="pages/home.html"), name="home"),
     path(
@@ -14,12 +17,23 @@ urlpatterns = [
         TemplateView.as_view(template_name="pages/about.html"),
         name="about",
     ),
+    # Served from the root so the worker's scope covers the whole site
+    path("sw.js", service_worker_view, name="service-worker"),
+    # Staff-only profiling, ahead of the admin so its catch-all doesn't match first
+    path(
+        f"{settings.ADMIN_URL}monitoring/",
+        include("ravelry_enhancer.monitoring.urls", namespace="monitoring"),
+    ),
     # Django Admin, use {% url 'admin:index' %}
     path(settings.ADMIN_URL, admin.site.urls),
+    # Prometheus scrape target, behind a secret path like the admin
+    path(settings.METRICS_URL, metrics_view, name="metrics"),
     # User management
     path("users/", include("ravelry_enhancer.users.urls", namespace="users")),
     path("accounts/", include("allauth.urls")),
     # Your stuff: custom urls includes go here
+    path("ravelry/", include("ravelry_enhancer.ravelry.urls", namespace="ravelry")),
+    path("library/", include("ravelry_enhancer.library.urls", namespace="library")),
     # ...
     # Media files
     *static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT),
@@ -1,14 +1,193 @@
+import time
+from collections import defaultdict
+
 import pytest
+from django.db import connection
+from django.test.utils import setup_databases
+from django.test.utils import teardown_databases
+from filelock import FileLock
 
+from ravelry_enhancer.ravelry.fake_server import FakeRavelryServer
 from ravelry_enhancer.users.models import User
 from ravelry_enhancer.users.tests.factories import UserFactory
 
+SEED_EMAIL_DOMAIN = "seed.example.com"
+SEED_USER_COUNT = 200
+SLOWEST_FIXTURES_SHOWN = 10
+
 
 @pytest.fixture(autouse=True)
 def _media_storage(settings, tmpdir) -> None:
     settings.MEDIA_ROOT = tmpdir.strpath
+    settings.DATA_EXPORT_ROOT = tmpdir.join("exports").strpath
 
 
 @pytest.fixture()
 def user(db) -> User:
     return UserFactory()
+
+
+@pytest.fixture(scope="session")
+def seeded_users(django_db_setup, django_db_blocker) -> list[User]:
+    """Users present in every test database. Treat them as read-only."""
+    with django_db_blocker.unblock():
+        return list(
+            User.objects.filter(email__endswith=f"@{SEED_EMAIL_DOMAIN}").order_by("pk"),
+        )
+
+
+@pytest.fixture(scope="session")
+def fake_ravelry_server():
+    server = FakeRavelryServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture()
+def fake_ravelry(fake_ravelry_server, settings) -> FakeRavelryServer:
+    """A reset fake Ravelry with the Ravelry URL settings pointed at it."""
+    fake_ravelry_server.reset()
+    settings.RAVELRY_API_URL = fake_ravelry_server.url
+    settings.RAVELRY_OAUTH_URL = f"{fake_ravelry_server.url}/oauth2"
+    return fake_ravelry_server
+
+
+# Parallel database setup
+# ------------------------------------------------------------------------------
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings() -> None:  # noqa: PT004
+    """Every worker shares one template database name; see `django_db_setup`."""
+
+
+@pytest.fixture(scope="session")
+def django_db_setup(  # noqa: PLR0913, PT004
+    request,
+    worker_id,
+    tmp_path_factory,
+    django_test_environment,
+    django_db_blocker,
+    django_db_keepdb,
+    django_db_createdb,
+    django_db_modify_db_settings,
+):
+    """
+    Migrate and seed a template database once, then clone it for each worker.
+
+    The first process to take the lock builds the template; under
+    ``pytest -n`` every xdist worker then gets a ``CREATE DATABASE ... TEMPLATE``
+    copy, which is far faster than running migrations per worker. Serial runs use
+    the template directly. With ``--reuse-db`` the template survives between runs.
+    """
+    verbosity = request.config.option.verbose
+    keepdb = django_db_keepdb and not django_db_createdb
+    parallel = worker_id != "master"
+    root = tmp_path_factory.getbasetemp()
+    if parallel:
+        root = root.parent
+    db_cfg = []
+
+    with django_db_blocker.unblock(), FileLock(root / "django_db.lock"):
+        ready = root / "django_db.ready"
+        if ready.exists():
+            connection.settings_dict["NAME"] = connection.creation._get_test_db_name()  # noqa: SLF001
+        else:
+            db_cfg = setup_databases(
+                verbosity=verbosity,
+                interactive=False,
+                keepdb=keepdb,
+                aliases={connection.alias},
+                serialized_aliases=set(),
+            )
+            _seed_database()
+            ready.touch()
+        if parallel:
+            # CREATE DATABASE ... TEMPLATE fails while anyone is connected to it.
+            connection.close()
+            connection.creation.clone_test_db(
+                suffix=worker_id,
+                verbosity=verbosity,
+                keepdb=False,
+            )
+            connection.settings_dict.update(
+                connection.creation.get_test_db_clone_settings(worker_id),
+            )
+
+    yield
+
+    with django_db_blocker.unblock():
+        if parallel:
+            connection.creation.destroy_test_db(
+                connection.settings_dict["NAME"],
+                verbosity=verbosity,
+            )
+        elif db_cfg and not keepdb:
+            teardown_databases(db_cfg, verbosity=verbosity)
+
+
+def _seed_database():
+    if User.objects.filter(email__endswith=f"@{SEED_EMAIL_DOMAIN}").exists():
+        return
+    User.objects.bulk_create_users(
+        (
+            {"email": f"user{index}@{SEED_EMAIL_DOMAIN}", "name": f"Seed {index}"}
+            for index in range(SEED_USER_COUNT)
+        ),
+        workers=1,
+    )
+
+
+# Fixture timing report
+# ------------------------------------------------------------------------------
+class FixtureTimer:
+    """
+    Report the fixtures that cost the most setup time across the whole run.
+
+    Registered as a plugin rather than as conftest hooks because conftest hooks
+    only see fixtures scoped below this directory, which misses session fixtures
+    such as ``django_db_setup``.
+    """
+
+    def __init__(self):
+        self.pending: list[tuple[str, float]] = []
+        self.totals: dict[str, list[float]] = defaultdict(list)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_fixture_setup(self, fixturedef, request):
+        start = time.perf_counter()
+        yield
+        self.pending.append((fixturedef.argname, time.perf_counter() - start))
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        outcome = yield
+        # Ride along on the report so xdist ships worker timings to the controller.
+        if call.when == "setup":
+            outcome.get_result().user_properties.append(
+                ("fixture_timings", self.pending),
+            )
+            self.pending = []
+
+    def pytest_runtest_logreport(self, report):
+        for name, value in report.user_properties:
+            if name == "fixture_timings":
+                for argname, duration in value:
+                    self.totals[argname].append(duration)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.totals:
+            return
+        slowest = sorted(
+            self.totals.items(),
+            key=lambda item: sum(item[1]),
+            reverse=True,
+        )[:SLOWEST_FIXTURES_SHOWN]
+        terminalreporter.write_sep("=", f"slowest {len(slowest)} fixtures")
+        for argname, durations in slowest:
+            terminalreporter.write_line(
+                f"{sum(durations):8.2f}s total {len(durations):6d} setups  {argname}",
+            )
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(FixtureTimer(), "fixture-timer")
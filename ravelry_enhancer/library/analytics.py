@@ -0,0 +1,131 @@
+"""
+Knitting and stash analytics for users with years of history.
+
+Raw history lives in `ActivityEvent`, a table range-partitioned by month, so
+that recent activity and any one month's events are cheap to scan. Pages
+never aggregate it directly. They read two materialized views:
+`MonthlyActivity`, which holds per-month totals, and `ProjectDuration`, which
+holds per-category averages over finished projects. The worker rebuilds both
+with `refresh_rollups`. Refreshes are ``CONCURRENTLY``, so readers keep
+seeing the previous totals instead of waiting on the rebuild.
+
+The rendered tables are cached per user by `analytics_fragment`. Their cache
+keys include a generation that each refresh bumps, so a refresh retires
+every cached copy at once. ``manage.py warm_caches`` renders them ahead of
+the users' next visit.
+"""
+
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import UTC
+from datetime import date
+
+from django.core.cache import cache
+from django.db import connection
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.safestring import SafeString
+from django.utils.safestring import mark_safe
+
+from ravelry_enhancer.library.models import ActivityEvent
+from ravelry_enhancer.library.models import MonthlyActivity
+from ravelry_enhancer.library.models import ProjectDuration
+from ravelry_enhancer.users.models import User
+
+ROLLUPS = [MonthlyActivity, ProjectDuration]
+GENERATION_KEY = "analytics:generation"
+FRAGMENT_TIMEOUT = 24 * 60 * 60
+
+
+@dataclass
+class MonthSummary:
+    month: date
+    knit_seconds: int = 0
+    rows: int = 0
+    meters_added: float = 0
+    meters_used: float = 0
+    grams_added: float = 0
+    grams_used: float = 0
+
+    @property
+    def knit_hours(self) -> float:
+        return self.knit_seconds / 3600
+
+
+def _month(event: ActivityEvent) -> date:
+    return event.occurred.astimezone(UTC).date().replace(day=1)
+
+
+def partition_name(month: date) -> str:
+    return f"{ActivityEvent._meta.db_table}_p{month:%Y_%m}"  # noqa: SLF001
+
+
+def ensure_partitions(months: Iterable[date]):
+    """Create the monthly `ActivityEvent` partitions that do not exist yet."""
+    table = connection.ops.quote_name(ActivityEvent._meta.db_table)  # noqa: SLF001
+    with connection.cursor() as cursor:
+        for month in sorted(set(months)):
+            start = month.replace(day=1)
+            end = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+            name = connection.ops.quote_name(partition_name(start))
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                "FOR VALUES FROM (%s) TO (%s)",
+                [f"{start} 00:00+00", f"{end} 00:00+00"],
+            )
+
+
+def record_activity(events: list[ActivityEvent]):
+    if not events:
+        return
+    with transaction.atomic():
+        ensure_partitions(_month(event) for event in events)
+        ActivityEvent.objects.bulk_create(events)
+
+
+def refresh_rollups():
+    with connection.cursor() as cursor:
+        for model in ROLLUPS:
+            cursor.execute(
+                "REFRESH MATERIALIZED VIEW CONCURRENTLY "
+                + connection.ops.quote_name(model._meta.db_table),  # noqa: SLF001
+            )
+    cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def monthly_summary(user: User) -> list[MonthSummary]:
+    """Return ``user``'s knitting and stash totals by month, newest first."""
+    months: dict[date, MonthSummary] = {}
+    for total in MonthlyActivity.objects.filter(user=user):
+        summary = months.setdefault(total.month, MonthSummary(total.month))
+        if total.kind == ActivityEvent.Kind.KNIT:
+            summary.knit_seconds += total.seconds
+            summary.rows += total.rows
+        elif total.kind == ActivityEvent.Kind.STASH_IN:
+            summary.meters_added += total.meters
+            summary.grams_added += total.grams
+        elif total.kind == ActivityEvent.Kind.STASH_OUT:
+            summary.meters_used += total.meters
+            summary.grams_used += total.grams
+    return list(months.values())
+
+
+def fragment_key(user: User) -> str:
+    return f"analytics:{user.pk}:{cache.get(GENERATION_KEY, 0)}"
+
+
+def analytics_fragment(user: User) -> SafeString:
+    """Return ``user``'s analytics tables as HTML, from the cache if possible."""
+    key = fragment_key(user)
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string(
+            "library/analytics_tables.html",
+            {
+                "months": monthly_summary(user),
+                "durations": ProjectDuration.objects.filter(user=user),
+            },
+        )
+        cache.set(key, html, FRAGMENT_TIMEOUT)
+    return mark_safe(html)  # noqa: S308
@@ -0,0 +1,428 @@
+"""
+Lace and colourwork charts: a compact text notation and SVG/PNG rendering.
+
+A chart is written one row per line, starting from row 1 at the bottom, the
+order it is knitted in. A row is a space-separated list of stitches. A stitch
+is a symbol from `SYMBOLS` or a colour declared on a ``colors:`` line,
+optionally followed by a count. A parenthesised group can be followed by a
+repeat count::
+
+    colors: A=#f1faee B=#1d3557
+    A3 B2 A3
+    (A1 B1)4
+    k2 yo k2tog ssk yo k2
+
+Rows shorter than the widest row are padded with no-stitch cells. Lines
+starting with ``#`` are comments.
+
+Rendering never visits cells one at a time. Rows are kept as runs of
+identical stitches, and each run becomes a single rectangle, extended upwards
+while the rows above repeat it. Symbols are drawn by ``<use>`` references
+inside a repeating pattern fill. The most common fill becomes the background
+and gets no rectangles at all.
+"""
+
+import hashlib
+import io
+import json
+import re
+from collections import Counter
+from collections import defaultdict
+from dataclasses import dataclass
+from dataclasses import field
+from functools import cache as memoize
+
+from django.core.cache import cache
+from PIL import Image
+from PIL import ImageDraw
+
+DEFAULT_CELL_SIZE = 12
+MAX_CHART_SIZE = 1000
+# Bump when rendering output changes to retire cached charts.
+RENDER_VERSION = 1
+CACHE_TIMEOUT = 60 * 60 * 24 * 30
+GRID_COLOR = "#999999"
+INK_COLOR = "#000000"
+# Cells to the right of the chart kept free for row numbers.
+NUMBER_MARGIN = 2
+
+_ROW_TOKEN = re.compile(r"\(|\)(\d*)|[^\s()]+")
+_COLOR_NAME = re.compile(r"[A-Z]+")
+_COLOR_VALUE = re.compile(r"#(?:[0-9a-fA-F]{3}){1,2}")
+
+
+class ChartSyntaxError(ValueError):
+    def __init__(self, line: int, message: str):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+
+@dataclass(frozen=True)
+class Glyph:
+    """A stitch symbol drawn in a unit cell, with y pointing down."""
+
+    fill: str = "#ffffff"
+    lines: tuple[tuple[tuple[float, float], ...], ...] = ()
+    # Centre, radius and whether the circle is filled.
+    circles: tuple[tuple[float, float, float, bool], ...] = ()
+
+
+SYMBOLS = {
+    "k": Glyph(),
+    "p": Glyph(circles=((0.5, 0.5, 0.12, True),)),
+    "yo": Glyph(circles=((0.5, 0.5, 0.3, False),)),
+    "k2tog": Glyph(lines=(((0.2, 0.8), (0.8, 0.2)),)),
+    "ssk": Glyph(lines=(((0.2, 0.2), (0.8, 0.8)),)),
+    "cdd": Glyph(lines=(((0.2, 0.8), (0.5, 0.2), (0.8, 0.8)),)),
+    "m1": Glyph(lines=(((0.2, 0.8), (0.2, 0.2), (0.5, 0.5), (0.8, 0.2), (0.8, 0.8)),)),
+    "ns": Glyph(fill="#bbbbbb"),
+}
+NO_STITCH = "ns"
+
+Run = tuple[str, int]
+
+
+@dataclass
+class Chart:
+    """Rows from the bottom up, each a list of ``(stitch, count)`` runs."""
+
+    rows: list[list[Run]]
+    colors: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def width(self) -> int:
+        return max((_width(row) for row in self.rows), default=0)
+
+    @property
+    def height(self) -> int:
+        return len(self.rows)
+
+    def glyph(self, stitch: str) -> Glyph:
+        if stitch in self.colors:
+            return Glyph(fill=self.colors[stitch])
+        return SYMBOLS[stitch]
+
+
+def _width(runs: list[Run]) -> int:
+    return sum(count for _, count in runs)
+
+
+def _parse_stitch(token: str, known: set[str], line: int) -> Run:
+    if token in known:
+        return token, 1
+    # Prefer the longest known name, so "m12" is two m1 rather than twelve m.
+    for split in range(len(token) - 1, 0, -1):
+        stitch, count = token[:split], token[split:]
+        if not count.isdigit():
+            break
+        if stitch in known:
+            return stitch, int(count)
+    msg = f"unknown stitch {token!r}"
+    raise ChartSyntaxError(line, msg)
+
+
+def _parse_row(text: str, known: set[str], line: int) -> list[Run]:
+    groups: list[list[Run]] = [[]]
+    for match in _ROW_TOKEN.finditer(text):
+        part = match.group()
+        if part == "(":
+            groups.append([])
+        elif part.startswith(")"):
+            if len(groups) == 1:
+                raise ChartSyntaxError(line, "unmatched ')'")
+            group = groups.pop()
+            repeat = int(match.group(1) or 1)
+            if _width(group) * repeat > MAX_CHART_SIZE:
+                raise ChartSyntaxError(line, "row is too wide")
+            groups[-1].extend(group * repeat)
+        else:
+            groups[-1].append(_parse_stitch(part, known, line))
+    if len(groups) != 1:
+        raise ChartSyntaxError(line, "unclosed '('")
+    runs = _merge_runs(groups[0])
+    if _width(runs) > MAX_CHART_SIZE:
+        raise ChartSyntaxError(line, "row is too wide")
+    return runs
+
+
+def _merge_runs(stitches: list[Run]) -> list[Run]:
+    runs: list[Run] = []
+    for stitch, count in stitches:
+        if runs and runs[-1][0] == stitch:
+            runs[-1] = (stitch, runs[-1][1] + count)
+        elif count:
+            runs.append((stitch, count))
+    return runs
+
+
+def _parse_colors(text: str, line: int) -> dict[str, str]:
+    colors = {}
+    for item in text.split():
+        name, _, value = item.partition("=")
+        if not _COLOR_NAME.fullmatch(name) or not _COLOR_VALUE.fullmatch(value):
+            msg = f"colours are written NAME=#rrggbb, not {item!r}"
+            raise ChartSyntaxError(line, msg)
+        colors[name] = value.lower()
+    return colors
+
+
+def parse_chart(source: str) -> Chart:
+    colors: dict[str, str] = {}
+    rows = []
+    for line, raw in enumerate(source.splitlines(), start=1):
+        text = raw.strip()
+        if not text or text.startswith("#"):
+            continue
+        if text.startswith("colors:"):
+            colors.update(_parse_colors(text.removeprefix("colors:"), line))
+            continue
+        rows.append(_parse_row(text, SYMBOLS.keys() | colors.keys(), line))
+        if len(rows) > MAX_CHART_SIZE:
+            raise ChartSyntaxError(line, "chart has too many rows")
+
+    chart = Chart(rows, colors)
+    width = chart.width
+    for row in rows:
+        if (missing := width - _width(row)) > 0:
+            row.append((NO_STITCH, missing))
+    return chart
+
+
+def _layout(chart: Chart) -> tuple[str, dict[str, list[list[int]]]]:
+    """
+    Return the background stitch and ``[x, y, length, rows]`` rectangles of
+    the others.
+
+    Runs repeated at the same place on consecutive rows share one rectangle. y
+    counts down from the top row, so row 1 is at ``y = height - 1``.
+    """
+    cells: Counter[str] = Counter()
+    rects: dict[str, list[list[int]]] = defaultdict(list)
+    below: dict[tuple[str, int, int], list[int]] = {}
+    for number, row in enumerate(chart.rows):
+        y = chart.height - 1 - number
+        x = 0
+        current = {}
+        for stitch, count in row:
+            cells[stitch] += count
+            key = (stitch, x, count)
+            if rect := below.get(key):
+                rect[1] = y
+                rect[3] += 1
+            else:
+                rect = [x, y, count, 1]
+                rects[stitch].append(rect)
+            current[key] = rect
+            x += count
+        below = current
+    background = cells.most_common(1)[0][0] if cells else "k"
+    rects.pop(background, None)
+    return background, rects
+
+
+def _number(value: float) -> str:
+    return f"{value:g}"
+
+
+def _glyph_svg(glyph: Glyph) -> str:
+    parts = [
+        '<path d="{}"/>'.format(
+            "".join(
+                "M" + "L".join(f"{_number(x)} {_number(y)}" for x, y in points)
+                for points in glyph.lines
+            ),
+        ),
+    ]
+    for cx, cy, r, filled in glyph.circles:
+        fill = f' fill="{INK_COLOR}"' if filled else ""
+        parts.append(
+            f'<circle cx="{_number(cx)}" cy="{_number(cy)}" r="{_number(r)}"{fill}/>',
+        )
+    return "".join(parts)
+
+
+def render_svg(
+    chart: Chart,
+    cell_size: int = DEFAULT_CELL_SIZE,
+    *,
+    numbers: bool = True,
+) -> str:
+    """Render a chart as SVG, one unit per stitch scaled to ``cell_size`` px."""
+    width, height = chart.width, chart.height
+    total_width = width + (NUMBER_MARGIN if numbers else 0)
+    background, rects = _layout(chart)
+
+    defs = [
+        '<pattern id="grid" width="1" height="1" patternUnits="userSpaceOnUse">'
+        f'<path d="M1 0V1H0" fill="none" stroke="{GRID_COLOR}" '
+        'stroke-width="0.05"/></pattern>',
+    ]
+    fills = {}
+    for stitch in [background, *rects]:
+        glyph = chart.glyph(stitch)
+        if not glyph.lines and not glyph.circles:
+            fills[stitch] = glyph.fill
+            continue
+        defs.append(
+            f'<symbol id="s-{stitch}" viewBox="0 0 1 1" fill="none" '
+            f'stroke="{INK_COLOR}" stroke-width="0.08">{_glyph_svg(glyph)}</symbol>'
+            f'<pattern id="p-{stitch}" width="1" height="1" '
+            f'patternUnits="userSpaceOnUse">'
+            f'<rect width="1" height="1" fill="{glyph.fill}"/>'
+            f'<use href="#s-{stitch}" width="1" height="1"/></pattern>',
+        )
+        fills[stitch] = f"url(#p-{stitch})"
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" '
+        f'viewBox="0 0 {total_width} {height}" '
+        f'width="{total_width * cell_size}" height="{height * cell_size}">',
+        f"<defs>{''.join(defs)}</defs>",
+        f'<rect width="{width}" height="{height}" fill="{fills[background]}"/>',
+    ]
+    for stitch, stitch_rects in rects.items():
+        parts.append(f'<g fill="{fills[stitch]}">')
+        parts.extend(
+            f'<rect x="{x}" y="{y}" width="{length}" height="{rows}"/>'
+            for x, y, length, rows in stitch_rects
+        )
+        parts.append("</g>")
+    parts.append(f'<rect width="{width}" height="{height}" fill="url(#grid)"/>')
+    if numbers:
+        parts.append('<g font-size="0.6" font-family="sans-serif">')
+        parts.extend(
+            f'<text x="{width + 0.3:g}" y="{height - number + 0.7:g}">{number}</text>'
+            for number in range(1, height + 1)
+        )
+        parts.append("</g>")
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+@memoize
+def _glyph_tile(glyph: Glyph, cell_size: int) -> Image.Image:
+    tile = Image.new("RGB", (cell_size, cell_size), glyph.fill)
+    draw = ImageDraw.Draw(tile)
+    stroke = max(1, round(cell_size * 0.08))
+    for points in glyph.lines:
+        draw.line(
+            [(x * cell_size, y * cell_size) for x, y in points],
+            fill=INK_COLOR,
+            width=stroke,
+        )
+    for cx, cy, r, filled in glyph.circles:
+        box = [(cx - r) * cell_size, (cy - r) * cell_size]
+        box += [(cx + r) * cell_size, (cy + r) * cell_size]
+        draw.ellipse(
+            box,
+            fill=INK_COLOR if filled else None,
+            outline=INK_COLOR,
+            width=stroke,
+        )
+    return tile
+
+
+def _fill_rect(image: Image.Image, tile: Image.Image, rect: list[int]):
+    # Tile by doubling what is already filled rather than pasting every cell.
+    x, y, length, rows = rect
+    size = tile.width
+    block = Image.new("RGB", (length * size, rows * size))
+    block.paste(tile, (0, 0))
+    filled = 1
+    while filled < length:
+        block.paste(block.crop((0, 0, filled * size, size)), (filled * size, 0))
+        filled *= 2
+    filled = 1
+    while filled < rows:
+        block.paste(
+            block.crop((0, 0, length * size, filled * size)),
+            (0, filled * size),
+        )
+        filled *= 2
+    image.paste(block, (x * size, y * size))
+
+
+def render_png(
+    chart: Chart,
+    cell_size: int = DEFAULT_CELL_SIZE,
+    *,
+    numbers: bool = True,
+) -> bytes:
+    width, height = chart.width, chart.height
+    total_width = width + (NUMBER_MARGIN if numbers else 0)
+    background, rects = _layout(chart)
+    image = Image.new("RGB", (total_width * cell_size, height * cell_size), "white")
+    draw = ImageDraw.Draw(image)
+
+    for stitch, stitch_rects in [
+        (background, [[0, 0, width, height]]),
+        *rects.items(),
+    ]:
+        glyph = chart.glyph(stitch)
+        if glyph.lines or glyph.circles:
+            tile = _glyph_tile(glyph, cell_size)
+            for rect in stitch_rects:
+                _fill_rect(image, tile, rect)
+            continue
+        for x, y, length, rows in stitch_rects:
+            draw.rectangle(
+                [
+                    x * cell_size,
+                    y * cell_size,
+                    (x + length) * cell_size - 1,
+                    (y + rows) * cell_size - 1,
+                ],
+                fill=glyph.fill,
+            )
+
+    for x in range(width + 1):
+        draw.line(
+            [(x * cell_size, 0), (x * cell_size, height * cell_size)],
+            fill=GRID_COLOR,
+        )
+    for y in range(height + 1):
+        draw.line(
+            [(0, y * cell_size), (width * cell_size, y * cell_size)],
+            fill=GRID_COLOR,
+        )
+    if numbers:
+        for number in range(1, height + 1):
+            draw.text(
+                ((width + 0.3) * cell_size, (height - number) * cell_size),
+                str(number),
+                fill=INK_COLOR,
+            )
+
+    output = io.BytesIO()
+    # Encoding dominates the render time, and charts are flat colour anyway.
+    image.save(output, "PNG", compress_level=1)
+    return output.getvalue()
+
+
+RENDERERS = {
+    "svg": lambda chart, **options: render_svg(chart, **options).encode(),
+    "png": render_png,
+}
+
+
+def render_chart(
+    source: str,
+    fmt: str = "svg",
+    cell_size: int = DEFAULT_CELL_SIZE,
+    *,
+    numbers: bool = True,
+) -> bytes:
+    """
+    Parse and render a chart, caching the output by source and options.
+
+    Raises `ChartSyntaxError` for a malformed chart.
+    """
+    options = {"cell_size": cell_size, "numbers": numbers}
+    key = hashlib.sha256(
+        json.dumps([RENDER_VERSION, source, fmt, options]).encode(),
+    ).hexdigest()
+    rendered = cache.get(f"chart:{key}")
+    if rendered is None:
+        rendered = RENDERERS[fmt](parse_chart(source), **options)
+        cache.set(f"chart:{key}", rendered, CACHE_TIMEOUT)
+    return rendered
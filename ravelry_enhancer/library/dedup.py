@@ -0,0 +1,128 @@
+"""
+Find stash entries that name the same yarn in different words.
+
+Comparing every pair of names is quadratic, so candidates are blocked first:
+two entries are only compared when they share a yarn weight and fibre and at
+least one name token. Tokens so common that all pairs of their entries would
+pull a large share of a block back into quadratic comparison ("wool", "yarn")
+are blocked on a sorted neighbourhood instead: their entries are sorted by
+name with its words in order, as token_sort_ratio compares them, and each is
+paired with the next `NEIGHBOURHOOD` entries. Each surviving pair is scored
+with rapidfuzz and matches are merged into clusters with union-find.
+
+`ravelry_enhancer.library.stash_duplicates` applies this to a user's stash.
+"""
+
+import re
+from collections import Counter
+from collections import defaultdict
+from collections.abc import Hashable
+from collections.abc import Iterable
+from dataclasses import dataclass
+from itertools import combinations
+
+from rapidfuzz import fuzz
+
+# Scores are 0-100; token_sort_ratio ignores word order.
+DEFAULT_THRESHOLD = 88
+# Entries sharing a token are all paired, up to this many within a block.
+MAX_TOKEN_POSTINGS = 50
+# Beyond that, each is paired with this many neighbours in sorted-name order.
+NEIGHBOURHOOD = 10
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+@dataclass(frozen=True)
+class YarnName:
+    key: Hashable
+    name: str
+    weight: str = ""
+    fiber: str = ""
+
+
+@dataclass
+class DuplicateCluster:
+    """Entries judged to be the same yarn, with the name to merge them under."""
+
+    keys: list[Hashable]
+    suggested_name: str
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(_NON_ALNUM.split(name.casefold())).strip()
+
+
+def _blocks(entries: list[YarnName]) -> dict[tuple[str, str], list[int]]:
+    blocks: dict[tuple[str, str], list[int]] = defaultdict(list)
+    for position, entry in enumerate(entries):
+        blocks[normalize_name(entry.weight), normalize_name(entry.fiber)].append(
+            position,
+        )
+    return blocks
+
+
+def candidate_pairs(
+    entries: list[YarnName],
+    names: list[str],
+) -> set[tuple[int, int]]:
+    """Return index pairs worth scoring: same block and a shared token."""
+    sort_keys = [" ".join(sorted(name.split())) for name in names]
+    pairs: set[tuple[int, int]] = set()
+    for positions in _blocks(entries).values():
+        postings: dict[str, list[int]] = defaultdict(list)
+        for position in positions:
+            for token in set(names[position].split()):
+                postings[token].append(position)
+        for posting in postings.values():
+            if len(posting) <= MAX_TOKEN_POSTINGS:
+                pairs.update(combinations(sorted(posting), 2))
+                continue
+            posting.sort(key=lambda position: (sort_keys[position], position))
+            for offset, first in enumerate(posting):
+                for second in posting[offset + 1 : offset + 1 + NEIGHBOURHOOD]:
+                    pairs.add((min(first, second), max(first, second)))
+    return pairs
+
+
+def find_duplicates(
+    entries: Iterable[YarnName],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> list[DuplicateCluster]:
+    """Cluster entries whose names match at or above ``threshold``."""
+    entries = list(entries)
+    names = [normalize_name(entry.name) for entry in entries]
+    parents = list(range(len(entries)))
+
+    def find(position: int) -> int:
+        while parents[position] != position:
+            parents[position] = parents[parents[position]]
+            position = parents[position]
+        return position
+
+    for first, second in candidate_pairs(entries, names):
+        if fuzz.token_sort_ratio(names[first], names[second]) >= threshold:
+            parents[find(first)] = find(second)
+
+    groups: dict[int, list[int]] = defaultdict(list)
+    for position in range(len(entries)):
+        groups[find(position)].append(position)
+    clusters = []
+    for positions in groups.values():
+        if len(positions) < 2:  # noqa: PLR2004
+            continue
+        # Suggest the most common spelling of the most common normalised name;
+        # max() keeps the first entry seen on ties.
+        forms = Counter(names[position] for position in positions)
+        form = max(forms, key=forms.__getitem__)
+        spellings = Counter(
+            entries[position].name for position in positions if names[position] == form
+        )
+        suggested_name = max(spellings, key=spellings.__getitem__)
+        clusters.append(
+            DuplicateCluster(
+                keys=[entries[position].key for position in positions],
+                suggested_name=suggested_name,
+            ),
+        )
+    return clusters
@@ -0,0 +1,287 @@
+"""
+Everything held about a user, as a zip archive built as a stream.
+
+`iter_export` yields the archive a piece at a time. Table rows are read
+through server-side cursors and written as NDJSON members. Pattern PDFs and
+uploaded spreadsheets are copied a chunk at a time. Nothing held in memory
+grows with the account. Members are written with data descriptors, so the
+archive never seeks back, and as ZIP64, so members over 4 GB stay valid.
+
+Small accounts are streamed straight to the browser. When a user's files add
+up to more than ``DATA_EXPORT_STREAM_MAX_BYTES``, the worker writes the
+archive to a `DataExport` file instead. A web worker is then not held for the
+length of a multi-gigabyte download. Built archives are kept outside
+MEDIA_ROOT, served only to their owner, and deleted after
+``DATA_EXPORT_RETENTION_DAYS``.
+"""
+
+import io
+import json
+import zipfile
+from collections.abc import Iterable
+from collections.abc import Iterator
+from datetime import timedelta
+from pathlib import PurePath
+
+from allauth.account.models import EmailAddress
+from allauth.socialaccount.models import SocialAccount
+from django.conf import settings
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.db.models import QuerySet
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from ravelry_enhancer.library.models import ActivityEvent
+from ravelry_enhancer.library.models import DataExport
+from ravelry_enhancer.library.models import KnittingSession
+from ravelry_enhancer.library.models import Needle
+from ravelry_enhancer.library.models import NeedleRequirement
+from ravelry_enhancer.library.models import NeedleUse
+from ravelry_enhancer.library.models import PatternFile
+from ravelry_enhancer.library.models import Project
+from ravelry_enhancer.library.models import QueuedPattern
+from ravelry_enhancer.library.models import StashImport
+from ravelry_enhancer.library.models import StashItem
+from ravelry_enhancer.library.pattern_store import iter_document_bytes
+from ravelry_enhancer.monitoring.tracing import job_span
+from ravelry_enhancer.users.models import User
+
+# Rows fetched per round trip from each server-side cursor.
+CURSOR_ROWS = 2000
+# Hand the archive on once this much of it has been written.
+FLUSH_SIZE = 256 * 1024
+
+ACCOUNT_FIELDS = ["id", "email", "name", "date_joined", "last_login"]
+
+
+class _Pipe:
+    """A write-only file that `zipfile` writes to and `iter_export` drains."""
+
+    def __init__(self):
+        self._parts: list[bytes] = []
+        self.size = 0
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        self.size = 0
+        return data
+
+
+class _IteratorFile(io.RawIOBase):
+    """A readable file over an iterator of bytes, for `Storage.save`."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = memoryview(chunk)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def _ndjson(rows: QuerySet) -> Iterator[bytes]:
+    for row in rows.iterator(chunk_size=CURSOR_ROWS):
+        yield json.dumps(row, cls=DjangoJSONEncoder).encode() + b"\n"
+
+
+def _pattern_path(pattern_file: PatternFile) -> str:
+    name = get_valid_filename(pattern_file.name.removesuffix(".pdf")) or "pattern"
+    return f"patterns/{pattern_file.pk}-{name}.pdf"
+
+
+def _upload_path(stash_import: StashImport) -> str:
+    return f"stash_imports/{stash_import.pk}-{PurePath(stash_import.file.name).name}"
+
+
+def _upload_bytes(stash_import: StashImport) -> Iterator[bytes]:
+    with stash_import.file.open("rb") as upload:
+        yield from upload.chunks()
+
+
+def _members(user: User) -> Iterator[tuple[str, Iterator[bytes], bool]]:
+    """Yield ``(path, contents, compress)`` for each member of the archive."""
+    account = User.objects.filter(pk=user.pk).values(*ACCOUNT_FIELDS).get()
+    yield (
+        "account.json",
+        iter([json.dumps(account, cls=DjangoJSONEncoder, indent=2).encode()]),
+        True,
+    )
+    patterns = PatternFile.objects.filter(user=user).order_by("pk")
+    tables = {
+        "email_addresses.ndjson": EmailAddress.objects.filter(user=user)
+        .order_by("pk")
+        .values("email", "verified", "primary"),
+        # Not the OAuth tokens: they are ours, not the user's.
+        "ravelry_accounts.ndjson": SocialAccount.objects.filter(user=user)
+        .order_by("pk")
+        .values("provider", "uid", "date_joined", "last_login", "extra_data"),
+        "projects.ndjson": Project.objects.filter(user=user).order_by("pk").values(),
+        "knitting_sessions.ndjson": KnittingSession.objects.filter(
+            project__user=user,
+        )
+        .order_by("pk")
+        .values(),
+        "needles.ndjson": Needle.objects.filter(user=user).order_by("pk").values(),
+        "needle_uses.ndjson": NeedleUse.objects.filter(needle__user=user)
+        .order_by("pk")
+        .values(),
+        "queue.ndjson": QueuedPattern.objects.filter(user=user).order_by("pk").values(),
+        "needle_requirements.ndjson": NeedleRequirement.objects.filter(
+            pattern__user=user,
+        )
+        .order_by("pk")
+        .values(),
+        "stash.ndjson": StashItem.objects.filter(user=user).order_by("pk").values(),
+        "stash_imports.ndjson": StashImport.objects.filter(user=user)
+        .order_by("pk")
+        .values("id", "file", "status", "rows_imported", "rows_failed", "created"),
+        "activity.ndjson": ActivityEvent.objects.filter(user=user)
+        .order_by("occurred")
+        .values(),
+        "patterns.ndjson": patterns.values(
+            "id",
+            "name",
+            "uploaded",
+            "document__digest",
+            "document__size",
+        ),
+    }
+    for path, rows in tables.items():
+        yield path, _ndjson(rows), True
+    for pattern_file in patterns.select_related("document").iterator(
+        chunk_size=CURSOR_ROWS,
+    ):
+        # PDFs are compressed already.
+        yield (
+            _pattern_path(pattern_file),
+            iter_document_bytes(pattern_file.document),
+            False,
+        )
+    for stash_import in (
+        StashImport.objects.filter(user=user).exclude(file="").order_by("pk")
+    ):
+        yield _upload_path(stash_import), _upload_bytes(stash_import), True
+
+
+def iter_export(user: User) -> Iterator[bytes]:
+    """Yield a zip archive of everything held about ``user``."""
+    pipe = _Pipe()
+    with zipfile.ZipFile(pipe, "w") as archive:
+        for path, contents, compress in _members(user):
+            info = zipfile.ZipInfo(path, timezone.now().timetuple()[:6])
+            info.compress_type = (
+                zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+            )
+            with archive.open(info, "w", force_zip64=True) as member:
+                for data in contents:
+                    member.write(data)
+                    if pipe.size >= FLUSH_SIZE:
+                        yield pipe.drain()
+    # The central directory, written as the archive closes.
+    yield pipe.drain()
+
+
+def export_filename(user: User) -> str:
+    return f"ravelry-enhancer-{user.pk}-{timezone.now():%Y%m%d}.zip"
+
+
+def files_size(user: User) -> int:
+    """Roughly how many bytes of files an export of ``user`` would hold."""
+    total = PatternFile.objects.filter(user=user).aggregate(
+        total=Sum("document__size"),
+    )["total"]
+    return total or 0
+
+
+def should_stream(user: User) -> bool:
+    return files_size(user) <= settings.DATA_EXPORT_STREAM_MAX_BYTES
+
+
+def in_progress(user: User) -> QuerySet[DataExport]:
+    """
+    The user's exports still to be built. One running for longer than
+    ``DATA_EXPORT_TIMEOUT`` is taken to have died with its worker.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.DATA_EXPORT_TIMEOUT)
+    return user.data_exports.filter(
+        Q(status=DataExport.Status.PENDING)
+        | Q(status=DataExport.Status.RUNNING, started__gt=cutoff),
+    )
+
+
+def expire_data_exports() -> tuple[int, int]:
+    """
+    Mark builds that have timed out as failed, and delete exports older than
+    ``DATA_EXPORT_RETENTION_DAYS`` with their files.
+
+    Returns how many were failed and how many deleted.
+    """
+    now = timezone.now()
+    failed = DataExport.objects.filter(
+        status=DataExport.Status.RUNNING,
+        started__lte=now - timedelta(seconds=settings.DATA_EXPORT_TIMEOUT),
+    ).update(status=DataExport.Status.FAILED, finished=now)
+    expired = DataExport.objects.filter(
+        created__lt=now - timedelta(days=settings.DATA_EXPORT_RETENTION_DAYS),
+    ).exclude(status__in=[DataExport.Status.PENDING, DataExport.Status.RUNNING])
+    deleted = 0
+    for data_export in expired.iterator():
+        if data_export.file:
+            data_export.file.delete(save=False)
+        data_export.delete()
+        deleted += 1
+    return failed, deleted
+
+
+def run_data_export(data_export: DataExport):
+    """Write an export's archive to its file, recording progress on the row."""
+    with job_span(
+        "data export",
+        data_export.trace_context,
+        **{"data_export.id": data_export.pk},
+    ):
+        _run_data_export(data_export)
+
+
+def _run_data_export(data_export: DataExport):
+    data_export.status = DataExport.Status.RUNNING
+    data_export.started = timezone.now()
+    data_export.save(update_fields=["status", "started"])
+    try:
+        archive = io.BufferedReader(_IteratorFile(iter_export(data_export.user)))
+        data_export.file.save(
+            export_filename(data_export.user),
+            File(archive),
+            save=False,
+        )
+    except Exception:
+        data_export.status = DataExport.Status.FAILED
+        raise
+    else:
+        data_export.status = DataExport.Status.FINISHED
+        data_export.size = data_export.file.size
+    finally:
+        data_export.finished = timezone.now()
+        data_export.save()
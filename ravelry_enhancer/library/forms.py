@@ -0,0 +1,122 @@
+from django import forms
+from django.core.validators import FileExtensionValidator
+from django.utils.translation import gettext_lazy as _
+
+from ravelry_enhancer.library.models import Needle
+from ravelry_enhancer.library.models import StashItem
+from ravelry_enhancer.library.needles import parse_requirements
+from ravelry_enhancer.library.units import UnitError
+from ravelry_enhancer.library.units import normalize_yarn_weight
+from ravelry_enhancer.library.units import parse_length
+from ravelry_enhancer.library.units import parse_needle_size
+
+PDF_SIGNATURE = b"%PDF-"
+
+
+class PatternUploadForm(forms.Form):
+    file = forms.FileField(
+        label=_("Pattern PDF"),
+        validators=[FileExtensionValidator(["pdf"])],
+    )
+    name = forms.CharField(label=_("Name"), max_length=255, required=False)
+
+    def clean_file(self):
+        upload = self.cleaned_data["file"]
+        signature = upload.read(len(PDF_SIGNATURE))
+        upload.seek(0)
+        if signature != PDF_SIGNATURE:
+            raise forms.ValidationError(_("This file is not a PDF."))
+        return upload
+
+
+class PatternSearchForm(forms.Form):
+    q = forms.CharField(label=_("Search"), required=False)
+
+
+class NeedleForm(forms.ModelForm):
+    size_mm = forms.CharField(
+        label=_("Size"),
+        help_text=_('In mm, or a US, UK or hook size such as "US 7" or "H-8".'),
+    )
+
+    class Meta:
+        model = Needle
+        fields = ["kind", "size_mm", "length_cm", "notes"]
+
+    def clean_size_mm(self):
+        try:
+            return parse_needle_size(self.cleaned_data["size_mm"])
+        except UnitError as error:
+            raise forms.ValidationError(str(error)) from error
+
+
+class QueuedPatternForm(forms.Form):
+    name = forms.CharField(label=_("Pattern"), max_length=255)
+    needles = forms.CharField(
+        label=_("Needles"),
+        help_text=_('One per comma, such as "US 7 circular 80 cm, 4 mm dpns".'),
+    )
+
+    yarn_weight = forms.CharField(
+        label=_("Yarn weight"),
+        required=False,
+        help_text=_('Such as "worsted" or "4ply".'),
+    )
+    yarn_amount = forms.CharField(
+        label=_("Yarn needed"),
+        required=False,
+        help_text=_('Such as "800 m" or "950 yds".'),
+    )
+
+    def clean_yarn_weight(self):
+        if not (weight := self.cleaned_data["yarn_weight"]):
+            return ""
+        try:
+            return normalize_yarn_weight(weight)
+        except UnitError as error:
+            raise forms.ValidationError(str(error)) from error
+
+    def clean_yarn_amount(self):
+        if not (amount := self.cleaned_data["yarn_amount"]):
+            return None
+        try:
+            return parse_length(amount)
+        except UnitError as error:
+            raise forms.ValidationError(str(error)) from error
+
+    def clean_needles(self):
+        try:
+            return parse_requirements(self.cleaned_data["needles"])
+        except UnitError as error:
+            raise forms.ValidationError(str(error)) from error
+
+
+class ProjectNeedlesForm(forms.Form):
+    needles = forms.ModelMultipleChoiceField(
+        label=_("Needles"),
+        queryset=Needle.objects.none(),
+        required=False,
+        widget=forms.CheckboxSelectMultiple,
+    )
+
+    def __init__(self, *args, user, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["needles"].queryset = user.needles.all()
+
+
+class StashMergeForm(forms.Form):
+    items = forms.ModelMultipleChoiceField(queryset=StashItem.objects.none())
+    keep = forms.ModelChoiceField(queryset=StashItem.objects.none())
+
+    def __init__(self, *args, user, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["items"].queryset = user.stash.all()
+        self.fields["keep"].queryset = user.stash.all()
+
+    def clean(self):
+        cleaned_data = super().clean()
+        items = cleaned_data.get("items")
+        keep = cleaned_data.get("keep")
+        if items is not None and keep is not None and keep not in items:
+            raise forms.ValidationError(_("The entry to keep must be merged."))
+        return cleaned_data
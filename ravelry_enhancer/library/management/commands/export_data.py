@@ -0,0 +1,61 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from ravelry_enhancer.library.export import expire_data_exports
+from ravelry_enhancer.library.export import iter_export
+from ravelry_enhancer.library.export import run_data_export
+from ravelry_enhancer.library.models import DataExport
+from ravelry_enhancer.users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Write a zip of everything held about one user, or build the exports "
+        "users have requested."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", type=Path)
+        parser.add_argument("--user", help="Email of the user to export.")
+        parser.add_argument(
+            "--pending",
+            action="store_true",
+            help=(
+                "Build requested exports that have not started yet, after "
+                "failing timed-out builds and deleting expired exports."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options["pending"]:
+            self._run_pending()
+            return
+        if not options["path"] or not options["user"]:
+            msg = "Give a zip path and --user, or --pending."
+            raise CommandError(msg)
+        try:
+            user = User.objects.get(email=options["user"])
+        except User.DoesNotExist as error:
+            msg = f"No user with email {options['user']}"
+            raise CommandError(msg) from error
+
+        with options["path"].open("wb") as archive:
+            for data in iter_export(user):
+                archive.write(data)
+        self.stdout.write(self.style.SUCCESS(f"Exported {user} to {options['path']}"))
+
+    def _run_pending(self):
+        failed, deleted = expire_data_exports()
+        if failed or deleted:
+            self.stdout.write(
+                f"Failed {failed} timed-out and deleted {deleted} expired exports",
+            )
+        pending = DataExport.objects.filter(status=DataExport.Status.PENDING)
+        for data_export in pending.order_by("created").select_related("user"):
+            self.stdout.write(f"Exporting {data_export.user}")
+            run_data_export(data_export)
+            self.stdout.write(
+                self.style.SUCCESS(f"Wrote {data_export.size} bytes"),
+            )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from ravelry_enhancer.library.row_counter import flush_row_counts
+from ravelry_enhancer.monitoring.tracing import job_span
+
+
+class Command(BaseCommand):
+    help = "Write row counter taps buffered in Redis to the database."
+
+    def handle(self, *args, **options):
+        with job_span("flush_row_counts"):
+            updated = flush_row_counts()
+        self.stdout.write(f"Updated row counts for {updated} projects.")
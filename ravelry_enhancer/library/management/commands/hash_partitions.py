@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.template.defaultfilters import filesizeformat
+
+from ravelry_enhancer.library.partitions import HASH_PARTITIONED
+from ravelry_enhancer.library.partitions import partitions
+from ravelry_enhancer.library.partitions import split_partition
+from ravelry_enhancer.monitoring.tracing import job_span
+
+
+class Command(BaseCommand):
+    help = (
+        "List the hash partitions of the per-user library tables, and split "
+        "them to add partitions or rebalance."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--table",
+            choices=HASH_PARTITIONED,
+            action="append",
+            help="Only this table. May be repeated; defaults to all of them.",
+        )
+        parser.add_argument(
+            "--modulus",
+            type=int,
+            help="Split partitions until each holds at most 1/MODULUS of users.",
+        )
+        parser.add_argument(
+            "--split",
+            action="append",
+            default=[],
+            metavar="PARTITION",
+            help="Split this partition in two. May be repeated.",
+        )
+
+    def handle(self, *args, **options):
+        modulus = options["modulus"]
+        if modulus is not None and (modulus < 1 or modulus & (modulus - 1)):
+            msg = "--modulus must be a power of two."
+            raise CommandError(msg)
+        tables = options["table"] or HASH_PARTITIONED
+        known = {
+            partition.name: partition
+            for table in tables
+            for partition in partitions(table)
+        }
+        if unknown := set(options["split"]) - set(known):
+            msg = f"No such partitions: {', '.join(sorted(unknown))}"
+            raise CommandError(msg)
+
+        with job_span("hash_partitions"):
+            for name in options["split"]:
+                self._split(known[name])
+            for table in tables if modulus else []:
+                while small := [
+                    partition
+                    for partition in partitions(table)
+                    if partition.modulus < modulus
+                ]:
+                    for partition in small:
+                        self._split(partition)
+
+        for table in tables:
+            self.stdout.write(table)
+            for partition in partitions(table):
+                self.stdout.write(
+                    f"  {partition.name}: 1/{partition.modulus} of users, "
+                    f"~{partition.rows} rows, {filesizeformat(partition.size)}",
+                )
+
+    def _split(self, partition):
+        names = split_partition(partition)
+        self.stdout.write(f"Split {partition.name} into {' and '.join(names)}")
@@ -0,0 +1,64 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from ravelry_enhancer.library.models import StashImport
+from ravelry_enhancer.library.stash_import import import_stash
+from ravelry_enhancer.library.stash_import import iter_rows
+from ravelry_enhancer.library.stash_import import run_stash_import
+from ravelry_enhancer.users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a stash spreadsheet for one user, or run the imports users "
+        "have uploaded."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", type=Path)
+        parser.add_argument("--user", help="Email of the user who owns the stash.")
+        parser.add_argument(
+            "--pending",
+            action="store_true",
+            help="Run uploaded imports that have not started yet.",
+        )
+
+    def handle(self, *args, **options):
+        if options["pending"]:
+            self._run_pending()
+            return
+        if not options["path"] or not options["user"]:
+            msg = "Give a spreadsheet path and --user, or --pending."
+            raise CommandError(msg)
+        try:
+            user = User.objects.get(email=options["user"])
+        except User.DoesNotExist as error:
+            msg = f"No user with email {options['user']}"
+            raise CommandError(msg) from error
+
+        with options["path"].open("rb") as stream:
+            result = import_stash(
+                user,
+                iter_rows(stream, options["path"].name),
+                progress=lambda result: self.stdout.write(
+                    f"{result.imported} rows imported",
+                ),
+            )
+        self._report(result)
+
+    def _run_pending(self):
+        pending = StashImport.objects.filter(status=StashImport.Status.PENDING)
+        for stash_import in pending.order_by("created").select_related("user"):
+            self.stdout.write(f"Importing {stash_import} for {stash_import.user}")
+            self._report(run_stash_import(stash_import))
+
+    def _report(self, result):
+        for row, message in result.errors:
+            self.stderr.write(f"Row {row}: {message}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result.imported} rows, skipped {result.failed}.",
+            ),
+        )
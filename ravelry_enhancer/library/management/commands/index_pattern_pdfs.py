@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from ravelry_enhancer.library.pattern_store import index_pending_documents
+from ravelry_enhancer.monitoring.tracing import job_span
+
+
+class Command(BaseCommand):
+    help = "Extract text from newly uploaded pattern PDFs for full-text search."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            help="Index at most this many documents.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Processes to extract text with (default: one per CPU).",
+        )
+
+    def handle(self, *args, **options):
+        with job_span("index_pattern_pdfs"):
+            indexed = index_pending_documents(
+                limit=options["limit"],
+                workers=options["workers"],
+            )
+        self.stdout.write(f"Indexed {indexed} pattern PDFs.")
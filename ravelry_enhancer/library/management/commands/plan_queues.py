@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from ravelry_enhancer.library.models import QueuePlan
+from ravelry_enhancer.library.planner import run_queue_plan
+from ravelry_enhancer.users.models import User
+
+
+class Command(BaseCommand):
+    help = "Plan which stash yarn to knit queued patterns from."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Email of a user to plan for now.")
+        parser.add_argument(
+            "--pending",
+            action="store_true",
+            help="Make the plans users have requested.",
+        )
+
+    def handle(self, *args, **options):
+        if options["pending"]:
+            plans = QueuePlan.objects.filter(status=QueuePlan.Status.PENDING)
+        elif options["user"]:
+            try:
+                user = User.objects.get(email=options["user"])
+            except User.DoesNotExist as error:
+                msg = f"No user with email {options['user']}"
+                raise CommandError(msg) from error
+            plans = [QueuePlan.objects.create(user=user)]
+        else:
+            msg = "Give --user or --pending."
+            raise CommandError(msg)
+        for plan in plans:
+            self.stdout.write(f"Planning {plan.user}'s queue")
+            run_queue_plan(plan)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{plan.result['stash_used']} m of stash used, "
+                    f"{plan.result['to_buy']} m to buy ({plan.solver})",
+                ),
+            )
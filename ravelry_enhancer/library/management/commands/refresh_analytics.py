@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from ravelry_enhancer.library.analytics import refresh_rollups
+from ravelry_enhancer.monitoring.tracing import job_span
+
+
+class Command(BaseCommand):
+    help = "Rebuild the analytics rollups from recorded activity."
+
+    def handle(self, *args, **options):
+        with job_span("refresh_analytics"):
+            refresh_rollups()
+        self.stdout.write("Refreshed analytics.")
@@ -0,0 +1,77 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from ravelry_enhancer.library.analytics import analytics_fragment
+from ravelry_enhancer.monitoring.tracing import job_span
+from ravelry_enhancer.users.models import User
+
+
+def _warm(users: list[User], deadline: float) -> int:
+    warmed = 0
+    for user in users:
+        if time.monotonic() >= deadline:
+            break
+        analytics_fragment(user)
+        warmed += 1
+    return warmed
+
+
+def _warm_in_thread(users: list[User], deadline: float) -> int:
+    try:
+        return _warm(users, deadline)
+    finally:
+        # Each thread has its own connection; don't leave it open.
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the cached pages of the most recently active users, so their "
+        "next visit after a deploy or a rollup refresh is served from the cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=500,
+            help="Warm this many users, by latest login (default: 500).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Render with this many threads (default: 4).",
+        )
+        parser.add_argument(
+            "--budget",
+            type=float,
+            default=120,
+            help="Stop starting new users after this many seconds (default: 120).",
+        )
+
+    def handle(self, *args, **options):
+        users = list(
+            User.objects.filter(last_login__isnull=False).order_by("-last_login")[
+                : options["users"]
+            ],
+        )
+        deadline = time.monotonic() + options["budget"]
+        workers = max(1, min(options["workers"], len(users)))
+        with job_span("warm_caches", users=len(users)):
+            if workers == 1:
+                warmed = _warm(users, deadline)
+            else:
+                with ThreadPoolExecutor(workers) as pool:
+                    warmed = sum(
+                        pool.map(
+                            _warm_in_thread,
+                            # Interleaved, so the most active users go first.
+                            [users[i::workers] for i in range(workers)],
+                            [deadline] * workers,
+                        ),
+                    )
+        self.stdout.write(f"Warmed caches for {warmed} of {len(users)} users.")
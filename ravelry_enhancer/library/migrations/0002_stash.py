@@ -0,0 +1,71 @@
+# Generated by Django 4.2.11 on 2026-10-19 15:39
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('library', '0001_pattern_library'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Yarn',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ravelry_id', models.PositiveIntegerField(blank=True, null=True, unique=True)),
+                ('brand', models.CharField(blank=True, max_length=255, verbose_name='brand')),
+                ('name', models.CharField(max_length=255, verbose_name='name')),
+                ('weight', models.CharField(blank=True, max_length=32, verbose_name='weight')),
+                ('match_key', models.CharField(db_index=True, editable=False, max_length=512)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StashItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('import_key', models.CharField(max_length=255)),
+                ('brand', models.CharField(blank=True, max_length=255, verbose_name='brand')),
+                ('name', models.CharField(max_length=255, verbose_name='name')),
+                ('colorway', models.CharField(blank=True, max_length=255, verbose_name='colorway')),
+                ('weight', models.CharField(blank=True, max_length=32, verbose_name='weight')),
+                ('skeins', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='skeins')),
+                ('meters', models.FloatField(blank=True, null=True, verbose_name='total length in metres')),
+                ('grams', models.FloatField(blank=True, null=True, verbose_name='total mass in grams')),
+                ('notes', models.TextField(blank=True, verbose_name='notes')),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stash', to=settings.AUTH_USER_MODEL)),
+                ('yarn', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stash_items', to='library.yarn')),
+            ],
+            options={
+                'ordering': ['brand', 'name', 'colorway'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StashImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='stash_imports/', validators=[django.core.validators.FileExtensionValidator(['csv', 'xlsx'])], verbose_name='spreadsheet')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('finished', 'Finished'), ('failed', 'Failed')], default='pending', max_length=16)),
+                ('rows_imported', models.PositiveIntegerField(default=0)),
+                ('rows_failed', models.PositiveIntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stash_imports', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='stashitem',
+            constraint=models.UniqueConstraint(fields=('user', 'import_key'), name='library_stashitem_unique_import_key'),
+        ),
+        migrations.AddIndex(
+            model_name='stashimport',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['created'], name='library_stashimport_pending'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.11 on 2026-10-19 15:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('library', '0002_stash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Project',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ravelry_id', models.PositiveIntegerField(blank=True, null=True, unique=True)),
+                ('name', models.CharField(max_length=255, verbose_name='name')),
+                ('category', models.CharField(blank=True, max_length=64, verbose_name='category')),
+                ('started', models.DateField(blank=True, null=True, verbose_name='started')),
+                ('completed', models.DateField(blank=True, null=True, verbose_name='completed')),
+                ('row_count', models.PositiveIntegerField(default=0, verbose_name='rows')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='projects', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-started', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='KnittingSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started', models.DateTimeField()),
+                ('ended', models.DateTimeField()),
+                ('rows', models.IntegerField()),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sessions', to='library.project')),
+            ],
+            options={
+                'ordering': ['-started'],
+            },
+        ),
+    ]
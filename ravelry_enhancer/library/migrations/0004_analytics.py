@@ -0,0 +1,124 @@
+# Generated by Django 4.2.11 on 2026-10-19 15:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('library', '0003_project_row_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('stash_in', 'Stash added'), ('stash_out', 'Stash used'), ('knit', 'Knitting')], max_length=16)),
+                ('occurred', models.DateTimeField()),
+                ('meters', models.FloatField(default=0)),
+                ('grams', models.FloatField(default=0)),
+                ('seconds', models.IntegerField(default=0)),
+                ('rows', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'library_activity',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyActivity',
+            fields=[
+                ('id', models.TextField(primary_key=True, serialize=False)),
+                ('month', models.DateField()),
+                ('kind', models.CharField(choices=[('stash_in', 'Stash added'), ('stash_out', 'Stash used'), ('knit', 'Knitting')], max_length=16)),
+                ('meters', models.FloatField()),
+                ('grams', models.FloatField()),
+                ('seconds', models.BigIntegerField()),
+                ('rows', models.BigIntegerField()),
+            ],
+            options={
+                'db_table': 'library_monthly_activity',
+                'ordering': ['-month'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ProjectDuration',
+            fields=[
+                ('id', models.TextField(primary_key=True, serialize=False)),
+                ('category', models.CharField(max_length=64)),
+                ('projects', models.BigIntegerField()),
+                ('average_days', models.FloatField()),
+            ],
+            options={
+                'db_table': 'library_project_duration',
+                'ordering': ['category'],
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(
+            """
+            CREATE TABLE library_activity (
+                id bigint GENERATED BY DEFAULT AS IDENTITY,
+                user_id bigint NOT NULL
+                    REFERENCES users_user (id) ON DELETE CASCADE
+                    DEFERRABLE INITIALLY DEFERRED,
+                project_id bigint NULL
+                    REFERENCES library_project (id) ON DELETE SET NULL
+                    DEFERRABLE INITIALLY DEFERRED,
+                kind varchar(16) NOT NULL,
+                occurred timestamp with time zone NOT NULL,
+                meters double precision NOT NULL DEFAULT 0,
+                grams double precision NOT NULL DEFAULT 0,
+                seconds integer NOT NULL DEFAULT 0,
+                rows integer NOT NULL DEFAULT 0,
+                PRIMARY KEY (id, occurred)
+            ) PARTITION BY RANGE (occurred);
+            CREATE INDEX library_activity_user ON library_activity (user_id, occurred);
+            CREATE INDEX library_activity_project ON library_activity (project_id);
+            """,
+            "DROP TABLE library_activity;",
+        ),
+        migrations.RunSQL(
+            """
+            CREATE MATERIALIZED VIEW library_monthly_activity AS
+            SELECT
+                concat_ws(':', user_id, month, kind) AS id,
+                user_id,
+                month,
+                kind,
+                sum(meters) AS meters,
+                sum(grams) AS grams,
+                sum(seconds) AS seconds,
+                sum(rows) AS rows
+            FROM (
+                SELECT *, date_trunc('month', occurred AT TIME ZONE 'UTC')::date AS month
+                FROM library_activity
+            ) AS events
+            GROUP BY user_id, month, kind;
+            CREATE UNIQUE INDEX library_monthly_activity_key
+                ON library_monthly_activity (user_id, month, kind);
+            """,
+            "DROP MATERIALIZED VIEW library_monthly_activity;",
+        ),
+        migrations.RunSQL(
+            """
+            CREATE MATERIALIZED VIEW library_project_duration AS
+            SELECT
+                concat_ws(':', user_id, category) AS id,
+                user_id,
+                category,
+                count(*) AS projects,
+                avg(completed - started)::double precision AS average_days
+            FROM library_project
+            WHERE started IS NOT NULL AND completed >= started
+            GROUP BY user_id, category;
+            CREATE UNIQUE INDEX library_project_duration_key
+                ON library_project_duration (user_id, category);
+            """,
+            "DROP MATERIALIZED VIEW library_project_duration;",
+        ),
+    ]
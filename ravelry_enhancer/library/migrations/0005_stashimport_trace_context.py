@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-19 15:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0004_analytics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stashimport',
+            name='trace_context',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
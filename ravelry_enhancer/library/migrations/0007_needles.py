@@ -0,0 +1,77 @@
+# Generated by Django 4.2.11 on 2026-10-19 16:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('library', '0006_dataexport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Needle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('straight', 'Straight'), ('circular', 'Circular'), ('dpn', 'Double-pointed'), ('hook', 'Crochet hook')], max_length=16, verbose_name='type')),
+                ('size_mm', models.DecimalField(decimal_places=2, max_digits=4, verbose_name='size in mm')),
+                ('length_cm', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='length in cm')),
+                ('notes', models.CharField(blank=True, max_length=255, verbose_name='notes')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='needles', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['size_mm', 'kind', 'length_cm'],
+            },
+        ),
+        migrations.CreateModel(
+            name='QueuedPattern',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='name')),
+                ('position', models.PositiveIntegerField(default=0)),
+                ('added', models.DateTimeField(auto_now_add=True)),
+                ('pattern_file', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='library.patternfile')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='queue', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['position', 'added'],
+            },
+        ),
+        migrations.CreateModel(
+            name='NeedleUse',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateField()),
+                ('end', models.DateField(blank=True, null=True)),
+                ('needle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uses', to='library.needle')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='needle_uses', to='library.project')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NeedleRequirement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(blank=True, choices=[('straight', 'Straight'), ('circular', 'Circular'), ('dpn', 'Double-pointed'), ('hook', 'Crochet hook')], max_length=16, verbose_name='type')),
+                ('size_mm', models.DecimalField(decimal_places=2, max_digits=4, verbose_name='size in mm')),
+                ('length_cm', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='minimum length in cm')),
+                ('pattern', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='needle_requirements', to='library.queuedpattern')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='needles',
+            field=models.ManyToManyField(blank=True, related_name='projects', through='library.NeedleUse', to='library.needle'),
+        ),
+        migrations.AddIndex(
+            model_name='needleuse',
+            index=models.Index(condition=models.Q(('end', None)), fields=['needle'], name='library_needleuse_open'),
+        ),
+        migrations.AddConstraint(
+            model_name='needleuse',
+            constraint=models.UniqueConstraint(fields=('needle', 'project'), name='library_needleuse_unique'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.11 on 2026-10-19 16:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('library', '0007_needles'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='queuedpattern',
+            name='yarn_meters',
+            field=models.FloatField(blank=True, null=True, verbose_name='yarn needed in metres'),
+        ),
+        migrations.AddField(
+            model_name='queuedpattern',
+            name='yarn_weight',
+            field=models.CharField(blank=True, max_length=32, verbose_name='yarn weight'),
+        ),
+        migrations.CreateModel(
+            name='QueuePlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.CharField(blank=True, max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('finished', 'Finished'), ('failed', 'Failed')], default='pending', max_length=16)),
+                ('solver', models.CharField(blank=True, max_length=16)),
+                ('result', models.JSONField(blank=True, default=dict)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('trace_context', models.JSONField(blank=True, default=dict, editable=False)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='queue_plans', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created'],
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['created'], name='library_queueplan_pending'), models.Index(fields=['user', 'version'], name='library_queueplan_version')],
+            },
+        ),
+    ]
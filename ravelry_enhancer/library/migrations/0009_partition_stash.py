@@ -0,0 +1,106 @@
+# Generated by Django 4.2.11 on 2026-10-19 16:22
+
+from django.db import migrations
+
+COLUMNS = (
+    "id, user_id, yarn_id, import_key, brand, name, colorway, weight, skeins, "
+    "meters, grams, notes, updated"
+)
+MODULUS = 8
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0008_queue_plan'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='stashitem',
+            options={'managed': False, 'ordering': ['brand', 'name', 'colorway']},
+        ),
+        migrations.RunSQL(
+            f"""
+            ALTER TABLE library_stashitem RENAME TO library_stashitem_unpartitioned;
+            ALTER INDEX library_stashitem_pkey RENAME TO library_stashitem_unpartitioned_pkey;
+            ALTER INDEX library_stashitem_unique_import_key
+                RENAME TO library_stashitem_unpartitioned_unique_import_key;
+            CREATE TABLE library_stashitem (
+                id bigint GENERATED BY DEFAULT AS IDENTITY,
+                user_id bigint NOT NULL
+                    REFERENCES users_user (id) ON DELETE CASCADE
+                    DEFERRABLE INITIALLY DEFERRED,
+                yarn_id bigint NULL
+                    REFERENCES library_yarn (id) ON DELETE SET NULL
+                    DEFERRABLE INITIALLY DEFERRED,
+                import_key varchar(255) NOT NULL,
+                brand varchar(255) NOT NULL,
+                name varchar(255) NOT NULL,
+                colorway varchar(255) NOT NULL,
+                weight varchar(32) NOT NULL,
+                skeins numeric(8, 2) NULL,
+                meters double precision NULL,
+                grams double precision NULL,
+                notes text NOT NULL,
+                updated timestamp with time zone NOT NULL,
+                PRIMARY KEY (id, user_id),
+                CONSTRAINT library_stashitem_unique_import_key
+                    UNIQUE (user_id, import_key)
+            ) PARTITION BY HASH (user_id);
+            CREATE INDEX library_stashitem_yarn ON library_stashitem (yarn_id);
+            {"".join(
+                f"CREATE TABLE library_stashitem_h{MODULUS}_{remainder} "
+                f"PARTITION OF library_stashitem "
+                f"FOR VALUES WITH (MODULUS {MODULUS}, REMAINDER {remainder});"
+                for remainder in range(MODULUS)
+            )}
+            INSERT INTO library_stashitem ({COLUMNS})
+                SELECT {COLUMNS} FROM library_stashitem_unpartitioned;
+            SELECT setval(
+                pg_get_serial_sequence('library_stashitem', 'id'),
+                coalesce(max(id), 0) + 1,
+                false
+            ) FROM library_stashitem;
+            DROP TABLE library_stashitem_unpartitioned;
+            """,
+            f"""
+            ALTER TABLE library_stashitem RENAME TO library_stashitem_partitioned;
+            ALTER INDEX library_stashitem_pkey RENAME TO library_stashitem_partitioned_pkey;
+            ALTER INDEX library_stashitem_unique_import_key
+                RENAME TO library_stashitem_partitioned_unique_import_key;
+            ALTER INDEX library_stashitem_yarn RENAME TO library_stashitem_partitioned_yarn;
+            CREATE TABLE library_stashitem (
+                id bigint NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY,
+                import_key varchar(255) NOT NULL,
+                brand varchar(255) NOT NULL,
+                name varchar(255) NOT NULL,
+                colorway varchar(255) NOT NULL,
+                weight varchar(32) NOT NULL,
+                skeins numeric(8, 2) NULL,
+                meters double precision NULL,
+                grams double precision NULL,
+                notes text NOT NULL,
+                updated timestamp with time zone NOT NULL,
+                user_id bigint NOT NULL
+                    REFERENCES users_user (id) DEFERRABLE INITIALLY DEFERRED,
+                yarn_id bigint NULL
+                    REFERENCES library_yarn (id) DEFERRABLE INITIALLY DEFERRED,
+                CONSTRAINT library_stashitem_unique_import_key
+                    UNIQUE (user_id, import_key)
+            );
+            CREATE INDEX library_stashitem_user_id_6a56f509
+                ON library_stashitem (user_id);
+            CREATE INDEX library_stashitem_yarn_id_82adb1eb
+                ON library_stashitem (yarn_id);
+            INSERT INTO library_stashitem ({COLUMNS})
+                SELECT {COLUMNS} FROM library_stashitem_partitioned;
+            SELECT setval(
+                pg_get_serial_sequence('library_stashitem', 'id'),
+                coalesce(max(id), 0) + 1,
+                false
+            ) FROM library_stashitem;
+            DROP TABLE library_stashitem_partitioned;
+            """,
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.11 on 2026-10-19 16:35
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+import ravelry_enhancer.library.models
+
+
+def delete_public_exports(apps, schema_editor):
+    """Exports built so far sit in public media storage; users can ask again."""
+    DataExport = apps.get_model("library", "DataExport")
+    for data_export in DataExport.objects.exclude(file=""):
+        default_storage.delete(data_export.file.name)
+    DataExport.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0009_partition_stash'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_public_exports, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='dataexport',
+            name='started',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='dataexport',
+            name='file',
+            field=models.FileField(blank=True, storage=ravelry_enhancer.library.models.DataExportStorage(), upload_to=ravelry_enhancer.library.models._export_path),
+        ),
+    ]
@@ -0,0 +1,598 @@
+import secrets
+
+from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.core.files.storage import FileSystemStorage
+from django.core.validators import FileExtensionValidator
+from django.db import models
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.deconstruct import deconstructible
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from ravelry_enhancer.library.dedup import normalize_name
+
+
+class PatternDocument(models.Model):
+    """
+    One distinct pattern PDF, shared by every user who uploaded the same bytes.
+
+    The file itself is kept as content-addressed chunks; see
+    `ravelry_enhancer.library.pattern_store`.
+    """
+
+    digest = models.CharField(_("SHA-256"), max_length=64, unique=True)
+    size = models.BigIntegerField(_("size in bytes"))
+    chunks = ArrayField(models.CharField(max_length=64))
+    text = models.TextField(blank=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    indexed = models.BooleanField(default=False)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="library_pattern_search"),
+            models.Index(
+                fields=["created"],
+                condition=Q(indexed=False),
+                name="library_pattern_unindexed",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return self.digest
+
+
+class PatternFile(models.Model):
+    """A user's copy of a pattern PDF."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="pattern_files",
+    )
+    document = models.ForeignKey(
+        PatternDocument,
+        on_delete=models.PROTECT,
+        related_name="files",
+    )
+    name = models.CharField(_("name"), max_length=255)
+    uploaded = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["name"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "document"],
+                name="library_patternfile_unique_per_user",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return self.name
+
+    def get_absolute_url(self) -> str:
+        return reverse("library:pattern-download", kwargs={"pk": self.pk})
+
+
+class Yarn(models.Model):
+    """A yarn known to the site, which stash entries are matched against."""
+
+    ravelry_id = models.PositiveIntegerField(unique=True, null=True, blank=True)
+    brand = models.CharField(_("brand"), max_length=255, blank=True)
+    name = models.CharField(_("name"), max_length=255)
+    weight = models.CharField(_("weight"), max_length=32, blank=True)
+    # normalize_name("<brand> <name>"), which imports match on.
+    match_key = models.CharField(max_length=512, db_index=True, editable=False)
+
+    def __str__(self) -> str:
+        return f"{self.brand} {self.name}".strip()
+
+    def save(self, *args, **kwargs):
+        self.match_key = yarn_match_key(self.brand, self.name)
+        super().save(*args, **kwargs)
+
+
+def yarn_match_key(brand: str, name: str) -> str:
+    return normalize_name(f"{brand} {name}")
+
+
+class StashItem(models.Model):
+    """
+    One yarn in a user's stash.
+
+    The table is hash-partitioned by ``user_id`` and created by a migration
+    rather than by Django; see `ravelry_enhancer.library.partitions`. Filter
+    by user wherever possible, so that queries touch one partition.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="stash",
+    )
+    yarn = models.ForeignKey(
+        Yarn,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="stash_items",
+    )
+    # Identifies the entry across re-imports of the same spreadsheet.
+    import_key = models.CharField(max_length=255)
+    brand = models.CharField(_("brand"), max_length=255, blank=True)
+    name = models.CharField(_("name"), max_length=255)
+    colorway = models.CharField(_("colorway"), max_length=255, blank=True)
+    weight = models.CharField(_("weight"), max_length=32, blank=True)
+    skeins = models.DecimalField(
+        _("skeins"),
+        max_digits=8,
+        decimal_places=2,
+        null=True,
+        blank=True,
+    )
+    meters = models.FloatField(_("total length in metres"), null=True, blank=True)
+    grams = models.FloatField(_("total mass in grams"), null=True, blank=True)
+    notes = models.TextField(_("notes"), blank=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        managed = False
+        ordering = ["brand", "name", "colorway"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "import_key"],
+                name="library_stashitem_unique_import_key",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.brand} {self.name} {self.colorway}".strip()
+
+
+class StashImport(models.Model):
+    """An uploaded stash spreadsheet and how far its import has got."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        RUNNING = "running", _("Running")
+        FINISHED = "finished", _("Finished")
+        FAILED = "failed", _("Failed")
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="stash_imports",
+    )
+    file = models.FileField(
+        _("spreadsheet"),
+        upload_to="stash_imports/",
+        validators=[FileExtensionValidator(["csv", "xlsx"])],
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    rows_imported = models.PositiveIntegerField(default=0)
+    rows_failed = models.PositiveIntegerField(default=0)
+    # The first few problems, as [row number, message] pairs.
+    errors = models.JSONField(default=list, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True, blank=True)
+    # The uploading request's trace, continued by the worker.
+    trace_context = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["created"],
+                condition=Q(status="pending"),
+                name="library_stashimport_pending",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return self.file.name
+
+
+class Project(models.Model):
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="projects",
+    )
+    ravelry_id = models.PositiveIntegerField(unique=True, null=True, blank=True)
+    name = models.CharField(_("name"), max_length=255)
+    category = models.CharField(_("category"), max_length=64, blank=True)
+    started = models.DateField(_("started"), null=True, blank=True)
+    completed = models.DateField(_("completed"), null=True, blank=True)
+    # Rows counted so far, not including taps still buffered in Redis; see
+    # `ravelry_enhancer.library.row_counter`.
+    row_count = models.PositiveIntegerField(_("rows"), default=0)
+    needles = models.ManyToManyField(
+        "Needle",
+        through="NeedleUse",
+        related_name="projects",
+        blank=True,
+    )
+
+    class Meta:
+        ordering = ["-started", "name"]
+
+    def __str__(self) -> str:
+        return self.name
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        dates = (self.started, self.completed)
+        # Keep the needles' busy intervals in step with the project's dates,
+        # when they have changed since the project was loaded.
+        if not adding and dates != getattr(self, "_saved_dates", None):
+            self.needle_uses.update(end=self.completed)
+            if self.started:
+                self.needle_uses.update(start=self.started)
+        self._saved_dates = dates
+
+    def get_absolute_url(self) -> str:
+        return reverse("library:project-detail", kwargs={"pk": self.pk})
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if {"started", "completed"} <= instance.__dict__.keys():
+            instance._saved_dates = (instance.started, instance.completed)  # noqa: SLF001
+        return instance
+
+
+class Needle(models.Model):
+    """A knitting needle or crochet hook the user owns."""
+
+    class Kind(models.TextChoices):
+        STRAIGHT = "straight", _("Straight")
+        CIRCULAR = "circular", _("Circular")
+        DPN = "dpn", _("Double-pointed")
+        HOOK = "hook", _("Crochet hook")
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="needles",
+    )
+    kind = models.CharField(_("type"), max_length=16, choices=Kind.choices)
+    size_mm = models.DecimalField(_("size in mm"), max_digits=4, decimal_places=2)
+    # Circulars' total length, or straights' and DPNs' needle length.
+    length_cm = models.PositiveSmallIntegerField(
+        _("length in cm"),
+        null=True,
+        blank=True,
+    )
+    notes = models.CharField(_("notes"), max_length=255, blank=True)
+
+    class Meta:
+        ordering = ["size_mm", "kind", "length_cm"]
+
+    def __str__(self) -> str:
+        length = f" {self.length_cm} cm" if self.length_cm else ""
+        return f"{self.size_mm.normalize()} mm {self.get_kind_display()}{length}"
+
+
+class NeedleUse(models.Model):
+    """
+    The interval a needle is tied up in a project, from its start to its end.
+
+    ``end`` follows the project's completion date and is null while the
+    project is in progress; see `Project.save`.
+    """
+
+    needle = models.ForeignKey(Needle, on_delete=models.CASCADE, related_name="uses")
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name="needle_uses",
+    )
+    start = models.DateField()
+    end = models.DateField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["needle", "project"],
+                name="library_needleuse_unique",
+            ),
+        ]
+        indexes = [
+            # Availability checks only look at uses that are still open.
+            models.Index(
+                fields=["needle"],
+                condition=Q(end=None),
+                name="library_needleuse_open",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.needle} in {self.project}"
+
+
+class QueuedPattern(models.Model):
+    """A pattern the user means to knit next, with the needles it calls for."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="queue",
+    )
+    name = models.CharField(_("name"), max_length=255)
+    pattern_file = models.ForeignKey(
+        PatternFile,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    # The main yarn, as a Ravelry weight name; see `units.normalize_yarn_weight`.
+    yarn_weight = models.CharField(_("yarn weight"), max_length=32, blank=True)
+    yarn_meters = models.FloatField(_("yarn needed in metres"), null=True, blank=True)
+    position = models.PositiveIntegerField(default=0)
+    added = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["position", "added"]
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class NeedleRequirement(models.Model):
+    """One needle a queued pattern needs; several are needed at once."""
+
+    pattern = models.ForeignKey(
+        QueuedPattern,
+        on_delete=models.CASCADE,
+        related_name="needle_requirements",
+    )
+    # Blank for any knitting needle; hooks only satisfy hook requirements.
+    kind = models.CharField(
+        _("type"),
+        max_length=16,
+        choices=Needle.Kind.choices,
+        blank=True,
+    )
+    size_mm = models.DecimalField(_("size in mm"), max_digits=4, decimal_places=2)
+    # The shortest that will do: a longer circular can be used for magic loop.
+    length_cm = models.PositiveSmallIntegerField(
+        _("minimum length in cm"),
+        null=True,
+        blank=True,
+    )
+
+    def __str__(self) -> str:
+        kind = self.get_kind_display() if self.kind else _("needle")
+        length = f" {self.length_cm}+ cm" if self.length_cm else ""
+        return f"{self.size_mm.normalize()} mm {kind}{length}"
+
+
+class QueuePlan(models.Model):
+    """
+    Which stash yarn to knit each queued pattern from, worked out by the worker.
+
+    ``version`` fingerprints the queue, stash and free needles the plan was
+    made from, so a plan stays current until one of them changes; see
+    `ravelry_enhancer.library.planner`.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        RUNNING = "running", _("Running")
+        FINISHED = "finished", _("Finished")
+        FAILED = "failed", _("Failed")
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="queue_plans",
+    )
+    version = models.CharField(max_length=64, blank=True)
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    # "ilp" or "greedy".
+    solver = models.CharField(max_length=16, blank=True)
+    result = models.JSONField(default=dict, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True, blank=True)
+    # The requesting page's trace, continued by the worker.
+    trace_context = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta:
+        ordering = ["-created"]
+        indexes = [
+            models.Index(
+                fields=["created"],
+                condition=Q(status="pending"),
+                name="library_queueplan_pending",
+            ),
+            models.Index(fields=["user", "version"], name="library_queueplan_version"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Queue plan for {self.user} at {self.created:%Y-%m-%d %H:%M}"
+
+
+class KnittingSession(models.Model):
+    """A stretch of row counting on one project, ended by a long pause."""
+
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name="sessions",
+    )
+    started = models.DateTimeField()
+    ended = models.DateTimeField()
+    rows = models.IntegerField()
+
+    class Meta:
+        ordering = ["-started"]
+
+    def __str__(self) -> str:
+        return f"{self.project} at {self.started:%Y-%m-%d %H:%M}"
+
+
+class ActivityEvent(models.Model):
+    """
+    Something that feeds the analytics: stash bought or used, time spent knitting.
+
+    The table is range-partitioned by month on ``occurred`` and created by a
+    migration rather than by Django. Always insert through
+    `ravelry_enhancer.library.analytics.record_activity`, which creates
+    missing partitions first.
+    """
+
+    class Kind(models.TextChoices):
+        STASH_IN = "stash_in", _("Stash added")
+        STASH_OUT = "stash_out", _("Stash used")
+        KNIT = "knit", _("Knitting")
+
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="activity",
+    )
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="activity",
+    )
+    kind = models.CharField(max_length=16, choices=Kind.choices)
+    occurred = models.DateTimeField()
+    meters = models.FloatField(default=0)
+    grams = models.FloatField(default=0)
+    seconds = models.IntegerField(default=0)
+    rows = models.IntegerField(default=0)
+
+    class Meta:
+        managed = False
+        db_table = "library_activity"
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} at {self.occurred:%Y-%m-%d %H:%M}"
+
+
+class MonthlyActivity(models.Model):
+    """A user's `ActivityEvent` totals per month and kind; a materialized view."""
+
+    id = models.TextField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        related_name="+",
+    )
+    month = models.DateField()
+    kind = models.CharField(max_length=16, choices=ActivityEvent.Kind.choices)
+    meters = models.FloatField()
+    grams = models.FloatField()
+    seconds = models.BigIntegerField()
+    rows = models.BigIntegerField()
+
+    class Meta:
+        managed = False
+        db_table = "library_monthly_activity"
+        ordering = ["-month"]
+
+    def __str__(self) -> str:
+        return f"{self.month:%Y-%m} {self.kind}"
+
+
+class ProjectDuration(models.Model):
+    """How long a user's finished projects took per category; a materialized view."""
+
+    id = models.TextField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        related_name="+",
+    )
+    category = models.CharField(max_length=64)
+    projects = models.BigIntegerField()
+    average_days = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "library_project_duration"
+        ordering = ["category"]
+
+    def __str__(self) -> str:
+        return self.category or "-"
+
+
+def _export_path(instance: "DataExport", filename: str) -> str:
+    return f"{secrets.token_urlsafe(24)}/{filename}"
+
+
+@deconstructible
+class DataExportStorage(FileSystemStorage):
+    """Files under ``settings.DATA_EXPORT_ROOT``, which has no public URL."""
+
+    @cached_property
+    def base_location(self):
+        return self._value_or_setting(self._location, settings.DATA_EXPORT_ROOT)
+
+    def _clear_cached_properties(self, setting, **kwargs):
+        super()._clear_cached_properties(setting, **kwargs)
+        if setting == "DATA_EXPORT_ROOT":
+            self.__dict__.pop("base_location", None)
+            self.__dict__.pop("location", None)
+
+
+class DataExport(models.Model):
+    """A zip of everything held about a user, built by the worker."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        RUNNING = "running", _("Running")
+        FINISHED = "finished", _("Finished")
+        FAILED = "failed", _("Failed")
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="data_exports",
+    )
+    file = models.FileField(
+        upload_to=_export_path,
+        storage=DataExportStorage(),
+        blank=True,
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    size = models.BigIntegerField(_("size in bytes"), null=True, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+    # The requesting page's trace, continued by the worker.
+    trace_context = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta:
+        ordering = ["-created"]
+        indexes = [
+            models.Index(
+                fields=["created"],
+                condition=Q(status="pending"),
+                name="library_dataexport_pending",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Export for {self.user} at {self.created:%Y-%m-%d %H:%M}"
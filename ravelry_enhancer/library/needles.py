@@ -0,0 +1,179 @@
+"""
+Needle and hook inventory, and which queued patterns it lets the user start.
+
+Each `NeedleUse` row is the interval a needle is tied up in a project: it
+opens when the needle is put on the project and closes on the project's
+completion date, which `Project.save` keeps in step. A needle is free unless
+one of its intervals is still open, so the free inventory is one query
+against the open-use index however many projects the user has finished.
+
+`check_queue` loads the free inventory once, indexes it by size and matches
+every queued pattern's requirements against it in a single pass, rather than
+asking the database about each pattern in turn.
+"""
+
+import re
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import date
+
+from django.db.models import Exists
+from django.db.models import OuterRef
+from django.db.models import Q
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from ravelry_enhancer.library.models import Needle
+from ravelry_enhancer.library.models import NeedleRequirement
+from ravelry_enhancer.library.models import NeedleUse
+from ravelry_enhancer.library.models import Project
+from ravelry_enhancer.library.models import QueuedPattern
+from ravelry_enhancer.library.units import UnitError
+from ravelry_enhancer.library.units import parse_length
+from ravelry_enhancer.library.units import parse_needle_size
+from ravelry_enhancer.users.models import User
+
+KIND_WORDS = {
+    "straight": Needle.Kind.STRAIGHT,
+    "straights": Needle.Kind.STRAIGHT,
+    "circular": Needle.Kind.CIRCULAR,
+    "circulars": Needle.Kind.CIRCULAR,
+    "circ": Needle.Kind.CIRCULAR,
+    "dpn": Needle.Kind.DPN,
+    "dpns": Needle.Kind.DPN,
+    "hook": Needle.Kind.HOOK,
+}
+# The most NeedleRequirement.length_cm, a PositiveSmallIntegerField, holds.
+MAX_LENGTH_CM = 32767
+_KIND = re.compile(rf"\b({'|'.join(KIND_WORDS)})\b")
+_LENGTH = re.compile(r"\b(\d+(?:\.\d+)?\s*(?:cm|in|inch|inches|\"))")
+
+
+def busy_uses(on: date | None = None) -> QuerySet[NeedleUse]:
+    """Uses still open on ``on``: unfinished, or finishing after it."""
+    on = on or timezone.localdate()
+    return NeedleUse.objects.filter(Q(end=None) | Q(end__gt=on))
+
+
+def with_busy(needles: QuerySet[Needle], on: date | None = None) -> QuerySet[Needle]:
+    return needles.annotate(
+        busy=Exists(busy_uses(on).filter(needle=OuterRef("pk"))),
+    )
+
+
+def free_needles(user: User, on: date | None = None) -> QuerySet[Needle]:
+    return with_busy(user.needles.all(), on).filter(busy=False)
+
+
+def set_project_needles(project: Project, needles: Iterable[Needle]):
+    """Tie ``needles`` up in ``project`` from its start, freeing any others."""
+    needles = list(needles)
+    project.needle_uses.exclude(needle__in=needles).delete()
+    start = project.started or timezone.localdate()
+    NeedleUse.objects.bulk_create(
+        [
+            NeedleUse(
+                needle=needle,
+                project=project,
+                start=start,
+                end=project.completed,
+            )
+            for needle in needles
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def parse_requirements(text: str) -> list[NeedleRequirement]:
+    """
+    Read requirements such as ``"US 7 circular 80 cm, 4 mm dpns"``.
+
+    One needle per comma or line. Unsaved; raises `UnitError`.
+    """
+    requirements = []
+    for item in re.split(r"[,\n]", text.casefold()):
+        if not item.strip():
+            continue
+        size = item
+        kind = length = None
+        if match := _KIND.search(size):
+            kind = KIND_WORDS[match.group(1)]
+            size = size[: match.start()] + size[match.end() :]
+        if match := _LENGTH.search(size):
+            length = round(parse_length(match.group(1).replace('"', "in")) * 100)
+            if length > MAX_LENGTH_CM:
+                msg = f"{match.group(1).strip()} is longer than {MAX_LENGTH_CM} cm"
+                raise UnitError(msg)
+            size = size[: match.start()] + size[match.end() :]
+        requirements.append(
+            NeedleRequirement(
+                kind=kind or "",
+                size_mm=parse_needle_size(size.strip()),
+                length_cm=length,
+            ),
+        )
+    if not requirements:
+        msg = "no needles given"
+        raise UnitError(msg)
+    return requirements
+
+
+def _fits(needle: Needle, requirement: NeedleRequirement) -> bool:
+    if requirement.kind:
+        if needle.kind != requirement.kind:
+            return False
+    elif needle.kind == Needle.Kind.HOOK:
+        return False
+    # A needle of unrecorded length is given the benefit of the doubt.
+    return not (
+        requirement.length_cm
+        and needle.length_cm is not None
+        and needle.length_cm < requirement.length_cm
+    )
+
+
+def _specificity(requirement: NeedleRequirement) -> tuple[bool, int]:
+    return bool(requirement.kind), requirement.length_cm or 0
+
+
+@dataclass
+class QueueStatus:
+    pattern: QueuedPattern
+    # Requirements no free needle is left for.
+    missing: list[NeedleRequirement] = field(default_factory=list)
+
+    @property
+    def startable(self) -> bool:
+        return not self.missing
+
+
+def check_queue(user: User, on: date | None = None) -> list[QueueStatus]:
+    """Say which of the user's queued patterns can be started with free needles."""
+    by_size = defaultdict(list)
+    for needle in free_needles(user, on):
+        by_size[needle.size_mm].append(needle)
+    statuses = []
+    for pattern in user.queue.prefetch_related("needle_requirements"):
+        status = QueueStatus(pattern)
+        taken: set[int] = set()
+        # The most particular requirements choose first, each taking the
+        # shortest needle that fits, so general ones are left the most choice.
+        for requirement in sorted(
+            pattern.needle_requirements.all(),
+            key=_specificity,
+            reverse=True,
+        ):
+            fits = [
+                needle
+                for needle in by_size.get(requirement.size_mm, [])
+                if needle.pk not in taken and _fits(needle, requirement)
+            ]
+            if fits:
+                best = min(fits, key=lambda needle: needle.length_cm or 0)
+                taken.add(best.pk)
+            else:
+                status.missing.append(requirement)
+        statuses.append(status)
+    return statuses
@@ -0,0 +1,96 @@
+"""
+Hash partitions of the per-user library tables.
+
+Tables in `HASH_PARTITIONED` are partitioned by hash of ``user_id``. A query
+for one user's rows touches one partition, each partition's indexes and
+vacuums stay small, and bulk syncs for different users mostly write to
+different partitions. The migrations create `INITIAL_MODULUS` partitions.
+
+`split_partition` replaces one partition with two, each holding half its
+users, by doubling its modulus. Postgres allows partitions with different
+moduli as long as each modulus divides the next larger one, so splitting
+only the biggest partitions rebalances a table, and splitting them all adds
+partitions. A split holds an exclusive lock on the table while it moves the
+partition's rows, so run ``manage.py hash_partitions`` off-peak.
+"""
+
+import re
+from dataclasses import dataclass
+
+from django.db import connection
+from django.db import transaction
+
+HASH_PARTITIONED = ["library_stashitem"]
+INITIAL_MODULUS = 8
+
+_BOUND = re.compile(r"FOR VALUES WITH \(modulus (\d+), remainder (\d+)\)")
+
+
+@dataclass(frozen=True)
+class Partition:
+    table: str
+    name: str
+    modulus: int
+    remainder: int
+    # Postgres' estimates, as of the last vacuum or analyze.
+    rows: int
+    size: int
+
+
+def partition_name(table: str, modulus: int, remainder: int) -> str:
+    return f"{table}_h{modulus}_{remainder}"
+
+
+def create_partition(table: str, modulus: int, remainder: int):
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {quote_name(partition_name(table, modulus, remainder))} "
+            f"PARTITION OF {quote_name(table)} "
+            "FOR VALUES WITH (MODULUS %s, REMAINDER %s)",
+            [modulus, remainder],
+        )
+
+
+def partitions(table: str) -> list[Partition]:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT
+                child.relname,
+                pg_get_expr(child.relpartbound, child.oid),
+                greatest(child.reltuples, 0)::bigint,
+                pg_total_relation_size(child.oid)
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [table],
+        )
+        rows = cursor.fetchall()
+    found = []
+    for name, bound, estimate, size in rows:
+        modulus, remainder = map(int, _BOUND.fullmatch(bound).groups())
+        found.append(Partition(table, name, modulus, remainder, estimate, size))
+    return sorted(found, key=lambda partition: (partition.modulus, partition.remainder))
+
+
+def split_partition(partition: Partition) -> list[str]:
+    """Move ``partition``'s rows into two new partitions; return their names."""
+    quote_name = connection.ops.quote_name
+    table = quote_name(partition.table)
+    old = quote_name(partition.name)
+    modulus = partition.modulus * 2
+    remainders = [partition.remainder, partition.remainder + partition.modulus]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {old}")
+        for remainder in remainders:
+            create_partition(partition.table, modulus, remainder)
+        cursor.execute(f"INSERT INTO {table} SELECT * FROM {old}")  # noqa: S608
+        # A table with foreign key checks still deferred cannot be dropped.
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(f"DROP TABLE {old}")
+    return [
+        partition_name(partition.table, modulus, remainder) for remainder in remainders
+    ]
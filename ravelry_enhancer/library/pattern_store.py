@@ -0,0 +1,191 @@
+"""
+Content-addressed storage for pattern PDFs.
+
+Uploads are split into chunks that are stored once, under their SHA-256, in
+the default storage. A `PatternDocument` lists the chunks of one distinct file
+and each user's `PatternFile` points at a document, so a popular pattern costs
+one copy of its bytes plus a row per owner.
+
+Chunk boundaries fall after PDF ``endobj`` markers chosen by a hash of the
+object just ended, not at fixed offsets. Two copies of a pattern that differ
+only in their watermarked pages therefore cut the same chunks around the
+unchanged objects and share them. Files with few object markers, such as
+compressed object streams, fall back to ``CHUNK_MAX_SIZE`` cuts.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+import tempfile
+import zlib
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO
+
+import django
+from django.contrib.postgres.search import SearchVector
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from pypdf import PdfReader
+
+from ravelry_enhancer.library.models import PatternDocument
+from ravelry_enhancer.library.models import PatternFile
+from ravelry_enhancer.users.models import User
+
+logger = logging.getLogger(__name__)
+
+CHUNK_MIN_SIZE = 64 * 1024
+CHUNK_MAX_SIZE = 4 * 1024 * 1024
+# An object end is a chunk boundary when the low bits of its CRC are zero, so
+# roughly one object in eight past the minimum size ends a chunk.
+BOUNDARY_MASK = 0b111
+READ_SIZE = 1024 * 1024
+CHUNK_PREFIX = "patterns/chunks"
+SEARCH_CONFIG = "english"
+
+_OBJECT_END = re.compile(rb"endobj\s")
+
+
+def iter_chunks(
+    stream: IO[bytes],
+    min_size: int = CHUNK_MIN_SIZE,
+    max_size: int = CHUNK_MAX_SIZE,
+) -> Iterator[bytes]:
+    """Split a file into content-defined chunks, reading it a block at a time."""
+    buffer = bytearray()
+    scanned = 0
+    object_start = 0
+    while True:
+        block = stream.read(READ_SIZE)
+        buffer += block
+        while match := _OBJECT_END.search(buffer, scanned):
+            end = scanned = match.end()
+            checksum = zlib.crc32(buffer[object_start:end])
+            object_start = end
+            if end >= min_size and not checksum & BOUNDARY_MASK:
+                yield bytes(buffer[:end])
+                del buffer[:end]
+                scanned = object_start = 0
+        # A marker may straddle the next block; rescan its possible start.
+        scanned = max(scanned, len(buffer) - len(_OBJECT_END.pattern))
+        while len(buffer) >= max_size:
+            yield bytes(buffer[:max_size])
+            del buffer[:max_size]
+            scanned = max(scanned - max_size, 0)
+            object_start = max(object_start - max_size, 0)
+        if not block:
+            break
+    if buffer:
+        yield bytes(buffer)
+
+
+def chunk_name(digest: str) -> str:
+    return f"{CHUNK_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}"
+
+
+def _save_chunk(chunk: bytes) -> str:
+    digest = hashlib.sha256(chunk).hexdigest()
+    name = chunk_name(digest)
+    if not default_storage.exists(name):
+        saved = default_storage.save(name, ContentFile(chunk))
+        if saved != name:
+            # A concurrent upload stored the same chunk first, so the storage
+            # chose another name for this copy; the bytes are the same.
+            default_storage.delete(saved)
+    return digest
+
+
+def store_pattern_file(user: User, upload: IO[bytes], name: str) -> PatternFile:
+    """
+    Add an uploaded PDF to a user's library, storing only chunks not yet seen.
+
+    ``upload`` is read sequentially, so at most one chunk is held in memory;
+    `pattern_library_view` spools uploads with `TemporaryFileUploadHandler`
+    so the request body is never buffered either.
+    """
+    file_digest = hashlib.sha256()
+    chunks = []
+    size = 0
+    for chunk in iter_chunks(upload):
+        file_digest.update(chunk)
+        size += len(chunk)
+        chunks.append(_save_chunk(chunk))
+    document, _ = PatternDocument.objects.get_or_create(
+        digest=file_digest.hexdigest(),
+        defaults={"size": size, "chunks": chunks},
+    )
+    pattern_file, _ = PatternFile.objects.get_or_create(
+        user=user,
+        document=document,
+        defaults={"name": name},
+    )
+    return pattern_file
+
+
+def iter_document_bytes(document: PatternDocument) -> Iterator[bytes]:
+    for digest in document.chunks:
+        with default_storage.open(chunk_name(digest)) as chunk:
+            yield from iter(lambda chunk=chunk: chunk.read(READ_SIZE), b"")
+
+
+def extract_text(chunks: list[str]) -> str:
+    """
+    Reassemble a document from its chunks and return the text of its pages.
+
+    A document whose text cannot be read for any reason gets empty text, so
+    one malformed PDF neither stops a batch nor is retried on every run.
+    """
+    try:
+        with tempfile.TemporaryFile() as pdf:
+            for digest in chunks:
+                with default_storage.open(chunk_name(digest)) as chunk:
+                    shutil.copyfileobj(chunk, pdf)
+            pdf.seek(0)
+            pages = PdfReader(pdf).pages
+            text = "\n".join(page.extract_text() for page in pages)
+    except Exception:  # noqa: BLE001
+        logger.warning(
+            "Could not extract text from the document starting %s",
+            chunks[:1],
+            exc_info=True,
+        )
+        return ""
+    # PostgreSQL text cannot hold NUL characters.
+    return text.replace("\x00", "")
+
+
+def index_pending_documents(
+    limit: int | None = None,
+    workers: int | None = None,
+) -> int:
+    """
+    Extract text from documents not yet indexed, across a pool of processes.
+
+    Returns the number of documents indexed.
+    """
+    documents = list(
+        PatternDocument.objects.filter(indexed=False)
+        .order_by("created")
+        .values_list("pk", "chunks")[:limit],
+    )
+    if not documents:
+        return 0
+    workers = min(workers or os.cpu_count() or 1, len(documents))
+    if workers == 1:
+        texts = map(extract_text, [chunks for _, chunks in documents])
+        _save_texts(documents, texts)
+    else:
+        with ProcessPoolExecutor(workers, initializer=django.setup) as pool:
+            texts = pool.map(extract_text, [chunks for _, chunks in documents])
+            _save_texts(documents, texts)
+    PatternDocument.objects.filter(pk__in=[pk for pk, _ in documents]).update(
+        search_vector=SearchVector("text", config=SEARCH_CONFIG),
+    )
+    return len(documents)
+
+
+def _save_texts(documents: list[tuple[int, list[str]]], texts: Iterator[str]):
+    for (pk, _), text in zip(documents, texts, strict=True):
+        PatternDocument.objects.filter(pk=pk).update(text=text, indexed=True)
@@ -0,0 +1,292 @@
+"""
+Plan which stash yarn to knit the user's queued patterns from.
+
+Each queued pattern that can be started with the free needles (see
+`ravelry_enhancer.library.needles`) and says how much of which weight of yarn
+it needs may draw on stash of that weight. The planner maximises the metres
+of stash used, which is the same as minimising the yarn to buy for the
+queue. A pattern uses at most `MAX_YARNS_PER_PATTERN` stash entries, so the
+plan never knits one jumper from a dozen oddments. That limit makes it an
+integer programme, solved with CBC through PuLP within
+``settings.QUEUE_PLANNER_TIME_LIMIT`` seconds. A greedy plan is made first
+and kept if the solver fails or runs out of time without a better answer.
+
+Planning runs in the worker. Each plan records a fingerprint of the inputs
+it was made from, so the planner page shows a stored plan until the queue,
+stash or free needles change.
+"""
+
+import hashlib
+import json
+import logging
+from dataclasses import asdict
+from dataclasses import dataclass
+
+import pulp
+from django.conf import settings
+from django.utils import timezone
+
+from ravelry_enhancer.library.models import QueuePlan
+from ravelry_enhancer.library.needles import check_queue
+from ravelry_enhancer.monitoring.tracing import inject_context
+from ravelry_enhancer.monitoring.tracing import job_span
+from ravelry_enhancer.users.models import User
+
+logger = logging.getLogger(__name__)
+
+MAX_YARNS_PER_PATTERN = 2
+# Tie-breaks, small beside a metre of yarn: earlier patterns in the queue
+# first, and fewer yarns per pattern.
+QUEUE_ORDER_BONUS = 1e-3
+YARN_PENALTY = 1e-3
+
+
+@dataclass(frozen=True)
+class Demand:
+    """A queued pattern, and the yarn it needs if it can be planned for."""
+
+    pattern_id: int
+    name: str
+    weight: str
+    meters: float | None
+    startable: bool
+
+    @property
+    def plannable(self) -> bool:
+        return self.startable and bool(self.weight) and bool(self.meters)
+
+
+@dataclass(frozen=True)
+class Supply:
+    stash_id: int
+    name: str
+    weight: str
+    meters: float
+
+
+@dataclass(frozen=True)
+class PlannerInputs:
+    demands: list[Demand]
+    supplies: list[Supply]
+
+
+# Metres of each stash entry given to each pattern: {(pattern, stash): metres}.
+Allocation = dict[tuple[int, int], float]
+
+
+def load_inputs(user: User) -> PlannerInputs:
+    demands = [
+        Demand(
+            status.pattern.pk,
+            status.pattern.name,
+            status.pattern.yarn_weight,
+            status.pattern.yarn_meters,
+            status.startable,
+        )
+        for status in check_queue(user)
+    ]
+    supplies = [
+        Supply(item.pk, str(item), item.weight, item.meters)
+        for item in user.stash.filter(meters__gt=0).exclude(weight="").order_by("pk")
+    ]
+    return PlannerInputs(demands, supplies)
+
+
+def library_version(inputs: PlannerInputs) -> str:
+    """Fingerprint everything a plan depends on."""
+    return hashlib.sha256(
+        json.dumps(asdict(inputs), sort_keys=True).encode(),
+    ).hexdigest()
+
+
+def _candidates(inputs: PlannerInputs) -> dict[int, list[Supply]]:
+    return {
+        demand.pattern_id: [
+            supply for supply in inputs.supplies if supply.weight == demand.weight
+        ]
+        for demand in inputs.demands
+        if demand.plannable
+    }
+
+
+def plan_greedy(inputs: PlannerInputs) -> Allocation:
+    """
+    Take yarn for each pattern in queue order.
+
+    The smallest entry that covers a pattern on its own is preferred, saving
+    big ones for big patterns; otherwise the largest left is taken.
+    """
+    left = {supply.stash_id: supply.meters for supply in inputs.supplies}
+    allocation = {}
+    candidates = _candidates(inputs)
+    for demand in inputs.demands:
+        need = demand.meters or 0
+        for _ in range(MAX_YARNS_PER_PATTERN if demand.plannable else 0):
+            available = [
+                supply.stash_id
+                for supply in candidates[demand.pattern_id]
+                if left[supply.stash_id] > 0
+                and (demand.pattern_id, supply.stash_id) not in allocation
+            ]
+            if need <= 0 or not available:
+                break
+            covering = [stash_id for stash_id in available if left[stash_id] >= need]
+            if covering:
+                stash_id = min(covering, key=left.__getitem__)
+            else:
+                stash_id = max(available, key=left.__getitem__)
+            meters = min(need, left[stash_id])
+            allocation[demand.pattern_id, stash_id] = meters
+            left[stash_id] -= meters
+            need -= meters
+    return allocation
+
+
+def plan_ilp(inputs: PlannerInputs, time_limit: float) -> Allocation | None:
+    """Solve for the most stash used, or return None if no answer was found."""
+    candidates = _candidates(inputs)
+    plannable = [demand for demand in inputs.demands if demand.plannable]
+    supplies = {supply.stash_id: supply for supply in inputs.supplies}
+    pairs = [
+        (demand, supply)
+        for demand in plannable
+        for supply in candidates[demand.pattern_id]
+    ]
+    if not pairs:
+        return {}
+
+    problem = pulp.LpProblem("queue_plan", pulp.LpMaximize)
+    use = {}
+    meters = {}
+    for demand, supply in pairs:
+        key = demand.pattern_id, supply.stash_id
+        use[key] = pulp.LpVariable(f"use_{key[0]}_{key[1]}", cat=pulp.LpBinary)
+        meters[key] = pulp.LpVariable(f"meters_{key[0]}_{key[1]}", lowBound=0)
+        problem += meters[key] <= min(demand.meters, supply.meters) * use[key]
+    rank = {demand.pattern_id: i for i, demand in enumerate(plannable)}
+    problem += pulp.lpSum(
+        meters[key] * (1 + QUEUE_ORDER_BONUS * (len(plannable) - rank[key[0]]))
+        - YARN_PENALTY * use[key]
+        for key in meters
+    )
+    for demand in plannable:
+        keys = [key for key in meters if key[0] == demand.pattern_id]
+        problem += pulp.lpSum(meters[key] for key in keys) <= demand.meters
+        problem += pulp.lpSum(use[key] for key in keys) <= MAX_YARNS_PER_PATTERN
+    for stash_id, supply in supplies.items():
+        keys = [key for key in meters if key[1] == stash_id]
+        if keys:
+            problem += pulp.lpSum(meters[key] for key in keys) <= supply.meters
+
+    try:
+        problem.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=time_limit))
+    except pulp.PulpSolverError:
+        logger.exception("The queue planner's solver failed")
+        return None
+    if problem.sol_status not in (
+        pulp.LpSolutionOptimal,
+        pulp.LpSolutionIntegerFeasible,
+    ):
+        return None
+    return {
+        key: variable.value()
+        for key, variable in meters.items()
+        if variable.value() and variable.value() > 0
+    }
+
+
+def _stash_used(allocation: Allocation) -> float:
+    return sum(allocation.values())
+
+
+def solve(inputs: PlannerInputs, time_limit: float) -> tuple[str, Allocation]:
+    """Return the solver used and the best allocation found."""
+    greedy = plan_greedy(inputs)
+    optimal = plan_ilp(inputs, time_limit)
+    # Within the time limit CBC may return a feasible answer worse than greedy.
+    if optimal is None or _stash_used(optimal) < _stash_used(greedy):
+        return "greedy", greedy
+    return "ilp", optimal
+
+
+def plan_result(inputs: PlannerInputs, allocation: Allocation) -> dict:
+    """The plan as the planner page shows it."""
+    supplies = {supply.stash_id: supply for supply in inputs.supplies}
+    patterns = []
+    for demand in inputs.demands:
+        yarns = [
+            {
+                "stash_id": stash_id,
+                "name": supplies[stash_id].name,
+                "meters": round(meters, 1),
+            }
+            for (pattern_id, stash_id), meters in sorted(allocation.items())
+            if pattern_id == demand.pattern_id
+        ]
+        from_stash = sum(yarn["meters"] for yarn in yarns)
+        patterns.append(
+            {
+                "id": demand.pattern_id,
+                "name": demand.name,
+                "startable": demand.startable,
+                "weight": demand.weight,
+                "meters": demand.meters,
+                "yarns": yarns,
+                "to_buy": round(max((demand.meters or 0) - from_stash, 0), 1)
+                if demand.plannable
+                else None,
+            },
+        )
+    return {
+        "patterns": patterns,
+        "stash_used": round(_stash_used(allocation), 1),
+        "to_buy": round(
+            sum(pattern["to_buy"] or 0 for pattern in patterns),
+            1,
+        ),
+    }
+
+
+def current_plan(user: User) -> QueuePlan | None:
+    """
+    Return the user's plan for their library as it is now, if one is ready.
+
+    Otherwise a plan is requested from the worker, unless one already has been.
+    """
+    version = library_version(load_inputs(user))
+    plans = user.queue_plans.all()
+    if plan := plans.filter(version=version, status=QueuePlan.Status.FINISHED).first():
+        return plan
+    if not plans.filter(
+        status__in=[QueuePlan.Status.PENDING, QueuePlan.Status.RUNNING],
+    ).exists():
+        QueuePlan.objects.create(user=user, trace_context=inject_context())
+    return None
+
+
+def run_queue_plan(plan: QueuePlan):
+    """Plan the user's queue as it is now, recording progress on ``plan``."""
+    with job_span("queue plan", plan.trace_context, **{"queue_plan.id": plan.pk}):
+        _run_queue_plan(plan)
+
+
+def _run_queue_plan(plan: QueuePlan):
+    plan.status = QueuePlan.Status.RUNNING
+    plan.save(update_fields=["status"])
+    try:
+        inputs = load_inputs(plan.user)
+        plan.version = library_version(inputs)
+        plan.solver, allocation = solve(inputs, settings.QUEUE_PLANNER_TIME_LIMIT)
+        plan.result = plan_result(inputs, allocation)
+    except Exception:
+        plan.status = QueuePlan.Status.FAILED
+        raise
+    else:
+        plan.status = QueuePlan.Status.FINISHED
+    finally:
+        plan.finished = timezone.now()
+        plan.save()
+    # Only the newest plan is ever shown.
+    plan.user.queue_plans.exclude(pk=plan.pk).filter(
+        status__in=[QueuePlan.Status.FINISHED, QueuePlan.Status.FAILED],
+    ).delete()
@@ -0,0 +1,244 @@
+"""
+Project row counters that take a tap per row without a database write.
+
+Taps go to Redis: a Lua script bumps the project's pending count and tracks
+the current knitting session in one round trip. The worker calls
+`flush_row_counts`, which drains pending counts into ``Project.row_count``
+with one UPDATE per batch. It also saves each session that has been idle for
+``SESSION_IDLE_SECONDS`` as a `KnittingSession`. Pages show
+`current_rows`, which adds whatever is still pending in Redis, so a count
+never appears to go backwards between flushes.
+"""
+
+import time
+from collections.abc import Iterator
+from datetime import UTC
+from datetime import datetime
+from functools import cache
+
+import redis
+from django.conf import settings
+from django.db import DatabaseError
+from django.db import transaction
+from django.db.models import BigIntegerField
+from django.db.models import Case
+from django.db.models import Value
+from django.db.models import When
+from django.db.models.functions import Cast
+from django.db.models.functions import Greatest
+from django.db.models.functions import Least
+from redis.commands.core import Script
+
+from ravelry_enhancer.library.analytics import record_activity
+from ravelry_enhancer.library.models import ActivityEvent
+from ravelry_enhancer.library.models import KnittingSession
+from ravelry_enhancer.library.models import Project
+
+SESSION_IDLE_SECONDS = 30 * 60
+# The most rows one tap may count or undo.
+MAX_ROWS_PER_TAP = 100
+# The largest count the integer columns hold; flushed counts are capped to it.
+MAX_ROWS = 2**31 - 1
+FLUSH_BATCH_SIZE = 500
+DIRTY_KEY = "row-counter:dirty"
+SESSIONS_KEY = "row-counter:sessions"
+
+# KEYS: counter hash, dirty set, closed sessions list.
+# ARGV: project id, rows to add, now, idle seconds.
+_INCREMENT = """
+local last = tonumber(redis.call('HGET', KEYS[1], 'last'))
+if last and tonumber(ARGV[3]) - last > tonumber(ARGV[4]) then
+    local start, rows = unpack(redis.call('HMGET', KEYS[1], 'start', 'rows'))
+    redis.call('RPUSH', KEYS[3], ARGV[1] .. ' ' .. start .. ' ' .. last .. ' ' .. rows)
+    redis.call('HDEL', KEYS[1], 'start', 'rows')
+end
+redis.call('HSETNX', KEYS[1], 'start', ARGV[3])
+redis.call('HSET', KEYS[1], 'last', ARGV[3])
+redis.call('HINCRBY', KEYS[1], 'rows', ARGV[2])
+redis.call('SADD', KEYS[2], ARGV[1])
+return redis.call('HINCRBY', KEYS[1], 'pending', ARGV[2])
+"""
+
+# KEYS: counter hash, dirty set, closed sessions list.
+# ARGV: project id, now, idle seconds.
+_DRAIN = """
+local pending = tonumber(redis.call('HGET', KEYS[1], 'pending') or '0')
+redis.call('HDEL', KEYS[1], 'pending')
+local last = tonumber(redis.call('HGET', KEYS[1], 'last'))
+if last and tonumber(ARGV[2]) - last > tonumber(ARGV[3]) then
+    local start, rows = unpack(redis.call('HMGET', KEYS[1], 'start', 'rows'))
+    redis.call('RPUSH', KEYS[3], ARGV[1] .. ' ' .. start .. ' ' .. last .. ' ' .. rows)
+    redis.call('DEL', KEYS[1])
+elseif last then
+    -- Come back to the open session on a later flush.
+    redis.call('SADD', KEYS[2], ARGV[1])
+end
+return pending
+"""
+
+
+@cache
+def _client() -> redis.Redis:
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+
+@cache
+def _scripts(client: redis.Redis) -> tuple[Script, Script]:
+    return client.register_script(_INCREMENT), client.register_script(_DRAIN)
+
+
+def counter_key(project_id: int) -> str:
+    return f"row-counter:{project_id}"
+
+
+def increment_rows(project_id: int, by: int = 1) -> int:
+    """Count ``by`` rows (negative to undo) and return the rows still pending."""
+    client = _client()
+    increment, _ = _scripts(client)
+    return increment(
+        keys=[counter_key(project_id), DIRTY_KEY, SESSIONS_KEY],
+        args=[project_id, by, time.time(), SESSION_IDLE_SECONDS],
+        client=client,
+    )
+
+
+def pending_rows(project_ids: list[int]) -> dict[int, int]:
+    client = _client()
+    with client.pipeline(transaction=False) as pipeline:
+        for project_id in project_ids:
+            pipeline.hget(counter_key(project_id), "pending")
+        return {
+            project_id: int(pending or 0)
+            for project_id, pending in zip(project_ids, pipeline.execute(), strict=True)
+        }
+
+
+def current_rows(project: Project) -> int:
+    pending = pending_rows([project.pk])[project.pk]
+    return max(project.row_count + pending, 0)
+
+
+def _cap(rows: int) -> int:
+    return max(min(rows, MAX_ROWS), -MAX_ROWS)
+
+
+def _parse_session(entry: bytes) -> KnittingSession:
+    project_id, start, last, rows = entry.decode().split()
+    return KnittingSession(
+        project_id=int(project_id),
+        started=datetime.fromtimestamp(float(start), tz=UTC),
+        ended=datetime.fromtimestamp(float(last), tz=UTC),
+        rows=_cap(int(rows)),
+    )
+
+
+def flush_row_counts(batch_size: int = FLUSH_BATCH_SIZE) -> int:
+    """
+    Move pending rows and finished sessions from Redis into Postgres.
+
+    Returns the number of projects whose row counts changed. If a database
+    write fails, what it would have written goes back to Redis so no taps are
+    lost.
+    """
+    client = _client()
+    _, drain = _scripts(client)
+    now = time.time()
+    updated = 0
+    for project_ids in _dirty_batches(client, batch_size):
+        with client.pipeline(transaction=False) as pipeline:
+            for project_id in project_ids:
+                drain(
+                    keys=[counter_key(project_id), DIRTY_KEY, SESSIONS_KEY],
+                    args=[project_id, now, SESSION_IDLE_SECONDS],
+                    client=pipeline,
+                )
+            drained = zip(project_ids, pipeline.execute(), strict=True)
+        deltas = {project_id: _cap(delta) for project_id, delta in drained if delta}
+        try:
+            _save_rows(deltas)
+        except DatabaseError:
+            _restore(client, deltas=deltas)
+            raise
+        updated += len(deltas)
+
+    while sessions := client.lpop(SESSIONS_KEY, batch_size):
+        try:
+            _save_sessions(sessions)
+        except DatabaseError:
+            _restore(client, sessions=sessions)
+            raise
+    return updated
+
+
+def _dirty_batches(client: redis.Redis, batch_size: int) -> Iterator[list[int]]:
+    # Draining re-marks projects with an open session, so stop once a batch
+    # holds only projects this flush has already drained.
+    seen: set[int] = set()
+    while members := client.spop(DIRTY_KEY, batch_size):
+        batch = {int(member) for member in members}
+        if again := batch & seen:
+            client.sadd(DIRTY_KEY, *again)
+        if not (fresh := batch - seen):
+            return
+        seen |= fresh
+        yield sorted(fresh)
+
+
+def _save_rows(deltas: dict[int, int]):
+    if not deltas:
+        return
+    # Summed as bigint, so no delta can overflow the batch's UPDATE.
+    Project.objects.filter(pk__in=deltas).update(
+        row_count=Least(
+            Greatest(
+                Cast("row_count", BigIntegerField())
+                + Case(
+                    *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+                    default=Value(0),
+                    output_field=BigIntegerField(),
+                ),
+                Value(0),
+            ),
+            Value(MAX_ROWS),
+        ),
+    )
+
+
+def _save_sessions(sessions: list[bytes]):
+    parsed = [_parse_session(entry) for entry in sessions]
+    # Projects may have been deleted since the session ended.
+    owners = dict(
+        Project.objects.filter(
+            pk__in={session.project_id for session in parsed},
+        ).values_list("pk", "user_id"),
+    )
+    saved = [session for session in parsed if session.project_id in owners]
+    with transaction.atomic():
+        KnittingSession.objects.bulk_create(saved)
+        record_activity(
+            [
+                ActivityEvent(
+                    user_id=owners[session.project_id],
+                    project_id=session.project_id,
+                    kind=ActivityEvent.Kind.KNIT,
+                    occurred=session.started,
+                    seconds=int((session.ended - session.started).total_seconds()),
+                    rows=session.rows,
+                )
+                for session in saved
+            ],
+        )
+
+
+def _restore(
+    client: redis.Redis,
+    deltas: dict[int, int] | None = None,
+    sessions: list[bytes] | None = None,
+):
+    with client.pipeline(transaction=False) as pipeline:
+        for project_id, delta in (deltas or {}).items():
+            pipeline.hincrby(counter_key(project_id), "pending", delta)
+            pipeline.sadd(DIRTY_KEY, project_id)
+        if sessions:
+            pipeline.lpush(SESSIONS_KEY, *reversed(sessions))
+        pipeline.execute()
@@ -0,0 +1,62 @@
+"""
+Find entries in a user's stash that are the same yarn, and merge them.
+
+Entries are compared by brand, name and colourway within a yarn weight (see
+`ravelry_enhancer.library.dedup`). Merging keeps the entry spelt the way most
+of the group spells it, adds the others' amounts and notes to it and deletes
+them.
+"""
+
+from dataclasses import dataclass
+
+from django.db import transaction
+
+from ravelry_enhancer.library.dedup import YarnName
+from ravelry_enhancer.library.dedup import find_duplicates
+from ravelry_enhancer.library.models import StashItem
+from ravelry_enhancer.users.models import User
+
+
+@dataclass
+class StashDuplicates:
+    items: list[StashItem]
+    # The entry the others would be merged into.
+    keep: StashItem
+
+
+def stash_duplicates(user: User) -> list[StashDuplicates]:
+    items = {item.pk: item for item in user.stash.all()}
+    groups = []
+    for cluster in find_duplicates(
+        YarnName(item.pk, str(item), item.weight) for item in items.values()
+    ):
+        group = sorted((items[pk] for pk in cluster.keys), key=lambda item: item.pk)
+        keep = next(item for item in group if str(item) == cluster.suggested_name)
+        groups.append(StashDuplicates(group, keep))
+    return groups
+
+
+def _total(values: list) -> object:
+    known = [value for value in values if value is not None]
+    return sum(known) if known else None
+
+
+@transaction.atomic
+def merge_stash_items(keep: StashItem, others: list[StashItem]) -> StashItem:
+    """Add ``others``' amounts and notes to ``keep``, then delete them."""
+    others = [item for item in others if item.pk != keep.pk]
+    group = [keep, *others]
+    keep.skeins = _total([item.skeins for item in group])
+    keep.meters = _total([item.meters for item in group])
+    keep.grams = _total([item.grams for item in group])
+    keep.yarn_id = keep.yarn_id or next(
+        (item.yarn_id for item in others if item.yarn_id),
+        None,
+    )
+    keep.notes = "\n\n".join(item.notes for item in group if item.notes)
+    keep.save()
+    StashItem.objects.filter(
+        user_id=keep.user_id,
+        pk__in=[item.pk for item in others],
+    ).delete()
+    return keep
@@ -0,0 +1,355 @@
+"""
+Import stash from users' own CSV and XLSX spreadsheets.
+
+Files are read one row at a time, with csv over a line iterator and
+openpyxl's read-only mode, and written in batches. Memory use therefore does
+not grow with the file. Each batch is matched to known `Yarn` rows in one
+query and upserted on ``(user, import_key)``, so importing the same
+spreadsheet again updates entries instead of duplicating them.
+"""
+
+import codecs
+import csv
+import hashlib
+import logging
+import math
+from collections import defaultdict
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
+from dataclasses import dataclass
+from dataclasses import field
+from decimal import Decimal
+from decimal import InvalidOperation
+from itertools import islice
+from pathlib import PurePath
+from typing import IO
+
+import redis
+from django.db import models
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from ravelry_enhancer.library.analytics import record_activity
+from ravelry_enhancer.library.dedup import normalize_name
+from ravelry_enhancer.library.models import ActivityEvent
+from ravelry_enhancer.library.models import StashImport
+from ravelry_enhancer.library.models import StashItem
+from ravelry_enhancer.library.models import Yarn
+from ravelry_enhancer.library.models import yarn_match_key
+from ravelry_enhancer.library.units import normalize_yarn_weight
+from ravelry_enhancer.library.units import parse_length
+from ravelry_enhancer.library.units import parse_mass
+from ravelry_enhancer.monitoring.tracing import job_span
+from ravelry_enhancer.ravelry.progress import publish_progress
+from ravelry_enhancer.users.models import User
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+MAX_ERRORS_KEPT = 100
+# Left as they are by a re-import whose cell is blank, the amount being unknown.
+AMOUNT_FIELDS = ["skeins", "meters", "grams"]
+
+# Spreadsheet headings, normalised, mapped to (field, default unit).
+COLUMNS = {
+    "id": ("key", None),
+    "key": ("key", None),
+    "brand": ("brand", None),
+    "company": ("brand", None),
+    "manufacturer": ("brand", None),
+    "yarn": ("name", None),
+    "name": ("name", None),
+    "yarn name": ("name", None),
+    "color": ("colorway", None),
+    "colour": ("colorway", None),
+    "colorway": ("colorway", None),
+    "colourway": ("colorway", None),
+    "weight": ("weight", None),
+    "yarn weight": ("weight", None),
+    "skeins": ("skeins", None),
+    "balls": ("skeins", None),
+    "length": ("meters", "m"),
+    "meters": ("meters", "m"),
+    "metres": ("meters", "m"),
+    "yardage": ("meters", "yd"),
+    "yards": ("meters", "yd"),
+    "grams": ("grams", "g"),
+    "amount": ("grams", "g"),
+    "ounces": ("grams", "oz"),
+    "notes": ("notes", None),
+}
+
+
+class RowError(ValueError):
+    pass
+
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    failed: int = 0
+    # (row number, message), row 1 being the heading.
+    errors: list[tuple[int, str]] = field(default_factory=list)
+
+
+def iter_rows(stream: IO[bytes], filename: str) -> Iterator[dict[str, object]]:
+    """Yield each data row of a CSV or XLSX file keyed by its heading."""
+    suffix = PurePath(filename).suffix.lower()
+    if suffix == ".csv":
+        yield from csv.DictReader(codecs.iterdecode(stream, "utf-8-sig"))
+    elif suffix == ".xlsx":
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            headings = [str(value or "") for value in next(rows, ())]
+            for values in rows:
+                yield dict(zip(headings, values, strict=False))
+        finally:
+            workbook.close()
+    else:
+        msg = f"Cannot import {suffix or 'files without an extension'}"
+        raise ValueError(msg)
+
+
+def _text(value: object) -> str:
+    return "" if value is None else str(value).strip()
+
+
+def _check_fits(field_name: str, value: object):
+    """Raise `ValueError` if ``value`` cannot be stored in the `StashItem` field."""
+    model_field = StashItem._meta.get_field(field_name)  # noqa: SLF001
+    if isinstance(model_field, models.CharField):
+        if len(value) > model_field.max_length:
+            msg = f"longer than {model_field.max_length} characters"
+            raise ValueError(msg)
+    elif isinstance(model_field, models.DecimalField):
+        limit = Decimal(10) ** (model_field.max_digits - model_field.decimal_places)
+        if not value.is_finite() or abs(value) >= limit:
+            msg = f"{value} is not a number below {limit}"
+            raise ValueError(msg)
+    elif isinstance(model_field, models.FloatField) and not math.isfinite(value):
+        msg = f"{value} is not a number"
+        raise ValueError(msg)
+
+
+def clean_row(row: dict[str, object]) -> dict[str, object]:
+    """
+    Map a spreadsheet row onto `StashItem` fields, normalising units.
+
+    Raises `RowError` for values the fields cannot hold.
+    """
+    values: dict[str, object] = {}
+    for heading, value in row.items():
+        column = COLUMNS.get(normalize_name(heading or ""))
+        if column is None or _text(value) == "":
+            continue
+        name, unit = column
+        try:
+            if name == "meters":
+                values[name] = parse_length(value, unit)
+            elif name == "grams":
+                values[name] = parse_mass(value, unit)
+            elif name == "weight":
+                values[name] = normalize_yarn_weight(_text(value))
+            elif name == "skeins":
+                values[name] = Decimal(_text(value)).quantize(Decimal("0.01"))
+            else:
+                values[name] = _text(value)
+            _check_fits("import_key" if name == "key" else name, values[name])
+        except InvalidOperation as error:
+            msg = f"{heading}: {value!r} is not a number"
+            raise RowError(msg) from error
+        except ValueError as error:
+            # UnitError is a ValueError too.
+            msg = f"{heading}: {error}"
+            raise RowError(msg) from error
+    if not values.get("name"):
+        msg = "a yarn name is required"
+        raise RowError(msg)
+    key = (
+        values.pop("key", "")
+        or hashlib.sha256(
+            "\0".join(
+                normalize_name(str(values.get(part, "")))
+                for part in ("brand", "name", "colorway")
+            ).encode(),
+        ).hexdigest()
+    )
+    values["import_key"] = key
+    return values
+
+
+def _upsert(user: User, rows: list[dict[str, object]]):
+    # Later rows with the same key win; Postgres refuses to upsert one row twice.
+    by_key = {row["import_key"]: row for row in rows}
+    match_keys = {
+        yarn_match_key(row.get("brand", ""), row["name"]) for row in by_key.values()
+    }
+    yarns = dict(
+        Yarn.objects.filter(match_key__in=match_keys).values_list("match_key", "pk"),
+    )
+    before = {
+        import_key: (meters, grams)
+        for import_key, meters, grams in StashItem.objects.filter(
+            user=user,
+            import_key__in=by_key,
+        ).values_list("import_key", "meters", "grams")
+    }
+    # One upsert per set of amounts given, so blank amounts are not updated.
+    by_amounts = defaultdict(list)
+    for row in by_key.values():
+        given = tuple(name for name in AMOUNT_FIELDS if row.get(name) is not None)
+        by_amounts[given].append(
+            StashItem(
+                user=user,
+                yarn_id=yarns.get(yarn_match_key(row.get("brand", ""), row["name"])),
+                **row,
+            ),
+        )
+    for given, items in by_amounts.items():
+        StashItem.objects.bulk_create(
+            items,
+            update_conflicts=True,
+            unique_fields=["user", "import_key"],
+            update_fields=[
+                "yarn",
+                "brand",
+                "name",
+                "colorway",
+                "weight",
+                *given,
+                "notes",
+                "updated",
+            ],
+        )
+    record_activity(_stash_events(user, by_key, before))
+
+
+def _change(before: float | None, after: float | None) -> float:
+    # A blank cell leaves the amount unknown rather than using the yarn up.
+    return 0 if after is None else after - (before or 0)
+
+
+def _stash_events(
+    user: User,
+    rows: dict[str, dict[str, object]],
+    before: dict[str, tuple[float | None, float | None]],
+) -> list[ActivityEvent]:
+    """Record how much each import added to or used from the stash."""
+    now = timezone.now()
+    events = []
+    for import_key, row in rows.items():
+        meters_before, grams_before = before.get(import_key, (None, None))
+        meters = _change(meters_before, row.get("meters"))
+        grams = _change(grams_before, row.get("grams"))
+        for kind, sign in (
+            (ActivityEvent.Kind.STASH_IN, 1),
+            (ActivityEvent.Kind.STASH_OUT, -1),
+        ):
+            if (moved := (max(sign * meters, 0), max(sign * grams, 0))) != (0, 0):
+                events.append(
+                    ActivityEvent(
+                        user=user,
+                        kind=kind,
+                        occurred=now,
+                        meters=moved[0],
+                        grams=moved[1],
+                    ),
+                )
+    return events
+
+
+def import_stash(
+    user: User,
+    rows: Iterable[dict[str, object]],
+    *,
+    batch_size: int = BATCH_SIZE,
+    progress: Callable[[ImportResult], None] | None = None,
+) -> ImportResult:
+    """
+    Validate and upsert spreadsheet rows into ``user``'s stash.
+
+    Invalid rows are counted and skipped rather than failing the import.
+    ``progress`` is called after each batch.
+    """
+    result = ImportResult()
+
+    def cleaned() -> Iterator[dict[str, object]]:
+        for number, row in enumerate(rows, start=2):
+            try:
+                yield clean_row(row)
+            except RowError as error:
+                result.failed += 1
+                if len(result.errors) < MAX_ERRORS_KEPT:
+                    result.errors.append((number, str(error)))
+
+    pending = cleaned()
+    while batch := list(islice(pending, batch_size)):
+        _upsert(user, batch)
+        result.imported += len(batch)
+        if progress:
+            progress(result)
+    return result
+
+
+def _publish(stash_import: StashImport, state: str, result: ImportResult):
+    try:
+        publish_progress(
+            stash_import.user_id,
+            stage="stash import",
+            state=state,
+            done=result.imported,
+            failed=result.failed,
+        )
+    except redis.RedisError:
+        # Progress is a nicety; the import itself must not depend on Redis.
+        logger.warning("Could not publish progress for %s", stash_import)
+
+
+def run_stash_import(stash_import: StashImport) -> ImportResult:
+    """Import an uploaded spreadsheet, recording progress on the row as it goes."""
+    with job_span(
+        "stash import",
+        stash_import.trace_context,
+        **{"stash_import.id": stash_import.pk},
+    ):
+        return _run_stash_import(stash_import)
+
+
+def _run_stash_import(stash_import: StashImport) -> ImportResult:
+    stash_import.status = StashImport.Status.RUNNING
+    stash_import.save(update_fields=["status"])
+
+    result = ImportResult()
+
+    def progress(latest: ImportResult):
+        nonlocal result
+        result = latest
+        StashImport.objects.filter(pk=stash_import.pk).update(
+            rows_imported=result.imported,
+            rows_failed=result.failed,
+        )
+        _publish(stash_import, "running", result)
+
+    try:
+        with stash_import.file.open("rb") as stream:
+            result = import_stash(
+                stash_import.user,
+                iter_rows(stream, stash_import.file.name),
+                progress=progress,
+            )
+    except Exception as error:
+        stash_import.status = StashImport.Status.FAILED
+        result.errors.append((0, str(error)))
+        raise
+    else:
+        stash_import.status = StashImport.Status.FINISHED
+    finally:
+        stash_import.rows_imported = result.imported
+        stash_import.rows_failed = result.failed
+        stash_import.errors = result.errors
+        stash_import.finished = timezone.now()
+        stash_import.save()
+        _publish(stash_import, stash_import.status, result)
+    return result
@@ -0,0 +1,161 @@
+import io
+from datetime import UTC
+from datetime import date
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from ravelry_enhancer.library.analytics import analytics_fragment
+from ravelry_enhancer.library.analytics import fragment_key
+from ravelry_enhancer.library.analytics import monthly_summary
+from ravelry_enhancer.library.analytics import partition_name
+from ravelry_enhancer.library.analytics import record_activity
+from ravelry_enhancer.library.analytics import refresh_rollups
+from ravelry_enhancer.library.models import ActivityEvent
+from ravelry_enhancer.library.models import Project
+from ravelry_enhancer.library.models import ProjectDuration
+from ravelry_enhancer.library.stash_import import import_stash
+from ravelry_enhancer.library.stash_import import iter_rows
+from ravelry_enhancer.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def knit(user, when, seconds, rows):
+    return ActivityEvent(
+        user=user,
+        kind=ActivityEvent.Kind.KNIT,
+        occurred=when,
+        seconds=seconds,
+        rows=rows,
+    )
+
+
+def test_record_activity_creates_monthly_partitions(user):
+    record_activity(
+        [
+            knit(user, datetime(2015, 12, 31, 23, tzinfo=UTC), 600, 4),
+            knit(user, datetime(2016, 1, 1, tzinfo=UTC), 60, 1),
+        ],
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT inhrelid::regclass::text FROM pg_inherits "
+            "WHERE inhparent = 'library_activity'::regclass",
+        )
+        partitions = {name for (name,) in cursor.fetchall()}
+    assert partition_name(date(2015, 12, 1)) in partitions
+    assert partition_name(date(2016, 1, 1)) in partitions
+    assert ActivityEvent.objects.filter(user=user).count() == 2  # noqa: PLR2004
+
+
+def test_monthly_summary(user):
+    record_activity(
+        [
+            knit(user, datetime(2024, 3, 2, tzinfo=UTC), 1800, 10),
+            knit(user, datetime(2024, 3, 20, tzinfo=UTC), 3600, 15),
+            knit(user, datetime(2024, 5, 1, tzinfo=UTC), 900, 2),
+            ActivityEvent(
+                user=user,
+                kind=ActivityEvent.Kind.STASH_IN,
+                occurred=datetime(2024, 3, 5, tzinfo=UTC),
+                meters=400,
+                grams=100,
+            ),
+        ],
+    )
+
+    assert monthly_summary(user) == []
+    refresh_rollups()
+
+    may, march = monthly_summary(user)
+    assert may.month == date(2024, 5, 1)
+    assert (march.knit_hours, march.rows) == (1.5, 25)
+    assert (march.meters_added, march.grams_added) == (400, 100)
+
+
+def test_stash_import_records_inflow_and_outflow(user):
+    import_stash(
+        user,
+        iter_rows(io.BytesIO(b"Yarn,Metres,Grams\nRios,400,200\n"), "stash.csv"),
+    )
+    import_stash(
+        user,
+        iter_rows(io.BytesIO(b"Yarn,Metres,Grams\nRios,100,\n"), "stash.csv"),
+    )
+
+    events = ActivityEvent.objects.filter(user=user).order_by("id")
+    assert [(e.kind, e.meters, e.grams) for e in events] == [
+        (ActivityEvent.Kind.STASH_IN, 400, 200),
+        (ActivityEvent.Kind.STASH_OUT, 300, 0),
+    ]
+
+
+def test_project_durations(user):
+    for name, days in [("Hat", 10), ("Beret", 20), ("Sweater", 90)]:
+        Project.objects.create(
+            user=user,
+            name=name,
+            category="Sweater" if name == "Sweater" else "Hat",
+            started=date(2024, 1, 1),
+            completed=date.fromordinal(date(2024, 1, 1).toordinal() + days),
+        )
+    Project.objects.create(
+        user=user,
+        name="WIP",
+        category="Hat",
+        started=date(2024, 6, 1),
+    )
+
+    refresh_rollups()
+
+    durations = ProjectDuration.objects.filter(user=user)
+    assert [(d.category, d.projects, d.average_days) for d in durations] == [
+        ("Hat", 2, 15),
+        ("Sweater", 1, 90),
+    ]
+
+
+def test_analytics_fragment_is_cached_until_refresh(user, django_assert_num_queries):
+    record_activity([knit(user, datetime(2024, 3, 2, tzinfo=UTC), 3600, 10)])
+    refresh_rollups()
+
+    html = analytics_fragment(user)
+    assert "March 2024" in html
+    with django_assert_num_queries(0):
+        assert analytics_fragment(user) == html
+
+    record_activity([knit(user, datetime(2024, 4, 2, tzinfo=UTC), 3600, 10)])
+    assert analytics_fragment(user) == html
+    refresh_rollups()
+    assert "April 2024" in analytics_fragment(user)
+
+
+def test_warm_caches_renders_recent_users():
+    recent = UserFactory(last_login=timezone.now())
+    older = UserFactory(last_login=timezone.now() - timedelta(days=30))
+    never = UserFactory(last_login=None)
+    out = io.StringIO()
+
+    call_command("warm_caches", users=1, workers=1, stdout=out)
+
+    assert cache.get(fragment_key(recent)) is not None
+    assert cache.get(fragment_key(older)) is None
+    assert cache.get(fragment_key(never)) is None
+    assert "Warmed caches for 1 of 1 users." in out.getvalue()
+
+
+def test_warm_caches_stops_at_budget():
+    user = UserFactory(last_login=timezone.now())
+    out = io.StringIO()
+
+    call_command("warm_caches", workers=1, budget=0, stdout=out)
+
+    assert cache.get(fragment_key(user)) is None
+    assert "Warmed caches for 0 of" in out.getvalue()
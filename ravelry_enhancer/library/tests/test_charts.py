@@ -0,0 +1,143 @@
+import io
+import random
+import re
+import time
+
+import pytest
+from PIL import Image
+
+from ravelry_enhancer.library import charts
+from ravelry_enhancer.library.charts import ChartSyntaxError
+from ravelry_enhancer.library.charts import parse_chart
+from ravelry_enhancer.library.charts import render_chart
+from ravelry_enhancer.library.charts import render_png
+from ravelry_enhancer.library.charts import render_svg
+
+COLORWORK = """
+# Two-colour peerie
+colors: A=#f1faee B=#1d3557
+A3 B2 A3
+(A1 B1)4
+A3 B2 A3
+"""
+
+
+def large_colorwork(size: int = 300) -> str:
+    rng = random.Random(0)  # noqa: S311
+    rows = ["colors: A=#f1faee B=#1d3557 C=#e63946 D=#a8dadc"]
+    for _ in range(size):
+        stitches = []
+        remaining = size
+        while remaining:
+            count = min(remaining, rng.choice([1, 2, 3, 5, 8, 13]))
+            stitches.append(f"{rng.choice('ABCD')}{count}")
+            remaining -= count
+        rows.append(" ".join(stitches))
+    return "\n".join(rows)
+
+
+class TestParseChart:
+    def test_runs_and_repeats(self):
+        chart = parse_chart(COLORWORK)
+
+        assert chart.colors == {"A": "#f1faee", "B": "#1d3557"}
+        assert chart.rows[0] == [("A", 3), ("B", 2), ("A", 3)]
+        assert chart.rows[1] == [("A", 1), ("B", 1)] * 4
+        assert (chart.width, chart.height) == (8, 3)
+
+    def test_symbols_with_digits(self):
+        chart = parse_chart("k2tog m12 k12 (yo ssk)2")
+
+        assert chart.rows[0] == [
+            ("k2tog", 1),
+            ("m1", 2),
+            ("k", 12),
+            ("yo", 1),
+            ("ssk", 1),
+            ("yo", 1),
+            ("ssk", 1),
+        ]
+
+    def test_short_rows_padded_with_no_stitch(self):
+        chart = parse_chart("k5\nk2 cdd\nk1")
+
+        assert chart.rows[2] == [("k", 1), ("ns", 4)]
+
+    @pytest.mark.parametrize(
+        ("source", "message"),
+        [
+            ("k2 kfb", "line 1: unknown stitch 'kfb'"),
+            ("k2\n(k2 yo", "line 2: unclosed '('"),
+            ("k2)", "line 1: unmatched ')'"),
+            ("(k1)2000", "line 1: row is too wide"),
+            ("colors: a=red", "line 1: colours are written NAME=#rrggbb, not 'a=red'"),
+            ("k2 A2", "line 1: unknown stitch 'A2'"),
+        ],
+    )
+    def test_errors(self, source, message):
+        with pytest.raises(ChartSyntaxError, match=re.escape(message)):
+            parse_chart(source)
+
+
+class TestRenderSvg:
+    def test_runs_become_rectangles(self):
+        svg = render_svg(parse_chart(COLORWORK), numbers=False)
+
+        # A is the background, so only B's six runs get rectangles, plus the
+        # background and the grid overlay.
+        assert svg.count("<rect") == 8  # noqa: PLR2004
+        assert '<rect width="8" height="3" fill="#f1faee"/>' in svg
+        assert '<rect x="3" y="2" width="2" height="1"/>' in svg
+
+    def test_stacked_runs_share_a_rectangle(self):
+        svg = render_svg(parse_chart("k3 p2\nk3 p2\nk3 p2"), numbers=False)
+
+        assert '<rect x="3" y="0" width="2" height="3"/>' in svg
+
+    def test_symbols_drawn_with_use(self):
+        svg = render_svg(parse_chart("k1 yo k2tog k1\nk4"))
+
+        assert svg.count('<symbol id="s-yo"') == 1
+        assert '<use href="#s-yo"' in svg
+        assert '<g fill="url(#p-k2tog)">' in svg
+        assert ">1</text>" in svg
+        assert ">2</text>" in svg
+
+    def test_large_colorwork_under_100ms(self):
+        chart = parse_chart(large_colorwork())
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            render_svg(chart)
+            timings.append(time.perf_counter() - start)
+
+        assert min(timings) < 0.1  # noqa: PLR2004
+
+
+def test_render_png():
+    cell_size = 10
+    png = render_png(parse_chart(COLORWORK), cell_size, numbers=False)
+
+    image = Image.open(io.BytesIO(png))
+    assert image.size == (80, 30)
+    # Row 1 is the bottom row; its fourth stitch is B.
+    assert image.getpixel((3 * cell_size + 5, 2 * cell_size + 5)) == (29, 53, 87)
+    assert image.getpixel((5, 2 * cell_size + 5)) == (241, 250, 238)
+
+
+def test_render_chart_caches_by_source_and_options(monkeypatch):
+    calls = []
+
+    def fake_render(chart, **options):
+        calls.append(options)
+        return b"<svg/>"
+
+    monkeypatch.setitem(charts.RENDERERS, "svg", fake_render)
+
+    assert render_chart("k1 yo k1") == b"<svg/>"
+    assert render_chart("k1 yo k1") == b"<svg/>"
+    render_chart("k1 yo k1", cell_size=20)
+    render_chart("k1 yo k1", "png")
+
+    assert len(calls) == 2  # noqa: PLR2004
+    assert render_chart("k1 yo k1", "png").startswith(b"\x89PNG")
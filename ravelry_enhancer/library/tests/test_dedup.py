@@ -0,0 +1,74 @@
+import time
+import uuid
+
+from ravelry_enhancer.library.dedup import MAX_TOKEN_POSTINGS
+from ravelry_enhancer.library.dedup import NEIGHBOURHOOD
+from ravelry_enhancer.library.dedup import YarnName
+from ravelry_enhancer.library.dedup import candidate_pairs
+from ravelry_enhancer.library.dedup import find_duplicates
+from ravelry_enhancer.library.dedup import normalize_name
+
+
+def test_normalize_name():
+    assert (
+        normalize_name("  Malabrigo RIOS (Superwash)! ") == "malabrigo rios superwash"
+    )
+
+
+def test_find_duplicates():
+    entries = [
+        YarnName(1, "Malabrigo Rios", "Worsted", "Merino"),
+        YarnName(2, "malabrigo - rios", "worsted", "merino"),
+        YarnName(3, "Rios Malabrigo", "Worsted", "Merino"),
+        YarnName(4, "Malabrigo Rios", "DK", "Merino"),
+        YarnName(5, "Cascade 220", "Worsted", "Merino"),
+    ]
+
+    clusters = find_duplicates(entries)
+
+    assert len(clusters) == 1
+    assert sorted(clusters[0].keys) == [1, 2, 3]
+    assert clusters[0].suggested_name == "Malabrigo Rios"
+
+
+def test_only_pairs_within_blocks_sharing_a_token():
+    entries = [
+        YarnName(1, "Rios", "Worsted", "Merino"),
+        YarnName(2, "Rios", "Worsted", "Alpaca"),
+        YarnName(3, "Arroyo", "Worsted", "Merino"),
+        YarnName(4, "Rios", "Worsted", "Merino"),
+    ]
+    names = [normalize_name(entry.name) for entry in entries]
+
+    assert candidate_pairs(entries, names) == {(0, 3)}
+
+
+def test_pairs_neighbours_when_only_common_tokens_are_shared():
+    entries = [
+        YarnName(index, f"Merino Wool {uuid.uuid4().hex}", "Worsted", "Merino")
+        for index in range(MAX_TOKEN_POSTINGS * 4)
+    ]
+    entries += [
+        YarnName("a", "Merino Wool", "Worsted", "Merino"),
+        YarnName("b", "Wool, Merino", "Worsted", "Merino"),
+    ]
+    names = [normalize_name(entry.name) for entry in entries]
+
+    pairs = candidate_pairs(entries, names)
+
+    assert (len(entries) - 2, len(entries) - 1) in pairs
+    assert len(pairs) <= len(entries) * NEIGHBOURHOOD
+    assert [cluster.keys for cluster in find_duplicates(entries)] == [["a", "b"]]
+
+
+def test_scales_near_linearly():
+    entries = [
+        YarnName(index, f"Mill {index % 997} Yarn {index}", "Worsted", "Merino")
+        for index in range(20_000)
+    ]
+
+    start = time.perf_counter()
+    find_duplicates(entries)
+
+    # All-pairs would be 200 million comparisons.
+    assert time.perf_counter() - start < 10  # noqa: PLR2004
@@ -0,0 +1,211 @@
+import io
+import json
+import os
+import zipfile
+from datetime import date
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from ravelry_enhancer.library import export
+from ravelry_enhancer.library import pattern_store
+from ravelry_enhancer.library.export import expire_data_exports
+from ravelry_enhancer.library.export import iter_export
+from ravelry_enhancer.library.export import run_data_export
+from ravelry_enhancer.library.models import DataExport
+from ravelry_enhancer.library.models import Project
+from ravelry_enhancer.library.models import StashImport
+from ravelry_enhancer.library.models import StashItem
+from ravelry_enhancer.library.pattern_store import store_pattern_file
+from ravelry_enhancer.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def library(user):
+    Project.objects.create(user=user, name="Hat", started=date(2024, 1, 1))
+    StashItem.objects.create(user=user, import_key="rios", name="Rios", meters=192)
+    stash_import = StashImport(user=user)
+    stash_import.file.save("stash.csv", ContentFile(b"Yarn\r\nRios\r\n"))
+    pdf = b"%PDF-1.4 " + os.urandom(300_000)
+    pattern = store_pattern_file(user, io.BytesIO(pdf), "Bonnet/Hat.pdf")
+    return pattern, pdf
+
+
+def read_archive(chunks) -> zipfile.ZipFile:
+    return zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+
+
+def test_export_holds_account_rows_and_files(user, library):
+    pattern, pdf = library
+    UserFactory()  # Someone else's data must not appear.
+
+    archive = read_archive(iter_export(user))
+
+    assert archive.testzip() is None
+    assert json.loads(archive.read("account.json"))["email"] == user.email
+    (project,) = archive.read("projects.ndjson").splitlines()
+    assert json.loads(project)["name"] == "Hat"
+    (stash,) = archive.read("stash.ndjson").splitlines()
+    assert json.loads(stash)["meters"] == 192  # noqa: PLR2004
+    assert archive.read(f"patterns/{pattern.pk}-BonnetHat.pdf") == pdf
+    (upload,) = (n for n in archive.namelist() if n.startswith("stash_imports/"))
+    assert archive.read(upload) == b"Yarn\r\nRios\r\n"
+
+
+def test_export_is_yielded_in_bounded_pieces(user, library, monkeypatch):
+    monkeypatch.setattr(export, "FLUSH_SIZE", 4096)
+    monkeypatch.setattr(pattern_store, "READ_SIZE", 8192)
+
+    chunks = list(iter_export(user))
+
+    assert len(chunks) > 10  # noqa: PLR2004
+    # At most one read from storage past the flush size, plus a member header.
+    assert max(map(len, chunks)) < 4096 + 8192 + 1024
+    assert read_archive(chunks).testzip() is None
+
+
+def test_run_data_export(user, library):
+    data_export = DataExport.objects.create(user=user)
+
+    run_data_export(data_export)
+
+    data_export.refresh_from_db()
+    assert data_export.status == DataExport.Status.FINISHED
+    assert data_export.size == data_export.file.size
+    with data_export.file.open("rb") as stream:
+        assert "account.json" in zipfile.ZipFile(stream).namelist()
+
+
+def test_run_data_export_writes_outside_media(user, library, settings):
+    data_export = DataExport.objects.create(user=user)
+
+    run_data_export(data_export)
+
+    assert data_export.file.path.startswith(settings.DATA_EXPORT_ROOT)
+
+
+def test_expire_data_exports(user, library):
+    old = DataExport.objects.create(user=user)
+    run_data_export(old)
+    DataExport.objects.filter(pk=old.pk).update(
+        created=timezone.now() - timedelta(days=8),
+    )
+    stuck = DataExport.objects.create(
+        user=user,
+        status=DataExport.Status.RUNNING,
+        started=timezone.now() - timedelta(hours=3),
+    )
+    running = DataExport.objects.create(
+        user=user,
+        status=DataExport.Status.RUNNING,
+        started=timezone.now(),
+    )
+
+    assert expire_data_exports() == (1, 1)
+
+    assert not DataExport.objects.filter(pk=old.pk).exists()
+    assert not old.file.storage.exists(old.file.name)
+    stuck.refresh_from_db()
+    assert stuck.status == DataExport.Status.FAILED
+    running.refresh_from_db()
+    assert running.status == DataExport.Status.RUNNING
+
+
+def test_export_data_command_runs_pending(user, library):
+    data_export = DataExport.objects.create(user=user)
+
+    call_command("export_data", pending=True, stdout=io.StringIO())
+
+    data_export.refresh_from_db()
+    assert data_export.status == DataExport.Status.FINISHED
+
+
+class TestDataExportView:
+    def test_small_account_is_streamed(self, client, user, library):
+        client.force_login(user)
+
+        response = client.post(reverse("library:data-export"))
+
+        assert response.status_code == HTTPStatus.OK
+        assert response["Content-Type"] == "application/zip"
+        assert "attachment" in response["Content-Disposition"]
+        assert "account.json" in read_archive(response.streaming_content).namelist()
+
+    def test_large_account_is_queued_once(self, client, user, library, settings):
+        settings.DATA_EXPORT_STREAM_MAX_BYTES = 1000
+        client.force_login(user)
+
+        first = client.post(reverse("library:data-export"))
+        client.post(reverse("library:data-export"))
+
+        assert first.status_code == HTTPStatus.FOUND
+        assert user.data_exports.get().status == DataExport.Status.PENDING
+
+    def test_stale_running_export_does_not_block_another(
+        self,
+        client,
+        user,
+        library,
+        settings,
+    ):
+        settings.DATA_EXPORT_STREAM_MAX_BYTES = 1000
+        DataExport.objects.create(
+            user=user,
+            status=DataExport.Status.RUNNING,
+            started=timezone.now() - timedelta(hours=3),
+        )
+        client.force_login(user)
+
+        client.post(reverse("library:data-export"))
+
+        assert user.data_exports.filter(status=DataExport.Status.PENDING).exists()
+
+    def test_download_serves_finished_file(self, client, user, library):
+        data_export = DataExport.objects.create(user=user)
+        run_data_export(data_export)
+        client.force_login(user)
+
+        response = client.get(
+            reverse("library:data-export-download", kwargs={"pk": data_export.pk}),
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        assert "attachment" in response["Content-Disposition"]
+        archive = read_archive(response.streaming_content)
+        assert "account.json" in archive.namelist()
+
+    def test_download_through_proxy(self, client, user, library, settings):
+        settings.DATA_EXPORT_ACCEL_REDIRECT = "/protected/exports/"
+        data_export = DataExport.objects.create(user=user)
+        run_data_export(data_export)
+        client.force_login(user)
+
+        response = client.get(
+            reverse("library:data-export-download", kwargs={"pk": data_export.pk}),
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        assert response["X-Accel-Redirect"] == (
+            f"/protected/exports/{data_export.file.name}"
+        )
+        assert response.content == b""
+
+    def test_cannot_download_another_users_export(self, client, user):
+        data_export = DataExport.objects.create(
+            user=UserFactory(),
+            status=DataExport.Status.FINISHED,
+        )
+        client.force_login(user)
+
+        response = client.get(
+            reverse("library:data-export-download", kwargs={"pk": data_export.pk}),
+        )
+
+        assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,189 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+
+from ravelry_enhancer.library.models import Needle
+from ravelry_enhancer.library.models import NeedleRequirement
+from ravelry_enhancer.library.models import Project
+from ravelry_enhancer.library.models import QueuedPattern
+from ravelry_enhancer.library.needles import check_queue
+from ravelry_enhancer.library.needles import free_needles
+from ravelry_enhancer.library.needles import parse_requirements
+from ravelry_enhancer.library.needles import set_project_needles
+from ravelry_enhancer.library.units import UnitError
+
+pytestmark = pytest.mark.django_db
+
+
+def needle(user, kind, size, length=None):
+    return Needle.objects.create(
+        user=user,
+        kind=kind,
+        size_mm=Decimal(size),
+        length_cm=length,
+    )
+
+
+def queue(user, name, requirements):
+    pattern = QueuedPattern.objects.create(user=user, name=name)
+    for requirement in parse_requirements(requirements):
+        requirement.pattern = pattern
+        requirement.save()
+    return pattern
+
+
+def test_needles_busy_until_project_completed(user):
+    circular = needle(user, Needle.Kind.CIRCULAR, "4.5", 80)
+    project = Project.objects.create(user=user, name="Vest", started=date(2024, 1, 5))
+    set_project_needles(project, [circular])
+
+    assert not free_needles(user).exists()
+
+    project.completed = date(2024, 3, 1)
+    project.save()
+
+    assert circular.uses.get().end == date(2024, 3, 1)
+    assert list(free_needles(user)) == [circular]
+    # Still tied up on a day before the project finished.
+    assert not free_needles(user, on=date(2024, 2, 1)).exists()
+
+
+def test_project_save_leaves_needles_alone_unless_dates_change(
+    user,
+    django_assert_num_queries,
+):
+    circular = needle(user, Needle.Kind.CIRCULAR, "4.5", 80)
+    set_project_needles(
+        Project.objects.create(user=user, name="Vest", started=date(2024, 1, 5)),
+        [circular],
+    )
+    project = Project.objects.get()
+
+    project.name = "Tank"
+    with django_assert_num_queries(1):
+        project.save()
+    project.started = date(2024, 1, 6)
+    with django_assert_num_queries(3):
+        project.save()
+
+    assert circular.uses.get().start == date(2024, 1, 6)
+
+
+def test_set_project_needles_frees_removed_needles(user):
+    dpns = needle(user, Needle.Kind.DPN, "3.25")
+    hook = needle(user, Needle.Kind.HOOK, "3.25")
+    project = Project.objects.create(user=user, name="Socks")
+    set_project_needles(project, [dpns, hook])
+
+    set_project_needles(project, [dpns])
+
+    assert list(project.needles.all()) == [dpns]
+    assert list(free_needles(user)) == [hook]
+
+
+def test_parse_requirements():
+    circular, dpns, any_needle = parse_requirements("US 7 circular 32in, 4mm dpns\n5")
+
+    assert (circular.kind, circular.size_mm, circular.length_cm) == (
+        Needle.Kind.CIRCULAR,
+        Decimal("4.50"),
+        81,
+    )
+    assert (dpns.kind, dpns.size_mm, dpns.length_cm) == (
+        Needle.Kind.DPN,
+        Decimal("4.00"),
+        None,
+    )
+    assert (any_needle.kind, any_needle.size_mm) == ("", Decimal("5.00"))
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["US 7 circular, huge", "150 mm dpns", "4 mm circular 40000 cm"],
+)
+def test_parse_requirements_rejects(text):
+    with pytest.raises(UnitError):
+        parse_requirements(text)
+
+
+def test_check_queue_in_one_pass(user, django_assert_num_queries):
+    needle(user, Needle.Kind.CIRCULAR, "4", 40)
+    needle(user, Needle.Kind.CIRCULAR, "4", 100)
+    needle(user, Needle.Kind.HOOK, "5")
+    busy = needle(user, Needle.Kind.DPN, "3.25")
+    set_project_needles(Project.objects.create(user=user, name="Socks"), [busy])
+    sweater = queue(user, "Sweater", "4mm circular 80cm, 4mm")
+    hat = queue(user, "Hat", "4mm circular 40cm")
+    socks = queue(user, "Socks", "3.25mm dpns")
+    amigurumi = queue(user, "Amigurumi", "5mm hook")
+    scarf = queue(user, "Scarf", "5mm")
+
+    with django_assert_num_queries(3):
+        statuses = check_queue(user)
+
+    startable = {status.pattern: status.startable for status in statuses}
+    # The 80 cm requirement takes the 100 cm circular, leaving the 40 cm one
+    # for the requirement that takes any 4 mm needle.
+    assert startable == {
+        sweater: True,
+        hat: True,
+        socks: False,
+        amigurumi: True,
+        scarf: False,
+    }
+    (socks_status,) = (status for status in statuses if status.pattern == socks)
+    assert [str(requirement) for requirement in socks_status.missing] == [
+        "3.25 mm Double-pointed",
+    ]
+
+
+def test_check_queue_needs_two_needles_of_a_size(user):
+    needle(user, Needle.Kind.STRAIGHT, "6")
+    queue(user, "Brioche", "6mm, 6mm")
+
+    (status,) = check_queue(user)
+
+    assert status.missing == [NeedleRequirement.objects.last()]
+
+
+class TestViews:
+    def test_add_needle(self, client, user):
+        client.force_login(user)
+
+        response = client.post(
+            reverse("library:needles"),
+            {"kind": Needle.Kind.CIRCULAR, "size_mm": "US 6", "length_cm": 60},
+        )
+
+        assert response.status_code == 302  # noqa: PLR2004
+        assert user.needles.get().size_mm == Decimal("4.00")
+        assert b"Free" in client.get(reverse("library:needles")).content
+
+    def test_queue_pattern(self, client, user):
+        needle(user, Needle.Kind.CIRCULAR, "4.5", 80)
+        client.force_login(user)
+
+        client.post(
+            reverse("library:queue"),
+            {"name": "Vest", "needles": "US 7 circular 60cm"},
+        )
+        response = client.get(reverse("library:queue"))
+
+        assert user.queue.get().needle_requirements.get().length_cm == 60  # noqa: PLR2004
+        assert b"Ready to start" in response.content
+
+    def test_project_needles(self, client, user):
+        circular = needle(user, Needle.Kind.CIRCULAR, "4.5", 80)
+        project = Project.objects.create(user=user, name="Vest")
+        client.force_login(user)
+
+        response = client.post(
+            reverse("library:project-needles", args=[project.pk]),
+            {"needles": [circular.pk]},
+        )
+
+        assert response.status_code == 302  # noqa: PLR2004
+        assert list(project.needles.all()) == [circular]
+        assert not free_needles(user).exists()
@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from ravelry_enhancer.library.palettes import PALETTE_SIZE
+from ravelry_enhancer.library.palettes import PaletteIndex
+from ravelry_enhancer.library.palettes import extract_palette
+from ravelry_enhancer.library.palettes import extract_palettes
+from ravelry_enhancer.library.palettes import palette_from_bytes
+from ravelry_enhancer.library.palettes import palette_to_bytes
+from ravelry_enhancer.library.palettes import parse_color
+from ravelry_enhancer.library.palettes import srgb_to_lab
+
+TEAL = (0, 128, 128)
+RUST = (183, 65, 14)
+
+
+def _photo(path, colors, size=(400, 300), fmt="JPEG"):
+    """Write a photo made of vertical bands with the given (rgb, share) colours."""
+    image = Image.new("RGB", size)
+    left = 0
+    for rgb, share in colors:
+        width = round(size[0] * share)
+        image.paste(rgb, (left, 0, left + width, size[1]))
+        left += width
+    image.save(path, fmt)
+    return path
+
+
+def _palette(*colors):
+    palette = np.zeros((PALETTE_SIZE, 4), dtype=np.float32)
+    for index, (rgb, weight) in enumerate(colors):
+        palette[index, :3] = srgb_to_lab(np.array(rgb))
+        palette[index, 3] = weight
+    return palette
+
+
+def test_srgb_to_lab_reference_values():
+    np.testing.assert_allclose(srgb_to_lab([255, 255, 255]), [100, 0, 0], atol=0.01)
+    np.testing.assert_allclose(srgb_to_lab([0, 0, 0]), [0, 0, 0], atol=0.01)
+    np.testing.assert_allclose(
+        srgb_to_lab([255, 0, 0]),
+        [53.24, 80.09, 67.20],
+        atol=0.05,
+    )
+
+
+def test_parse_color():
+    np.testing.assert_allclose(parse_color("#008080"), srgb_to_lab(np.array(TEAL)))
+
+
+def test_extract_palette(tmp_path):
+    photo = _photo(tmp_path / "stash.jpg", [(TEAL, 0.75), (RUST, 0.25)])
+
+    palette = extract_palette(photo)
+
+    assert palette.shape == (PALETTE_SIZE, 4)
+    assert palette[:, 3].sum() == pytest.approx(1)
+    np.testing.assert_allclose(palette[0, :3], parse_color(TEAL), atol=3)
+    assert palette[0, 3] == pytest.approx(0.75, abs=0.05)
+    assert np.linalg.norm(palette[1, :3] - parse_color(RUST)) < 5  # noqa: PLR2004
+
+
+def test_extract_palettes_in_pool(tmp_path):
+    photos = [
+        _photo(tmp_path / f"{index}.png", [(rgb, 1)], fmt="PNG")
+        for index, rgb in enumerate([TEAL, RUST, TEAL])
+    ]
+
+    palettes = extract_palettes(photos, workers=2)
+
+    assert len(palettes) == len(photos)
+    np.testing.assert_allclose(palettes[1][0, :3], parse_color(RUST), atol=0.5)
+    assert palettes[1][0, 3] == 1
+
+
+def test_palette_bytes_round_trip():
+    palette = _palette((TEAL, 0.6), (RUST, 0.4))
+
+    data = palette_to_bytes(palette)
+
+    assert len(data) == PALETTE_SIZE * 4 * 4
+    np.testing.assert_array_equal(palette_from_bytes(data), palette)
+
+
+class TestPaletteIndex:
+    def test_nearest(self):
+        index = PaletteIndex()
+        index.update("teal", _palette((TEAL, 1)))
+        index.update("rust", _palette((RUST, 1)))
+        index.update("mostly-rust", _palette((RUST, 0.8), ((0, 120, 120), 0.2)))
+
+        results = index.nearest("#008080", limit=2)
+
+        assert [key for key, _ in results] == ["teal", "mostly-rust"]
+        assert results[0][1] == pytest.approx(0, abs=1e-3)
+
+    def test_ignores_minor_colours(self):
+        index = PaletteIndex()
+        index.update("speckled", _palette((RUST, 0.95), (TEAL, 0.05)))
+
+        assert index.nearest(TEAL)[0][1] > 50  # noqa: PLR2004
+
+    def test_update_and_remove(self):
+        index = PaletteIndex()
+        index.update(1, _palette((TEAL, 1)))
+        index.update(2, _palette((RUST, 1)))
+        index.update(3, _palette((TEAL, 1)))
+
+        index.remove(1)
+        index.update(3, _palette((RUST, 1)))
+
+        assert len(index) == 2  # noqa: PLR2004
+        assert 1 not in index
+        assert {key for key, _ in index.nearest(RUST)} == {2, 3}
+
+    def test_empty(self):
+        assert PaletteIndex().nearest(TEAL) == []
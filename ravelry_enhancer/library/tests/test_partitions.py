@@ -0,0 +1,73 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from ravelry_enhancer.library.models import StashItem
+from ravelry_enhancer.library.partitions import INITIAL_MODULUS
+from ravelry_enhancer.library.partitions import partitions
+from ravelry_enhancer.library.partitions import split_partition
+from ravelry_enhancer.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+TABLE = "library_stashitem"
+
+
+@pytest.fixture()
+def stash():
+    users = UserFactory.create_batch(20)
+    for user in users:
+        StashItem.objects.create(user=user, import_key="rios", name="Rios")
+    return users
+
+
+def test_stash_is_partitioned_by_user():
+    found = partitions(TABLE)
+
+    assert [partition.modulus for partition in found] == [INITIAL_MODULUS] * 8
+    assert [partition.remainder for partition in found] == list(range(8))
+
+
+def test_user_queries_touch_one_partition(user):
+    plan = StashItem.objects.filter(user=user).explain()
+
+    scanned = [p.name for p in partitions(TABLE) if f" on {p.name} " in plan]
+    assert len(scanned) == 1, plan
+
+
+def test_split_partition_keeps_rows(stash):
+    first = partitions(TABLE)[0]
+
+    names = split_partition(first)
+
+    assert names == [f"{TABLE}_h16_0", f"{TABLE}_h16_8"]
+    assert [(p.modulus, p.remainder) for p in partitions(TABLE)][:2] == [
+        (8, 1),
+        (8, 2),
+    ]
+    assert StashItem.objects.count() == len(stash)
+    for user in stash:
+        assert StashItem.objects.get(user=user).name == "Rios"
+    # Identities carry on after the rows moved.
+    StashItem.objects.create(user=stash[0], import_key="new", name="New")
+
+
+def test_command_adds_partitions(stash):
+    call_command("hash_partitions", modulus=16, stdout=io.StringIO())
+
+    found = partitions(TABLE)
+    assert len(found) == 16  # noqa: PLR2004
+    assert {partition.modulus for partition in found} == {16}
+    assert StashItem.objects.count() == len(stash)
+
+
+def test_command_splits_named_partition():
+    out = io.StringIO()
+
+    call_command("hash_partitions", split=[f"{TABLE}_h8_3"], stdout=out)
+
+    assert f"Split {TABLE}_h8_3 into {TABLE}_h16_3 and {TABLE}_h16_11" in out.getvalue()
+    with pytest.raises(CommandError, match="No such partitions"):
+        call_command("hash_partitions", split=[f"{TABLE}_h8_3"])
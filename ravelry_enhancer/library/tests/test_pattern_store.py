@@ -0,0 +1,171 @@
+import io
+import os
+import random
+
+import pytest
+from django.core.files.storage import default_storage
+
+from ravelry_enhancer.library.models import PatternDocument
+from ravelry_enhancer.library.pattern_store import chunk_name
+from ravelry_enhancer.library.pattern_store import index_pending_documents
+from ravelry_enhancer.library.pattern_store import iter_chunks
+from ravelry_enhancer.library.pattern_store import iter_document_bytes
+from ravelry_enhancer.library.pattern_store import store_pattern_file
+from ravelry_enhancer.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def make_pdf(*page_texts: str) -> bytes:
+    """Build a minimal PDF with one line of Helvetica text per page."""
+    page_count = len(page_texts)
+    kids = " ".join(f"{3 + 2 * index} 0 R" for index in range(page_count))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {page_count} >>".encode(),
+    ]
+    font_id = 3 + 2 * page_count
+    for index, text in enumerate(page_texts):
+        content = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects += [
+            (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                f"/Resources << /Font << /F1 {font_id} 0 R >> >> "
+                f"/Contents {4 + 2 * index} 0 R >>"
+            ).encode(),
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content),
+        ]
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\n" % (len(objects) + 1)
+    pdf += b"startxref\n%d\n%%%%EOF\n" % xref
+    return bytes(pdf)
+
+
+def make_objects(seed: int, count: int) -> list[bytes]:
+    rng = random.Random(seed)  # noqa: S311
+    return [
+        b"%d 0 obj\n%s\nendobj\n" % (number, rng.randbytes(rng.randint(2000, 12000)))
+        for number in range(count)
+    ]
+
+
+class TestIterChunks:
+    def test_reassembles_input(self):
+        data = b"".join(make_objects(1, 400))
+
+        chunks = list(iter_chunks(io.BytesIO(data)))
+
+        assert b"".join(chunks) == data
+        assert len(chunks) > 1
+
+    def test_chunks_capped_without_object_markers(self):
+        data = os.urandom(10 * 1024 * 1024)
+
+        chunks = list(iter_chunks(io.BytesIO(data), max_size=1024 * 1024))
+
+        assert b"".join(chunks) == data
+        assert {len(chunk) for chunk in chunks[:-1]} == {1024 * 1024}
+
+    def test_changed_object_only_changes_nearby_chunks(self):
+        objects = make_objects(3, 400)
+        watermarked = objects.copy()
+        watermarked[200] = b"200 0 obj\n(Licensed to a knitter)\nendobj\n"
+
+        original = set(iter_chunks(io.BytesIO(b"".join(objects))))
+        changed = list(iter_chunks(io.BytesIO(b"".join(watermarked))))
+
+        assert len(original) > 10  # noqa: PLR2004
+        assert sum(chunk not in original for chunk in changed) <= 2  # noqa: PLR2004
+
+
+class TestStorePatternFile:
+    def test_same_file_stored_once_across_users(self):
+        pdf = make_pdf("Raglan sweater")
+        first = store_pattern_file(UserFactory(), io.BytesIO(pdf), "Raglan.pdf")
+        second = store_pattern_file(UserFactory(), io.BytesIO(pdf), "raglan.pdf")
+
+        assert first.document == second.document
+        assert PatternDocument.objects.count() == 1
+        assert b"".join(iter_document_bytes(first.document)) == pdf
+        for digest in first.document.chunks:
+            assert default_storage.exists(chunk_name(digest))
+
+    def test_same_file_twice_for_one_user(self, user):
+        pdf = make_pdf("Raglan sweater")
+        first = store_pattern_file(user, io.BytesIO(pdf), "Raglan.pdf")
+        second = store_pattern_file(user, io.BytesIO(pdf), "Copy.pdf")
+
+        assert first == second
+        assert user.pattern_files.count() == 1
+
+    def test_chunk_stored_concurrently_is_kept_once(self, user, monkeypatch):
+        pdf = make_pdf("Raglan sweater")
+        first = store_pattern_file(UserFactory(), io.BytesIO(pdf), "Raglan.pdf")
+        # As if another upload saved each chunk between the check and the save.
+        monkeypatch.setattr(default_storage, "exists", lambda name: False)
+
+        second = store_pattern_file(user, io.BytesIO(pdf), "raglan.pdf")
+
+        assert second.document == first.document
+        chunk_dir = default_storage.path(chunk_name(first.document.chunks[0]))
+        assert os.listdir(os.path.dirname(chunk_dir)) == [
+            os.path.basename(chunk_dir),
+        ]
+
+    def test_watermarked_copies_share_chunks(self):
+        objects = make_objects(4, 300)
+        watermarked = objects.copy()
+        watermarked[100] = b"100 0 obj\n(Licensed to a knitter)\nendobj\n"
+
+        first = store_pattern_file(
+            UserFactory(),
+            io.BytesIO(b"".join(objects)),
+            "a.pdf",
+        ).document
+        second = store_pattern_file(
+            UserFactory(),
+            io.BytesIO(b"".join(watermarked)),
+            "b.pdf",
+        ).document
+
+        assert first != second
+        shared = set(first.chunks) & set(second.chunks)
+        assert len(shared) >= len(first.chunks) - 2
+
+
+def test_index_pending_documents(user):
+    store_pattern_file(user, io.BytesIO(make_pdf("Brioche cowl", "Cast on")), "a")
+    store_pattern_file(user, io.BytesIO(b"%PDF-1.4 truncated"), "b")
+
+    assert index_pending_documents(workers=2) == 2  # noqa: PLR2004
+    assert index_pending_documents(workers=1) == 0
+
+    cowl = PatternDocument.objects.get(files__name="a")
+    assert "Brioche cowl" in cowl.text
+    assert "Cast on" in cowl.text
+    assert PatternDocument.objects.get(files__name="b").text == ""
+    assert list(
+        user.pattern_files.filter(document__search_vector="brioche"),
+    ) == [cowl.files.get()]
+
+
+def test_unreadable_documents_are_indexed_empty(user):
+    store_pattern_file(user, io.BytesIO(make_pdf("Brioche cowl")), "a")
+    missing = store_pattern_file(user, io.BytesIO(make_pdf("Lace shawl")), "b")
+    default_storage.delete(chunk_name(missing.document.chunks[0]))
+
+    assert index_pending_documents(workers=2) == 2  # noqa: PLR2004
+
+    missing.document.refresh_from_db()
+    assert missing.document.indexed
+    assert missing.document.text == ""
+    assert "Brioche cowl" in PatternDocument.objects.get(files__name="a").text
@@ -0,0 +1,123 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from ravelry_enhancer.library import planner
+from ravelry_enhancer.library.models import NeedleRequirement
+from ravelry_enhancer.library.models import QueuedPattern
+from ravelry_enhancer.library.models import QueuePlan
+from ravelry_enhancer.library.models import StashItem
+from ravelry_enhancer.library.planner import current_plan
+from ravelry_enhancer.library.planner import load_inputs
+from ravelry_enhancer.library.planner import plan_greedy
+from ravelry_enhancer.library.planner import solve
+
+pytestmark = pytest.mark.django_db
+
+
+def stash(user, name, meters, weight="Worsted"):
+    return StashItem.objects.create(
+        user=user,
+        import_key=name,
+        name=name,
+        weight=weight,
+        meters=meters,
+    )
+
+
+def queue(user, name, meters, weight="Worsted", position=0):
+    return QueuedPattern.objects.create(
+        user=user,
+        name=name,
+        yarn_weight=weight,
+        yarn_meters=meters,
+        position=position,
+    )
+
+
+@pytest.fixture()
+def library(user):
+    """A queue that greedy planning gets wrong."""
+    hat = queue(user, "Hat", 200, position=0)
+    vest = queue(user, "Vest", 400, position=1)
+    big = stash(user, "Big", 250)
+    medium = stash(user, "Medium", 150)
+    small = [stash(user, f"Small {i}", 100) for i in range(2)]
+    stash(user, "Lace", 1000, weight="Lace")
+    return hat, vest, big, medium, small
+
+
+def test_greedy_takes_smallest_covering_yarn_first(user, library):
+    hat, vest, big, medium, small = library
+
+    allocation = plan_greedy(load_inputs(user))
+
+    # The hat takes most of the big skein, leaving too little for the vest.
+    assert allocation == {
+        (hat.pk, big.pk): 200,
+        (vest.pk, medium.pk): 150,
+        (vest.pk, small[0].pk): 100,
+    }
+
+
+def test_solver_uses_the_most_stash(user, library):
+    hat, vest, big, medium, small = library
+
+    solver, allocation = solve(load_inputs(user), time_limit=10)
+
+    assert solver == "ilp"
+    assert allocation == {
+        (hat.pk, small[0].pk): 100,
+        (hat.pk, small[1].pk): 100,
+        (vest.pk, big.pk): 250,
+        (vest.pk, medium.pk): 150,
+    }
+
+
+def test_greedy_fallback(user, library, monkeypatch):
+    monkeypatch.setattr(planner, "plan_ilp", lambda inputs, time_limit: None)
+
+    solver, allocation = solve(load_inputs(user), time_limit=10)
+
+    assert solver == "greedy"
+    assert sum(allocation.values()) == 450  # noqa: PLR2004
+
+
+def test_patterns_waiting_for_needles_are_not_planned(user, library):
+    hat = library[0]
+    NeedleRequirement.objects.create(pattern=hat, size_mm=4)
+
+    _, allocation = solve(load_inputs(user), time_limit=10)
+
+    assert all(pattern_id != hat.pk for pattern_id, _ in allocation)
+
+
+def test_plan_is_kept_until_the_library_changes(user, library):
+    assert current_plan(user) is None
+    assert current_plan(user) is None
+    assert QueuePlan.objects.count() == 1
+
+    call_command("plan_queues", pending=True, stdout=io.StringIO())
+
+    plan = current_plan(user)
+    assert plan.solver == "ilp"
+    assert plan.result["stash_used"] == 600  # noqa: PLR2004
+    assert plan.result["to_buy"] == 0
+
+    stash(user, "New", 500)
+    assert current_plan(user) is None
+    call_command("plan_queues", pending=True, stdout=io.StringIO())
+    assert current_plan(user) != plan
+    assert not QueuePlan.objects.filter(pk=plan.pk).exists()
+
+
+def test_queue_plan_view(client, user, library):
+    client.force_login(user)
+    assert b"being worked out" in client.get(reverse("library:queue-plan")).content
+
+    call_command("plan_queues", pending=True, stdout=io.StringIO())
+    response = client.get(reverse("library:queue-plan"))
+
+    assert b"250.0 m of Big" in response.content
@@ -0,0 +1,134 @@
+import pytest
+from django.db import DatabaseError
+from fakeredis import FakeRedis
+
+from ravelry_enhancer.library import row_counter
+from ravelry_enhancer.library.models import ActivityEvent
+from ravelry_enhancer.library.models import KnittingSession
+from ravelry_enhancer.library.models import Project
+from ravelry_enhancer.library.row_counter import current_rows
+from ravelry_enhancer.library.row_counter import flush_row_counts
+from ravelry_enhancer.library.row_counter import increment_rows
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def fake_redis(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(row_counter, "_client", lambda: client)
+    return client
+
+
+@pytest.fixture()
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(row_counter.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture()
+def project(user):
+    return Project.objects.create(user=user, name="Hitchhiker", row_count=10)
+
+
+def test_taps_accumulate_without_database_writes(
+    fake_redis,
+    project,
+    django_assert_num_queries,
+):
+    with django_assert_num_queries(0):
+        for _ in range(5):
+            increment_rows(project.pk)
+        assert increment_rows(project.pk, -1) == 4  # noqa: PLR2004
+
+    project.refresh_from_db()
+    assert project.row_count == 10  # noqa: PLR2004
+    assert current_rows(project) == 14  # noqa: PLR2004
+
+
+def test_flush_writes_pending_rows(fake_redis, clock, project, user):
+    other = Project.objects.create(user=user, name="Sockhead")
+    increment_rows(project.pk, 3)
+    increment_rows(other.pk)
+    increment_rows(other.pk, -1)
+
+    assert flush_row_counts() == 1
+
+    project.refresh_from_db()
+    assert project.row_count == 13  # noqa: PLR2004
+    assert current_rows(project) == 13  # noqa: PLR2004
+    assert flush_row_counts() == 0
+
+
+def test_row_count_never_negative(fake_redis, project):
+    increment_rows(project.pk, -15)
+
+    assert current_rows(project) == 0
+    flush_row_counts()
+    project.refresh_from_db()
+    assert project.row_count == 0
+
+
+def test_idle_sessions_are_saved(fake_redis, clock, project):
+    start = clock[0]
+    increment_rows(project.pk)
+    clock[0] += 60
+    increment_rows(project.pk)
+    flush_row_counts()
+
+    assert not KnittingSession.objects.exists()
+
+    clock[0] += row_counter.SESSION_IDLE_SECONDS + 1
+    flush_row_counts()
+
+    session = KnittingSession.objects.get()
+    assert session.project == project
+    assert session.rows == 2  # noqa: PLR2004
+    assert session.started.timestamp() == start
+    assert (session.ended - session.started).total_seconds() == 60  # noqa: PLR2004
+    assert not fake_redis.exists(row_counter.counter_key(project.pk))
+    event = ActivityEvent.objects.get(project=project)
+    assert (event.kind, event.seconds, event.rows) == ("knit", 60, 2)
+
+
+def test_tap_after_a_pause_starts_a_new_session(fake_redis, clock, project):
+    increment_rows(project.pk, 4)
+    clock[0] += row_counter.SESSION_IDLE_SECONDS + 1
+    increment_rows(project.pk)
+    flush_row_counts()
+
+    assert list(KnittingSession.objects.values_list("rows", flat=True)) == [4]
+    project.refresh_from_db()
+    assert project.row_count == 15  # noqa: PLR2004
+
+
+def test_failed_flush_keeps_taps(fake_redis, project, monkeypatch):
+    increment_rows(project.pk, 2)
+
+    def fail(deltas):
+        raise DatabaseError
+
+    monkeypatch.setattr(row_counter, "_save_rows", fail)
+    with pytest.raises(DatabaseError):
+        flush_row_counts()
+    monkeypatch.undo()
+    monkeypatch.setattr(row_counter, "_client", lambda: fake_redis)
+
+    flush_row_counts()
+    project.refresh_from_db()
+    assert project.row_count == 12  # noqa: PLR2004
+
+
+def test_flush_caps_counts_too_large_to_store(fake_redis, project, user):
+    other = Project.objects.create(user=user, name="Sockhead")
+    increment_rows(project.pk)
+    fake_redis.hset(row_counter.counter_key(project.pk), "pending", 10**12)
+    increment_rows(other.pk, 2)
+
+    assert flush_row_counts() == 2  # noqa: PLR2004
+
+    project.refresh_from_db()
+    assert project.row_count == row_counter.MAX_ROWS
+    other.refresh_from_db()
+    assert other.row_count == 2  # noqa: PLR2004
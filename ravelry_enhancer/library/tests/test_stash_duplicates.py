@@ -0,0 +1,85 @@
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from ravelry_enhancer.library.models import StashItem
+from ravelry_enhancer.library.stash_duplicates import merge_stash_items
+from ravelry_enhancer.library.stash_duplicates import stash_duplicates
+from ravelry_enhancer.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def rios(user):
+    return [
+        StashItem.objects.create(
+            user=user,
+            import_key=key,
+            brand="Malabrigo",
+            name=name,
+            weight="Worsted",
+            skeins=skeins,
+            meters=meters,
+            notes=notes,
+        )
+        for key, name, skeins, meters, notes in [
+            ("a", "Rios", Decimal(2), 384, "Blue"),
+            ("b", "rios", Decimal(1), None, ""),
+            ("c", "Rios", None, 192, "From the swap"),
+        ]
+    ]
+
+
+def test_stash_duplicates(user, rios):
+    StashItem.objects.create(user=user, import_key="d", name="Arroyo")
+
+    [group] = stash_duplicates(user)
+
+    assert group.items == rios
+    assert group.keep == rios[0]
+
+
+def test_merge_stash_items(user, rios):
+    keep = merge_stash_items(rios[0], rios)
+
+    assert list(user.stash.all()) == [keep]
+    keep.refresh_from_db()
+    assert keep.skeins == Decimal("3.00")
+    assert keep.meters == 576  # noqa: PLR2004
+    assert keep.grams is None
+    assert keep.notes == "Blue\n\nFrom the swap"
+
+
+class TestStashDuplicatesView:
+    def test_lists_groups(self, client, user, rios):
+        client.force_login(user)
+
+        response = client.get(reverse("library:stash-duplicates"))
+
+        assert response.status_code == HTTPStatus.OK
+        assert "Merge into Malabrigo Rios" in response.content.decode()
+
+    def test_merge(self, client, user, rios):
+        client.force_login(user)
+
+        response = client.post(
+            reverse("library:stash-duplicates"),
+            {"keep": rios[0].pk, "items": [rios[0].pk, rios[1].pk]},
+        )
+
+        assert response.status_code == HTTPStatus.FOUND
+        assert set(user.stash.values_list("pk", flat=True)) == {rios[0].pk, rios[2].pk}
+
+    def test_cannot_merge_another_users_stash(self, client, user, rios):
+        client.force_login(UserFactory())
+
+        response = client.post(
+            reverse("library:stash-duplicates"),
+            {"keep": rios[0].pk, "items": [rios[0].pk, rios[1].pk]},
+        )
+
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert user.stash.count() == 3  # noqa: PLR2004
@@ -0,0 +1,178 @@
+import io
+from decimal import Decimal
+
+import pytest
+from django.core.files.base import ContentFile
+from openpyxl import Workbook
+
+from ravelry_enhancer.library import stash_import
+from ravelry_enhancer.library.models import StashImport
+from ravelry_enhancer.library.models import Yarn
+from ravelry_enhancer.library.stash_import import RowError
+from ravelry_enhancer.library.stash_import import clean_row
+from ravelry_enhancer.library.stash_import import import_stash
+from ravelry_enhancer.library.stash_import import iter_rows
+from ravelry_enhancer.library.stash_import import run_stash_import
+
+pytestmark = pytest.mark.django_db
+
+CSV = (
+    "\ufeffBrand,Yarn,Colourway,Weight,Skeins,Yardage,Grams\r\n"
+    "Malabrigo,Rios,Azul Profundo,worsted,3,630 yds,300\r\n"
+    'Cascade,"220, Heathers",9326,worsted,2,440,200\r\n'
+    "Drops,Alpaca,,4 ply,two,,\r\n"
+    ",,,,,,\r\n"
+)
+
+
+@pytest.fixture()
+def published(monkeypatch):
+    events = []
+    monkeypatch.setattr(
+        stash_import,
+        "publish_progress",
+        lambda user_id, **event: events.append((user_id, event)),
+    )
+    return events
+
+
+class TestCleanRow:
+    def test_normalises_units(self):
+        values = clean_row(
+            {"Yarn": "Rios", "Weight": "10ply", "Yards": "210", "Ounces": "3.5"},
+        )
+
+        assert values["weight"] == "Worsted"
+        assert values["meters"] == pytest.approx(192.024)
+        assert values["grams"] == pytest.approx(99.223, rel=1e-4)
+        assert len(values["import_key"]) == 64  # noqa: PLR2004
+
+    def test_explicit_key_and_unknown_columns(self):
+        values = clean_row({"ID": 17, "Name": "Rios", "Shelf": "B2"})
+
+        assert values == {"name": "Rios", "import_key": "17"}
+
+    @pytest.mark.parametrize(
+        ("row", "message"),
+        [
+            ({"Brand": "Drops"}, "a yarn name is required"),
+            ({"Yarn": "Rios", "Skeins": "two"}, "Skeins: 'two' is not a number"),
+            ({"Yarn": "Rios", "Grams": "3 cups"}, "Grams: unknown unit 'cups'"),
+            ({"Yarn": "R" * 256}, "Yarn: longer than 255 characters"),
+            ({"ID": "k" * 256, "Yarn": "Rios"}, "ID: longer than 255 characters"),
+            (
+                {"Yarn": "Rios", "Skeins": "1000000"},
+                "Skeins: 1000000.00 is not a number below 1000000",
+            ),
+            ({"Yarn": "Rios", "Skeins": "NaN"}, "Skeins: NaN is not a number"),
+            ({"Yarn": "Rios", "Metres": float("inf")}, "Metres: inf is not a number"),
+        ],
+    )
+    def test_errors(self, row, message):
+        with pytest.raises(RowError, match=message):
+            clean_row(row)
+
+
+def test_import_csv_matches_yarns_and_upserts(user):
+    rios = Yarn.objects.create(brand="Malabrigo", name="Rios")
+
+    result = import_stash(user, iter_rows(io.BytesIO(CSV.encode()), "stash.csv"))
+
+    assert (result.imported, result.failed) == (2, 2)
+    assert result.errors == [
+        (4, "Skeins: 'two' is not a number"),
+        (5, "a yarn name is required"),
+    ]
+    blue = user.stash.get(colorway="Azul Profundo")
+    assert blue.yarn == rios
+    assert blue.skeins == Decimal("3.00")
+    assert blue.meters == pytest.approx(576.072)
+    assert user.stash.get(name="220, Heathers").yarn is None
+
+    updated = CSV.replace(
+        "Malabrigo,Rios,Azul Profundo,worsted,3",
+        "Malabrigo,Rios,Azul Profundo,worsted,1",
+    )
+    import_stash(user, iter_rows(io.BytesIO(updated.encode()), "stash.csv"))
+
+    assert user.stash.count() == 2  # noqa: PLR2004
+    assert user.stash.get(pk=blue.pk).skeins == Decimal("1.00")
+
+
+def test_reimport_keeps_amounts_left_blank(user):
+    import_stash(user, [{"Yarn": "Rios", "Skeins": "3", "Metres": "630"}])
+
+    import_stash(user, [{"Yarn": "Rios", "Skeins": "2", "Metres": ""}])
+
+    item = user.stash.get()
+    assert item.skeins == Decimal("2.00")
+    assert item.meters == 630  # noqa: PLR2004
+
+
+def test_import_xlsx(user):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["Yarn", "Colour", "Skeins", "Metres"])
+    sheet.append(["Rios", "Teal Feather", 2, 420])
+    sheet.append(["Rios", "Teal Feather", 3, 630])
+    stream = io.BytesIO()
+    workbook.save(stream)
+    stream.seek(0)
+
+    result = import_stash(user, iter_rows(stream, "Stash.XLSX"))
+
+    # Both rows describe the same yarn, so the second replaces the first.
+    assert result.imported == 2  # noqa: PLR2004
+    item = user.stash.get()
+    assert (item.skeins, item.meters) == (Decimal("3.00"), 630)
+
+
+def test_import_reports_progress_per_batch(user):
+    rows = ({"Yarn": f"Yarn {index}"} for index in range(25))
+    seen = []
+
+    import_stash(user, rows, batch_size=10, progress=lambda r: seen.append(r.imported))
+
+    assert seen == [10, 20, 25]
+    assert user.stash.count() == 25  # noqa: PLR2004
+
+
+def test_iter_rows_rejects_other_files():
+    with pytest.raises(ValueError, match="Cannot import .numbers"):
+        list(iter_rows(io.BytesIO(), "stash.numbers"))
+
+
+def test_run_stash_import(user, published):
+    upload = StashImport.objects.create(
+        user=user,
+        file=ContentFile(CSV.encode(), name="stash.csv"),
+    )
+
+    run_stash_import(upload)
+
+    upload.refresh_from_db()
+    assert upload.status == StashImport.Status.FINISHED
+    assert (upload.rows_imported, upload.rows_failed) == (2, 2)
+    assert upload.errors == [
+        [4, "Skeins: 'two' is not a number"],
+        [5, "a yarn name is required"],
+    ]
+    assert upload.finished
+    assert published[-1] == (
+        user.pk,
+        {"stage": "stash import", "state": "finished", "done": 2, "failed": 2},
+    )
+
+
+def test_run_stash_import_failure(user, published):
+    upload = StashImport.objects.create(
+        user=user,
+        file=ContentFile(b"not a workbook", name="stash.xlsx"),
+    )
+
+    with pytest.raises(Exception, match="not a zip file"):
+        run_stash_import(upload)
+
+    upload.refresh_from_db()
+    assert upload.status == StashImport.Status.FAILED
+    assert published[-1][1]["state"] == "failed"
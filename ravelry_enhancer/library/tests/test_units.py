@@ -0,0 +1,79 @@
+from decimal import Decimal
+
+import pytest
+
+from ravelry_enhancer.library.units import UnitError
+from ravelry_enhancer.library.units import normalize_yarn_weight
+from ravelry_enhancer.library.units import parse_length
+from ravelry_enhancer.library.units import parse_mass
+from ravelry_enhancer.library.units import parse_needle_size
+
+
+@pytest.mark.parametrize(
+    ("value", "default_unit", "meters"),
+    [
+        ("200", "m", 200),
+        ("200 m", "yd", 200),
+        ("220 yds", "m", 201.168),
+        ("1,093yd.", "m", 999.4392),
+        (100, "yd", 91.44),
+        (".5 metres", "m", 0.5),
+    ],
+)
+def test_parse_length(value, default_unit, meters):
+    assert parse_length(value, default_unit) == pytest.approx(meters)
+
+
+@pytest.mark.parametrize(
+    ("value", "grams"),
+    [("50", 50), ("3.5oz", 99.223), ("1 kg", 1000), ("1 lb", 453.592)],
+)
+def test_parse_mass(value, grams):
+    assert parse_mass(value) == pytest.approx(grams, rel=1e-4)
+
+
+@pytest.mark.parametrize("value", ["lots", "200 furlongs", "2..5 g"])
+def test_parse_mass_rejects(value):
+    with pytest.raises(UnitError):
+        parse_mass(value)
+
+
+@pytest.mark.parametrize(
+    ("value", "weight"),
+    [
+        ("worsted", "Worsted"),
+        ("DK", "DK"),
+        ("8ply", "DK"),
+        ("4-ply", "Fingering"),
+        ("Super  Chunky", "Super Bulky"),
+    ],
+)
+def test_normalize_yarn_weight(value, weight):
+    assert normalize_yarn_weight(value) == weight
+
+
+def test_normalize_yarn_weight_rejects_unknown():
+    with pytest.raises(UnitError, match="unknown yarn weight 'heavy'"):
+        normalize_yarn_weight("heavy")
+
+
+@pytest.mark.parametrize(
+    ("value", "mm"),
+    [
+        ("4", "4.00"),
+        ("3.75mm", "3.75"),
+        ("US 7", "4.50"),
+        ("us10.5", "6.50"),
+        ("UK 8", "4.00"),
+        ("H-8", "5.00"),
+        ("g", "4.00"),
+    ],
+)
+def test_parse_needle_size(value, mm):
+    assert parse_needle_size(value) == Decimal(mm)
+
+
+@pytest.mark.parametrize("value", ["US 12", "Z", "big", "0", "100", "25000 mm"])
+def test_parse_needle_size_rejects(value):
+    with pytest.raises(UnitError):
+        parse_needle_size(value)
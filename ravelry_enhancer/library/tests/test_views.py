@@ -0,0 +1,176 @@
+import io
+from http import HTTPStatus
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.test import Client
+from django.urls import reverse
+from fakeredis import FakeRedis
+
+from ravelry_enhancer.library import row_counter
+from ravelry_enhancer.library import views
+from ravelry_enhancer.library.models import Project
+from ravelry_enhancer.library.pattern_store import index_pending_documents
+from ravelry_enhancer.library.pattern_store import store_pattern_file
+from ravelry_enhancer.library.tests.test_pattern_store import make_pdf
+from ravelry_enhancer.users.tests.factories import UserFactory
+
+
+@pytest.mark.django_db()
+class TestPatternLibraryView:
+    def test_upload_and_download(self, client, user):
+        pdf = make_pdf("Fair isle hat")
+        client.force_login(user)
+
+        response = client.post(
+            reverse("library:patterns"),
+            {"file": SimpleUploadedFile("hat.pdf", pdf), "name": ""},
+        )
+
+        assert response.status_code == HTTPStatus.FOUND
+        pattern_file = user.pattern_files.get()
+        assert pattern_file.name == "hat.pdf"
+        response = client.get(pattern_file.get_absolute_url())
+        assert response["Content-Type"] == "application/pdf"
+        assert response["Content-Length"] == str(len(pdf))
+        assert b"".join(response.streaming_content) == pdf
+
+    def test_upload_is_spooled_to_disk(self, client, user, monkeypatch):
+        uploads = []
+        monkeypatch.setattr(
+            views,
+            "store_pattern_file",
+            lambda user, upload, name: uploads.append(upload),
+        )
+        client.force_login(user)
+
+        client.post(
+            reverse("library:patterns"),
+            {"file": SimpleUploadedFile("hat.pdf", make_pdf("Hat")), "name": ""},
+        )
+
+        assert isinstance(uploads[0], TemporaryUploadedFile)
+
+    def test_upload_checks_csrf(self, user):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(user)
+
+        response = client.post(
+            reverse("library:patterns"),
+            {"file": SimpleUploadedFile("hat.pdf", make_pdf("Hat")), "name": ""},
+        )
+
+        assert response.status_code == HTTPStatus.FORBIDDEN
+        assert not user.pattern_files.exists()
+
+    def test_rejects_non_pdf(self, client, user):
+        client.force_login(user)
+
+        response = client.post(
+            reverse("library:patterns"),
+            {"file": SimpleUploadedFile("hat.pdf", b"<html>"), "name": ""},
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        assert "file" in response.context["form"].errors
+        assert not user.pattern_files.exists()
+
+    def test_search(self, client, user):
+        store_pattern_file(user, io.BytesIO(make_pdf("Fair isle hat")), "Hat")
+        store_pattern_file(user, io.BytesIO(make_pdf("Lace shawl")), "Shawl")
+        index_pending_documents(workers=1)
+        client.force_login(user)
+
+        response = client.get(reverse("library:patterns"), {"q": "lace"})
+
+        assert [str(f) for f in response.context["pattern_files"]] == ["Shawl"]
+
+    def test_download_other_users_file(self, client, user):
+        other = store_pattern_file(UserFactory(), io.BytesIO(make_pdf("Hat")), "Hat")
+        client.force_login(user)
+
+        response = client.get(other.get_absolute_url())
+
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db()
+def test_stash_import_upload(client, user):
+    client.force_login(user)
+
+    response = client.post(
+        reverse("library:stash-import"),
+        {"file": SimpleUploadedFile("stash.csv", b"Yarn\r\nRios\r\n")},
+    )
+
+    assert response.status_code == HTTPStatus.FOUND
+    assert response["Location"] == user.get_absolute_url()
+    stash_import = user.stash_imports.get()
+    assert stash_import.status == stash_import.Status.PENDING
+    assert not user.stash.exists()
+
+
+@pytest.mark.django_db()
+class TestProjectRowsView:
+    @pytest.fixture(autouse=True)
+    def _fake_redis(self, monkeypatch):
+        client = FakeRedis()
+        monkeypatch.setattr(row_counter, "_client", lambda: client)
+
+    def test_count_rows(self, client, user):
+        project = Project.objects.create(user=user, name="Hitchhiker", row_count=3)
+        client.force_login(user)
+        url = reverse("library:project-rows", kwargs={"pk": project.pk})
+
+        client.post(url, {"by": 1}, HTTP_ACCEPT="application/json")
+        response = client.post(url, {"by": 1}, HTTP_ACCEPT="application/json")
+
+        assert response.json() == {"rows": 5}
+        response = client.get(project.get_absolute_url())
+        assert response.context["rows"] == 5  # noqa: PLR2004
+
+    def test_form_post_redirects(self, client, user):
+        project = Project.objects.create(user=user, name="Hitchhiker")
+        client.force_login(user)
+
+        response = client.post(
+            reverse("library:project-rows", kwargs={"pk": project.pk}),
+            {"by": 1},
+        )
+
+        assert response.status_code == HTTPStatus.FOUND
+        assert response["Location"] == project.get_absolute_url()
+
+    @pytest.mark.parametrize("by", ["101", "-101", "1e9", "two"])
+    def test_bad_counts_are_refused(self, client, user, by):
+        project = Project.objects.create(user=user, name="Hitchhiker")
+        client.force_login(user)
+
+        response = client.post(
+            reverse("library:project-rows", kwargs={"pk": project.pk}),
+            {"by": by},
+        )
+
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert row_counter.current_rows(project) == 0
+
+    def test_other_users_project(self, client, user):
+        project = Project.objects.create(user=UserFactory(), name="Hitchhiker")
+        client.force_login(user)
+
+        response = client.post(
+            reverse("library:project-rows", kwargs={"pk": project.pk}),
+        )
+
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db()
+def test_analytics_page(client, user):
+    client.force_login(user)
+
+    response = client.get(reverse("library:analytics"))
+
+    assert response.status_code == HTTPStatus.OK
+    assert "Nothing recorded yet." in response.content.decode()
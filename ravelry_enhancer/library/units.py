@@ -0,0 +1,207 @@
+"""
+Parse and normalise the units knitters write stash amounts and tools in.
+
+Lengths are normalised to metres and masses to grams. Yarn weights are
+mapped onto Ravelry's weight names, including the ply names used in the UK
+and Australia. Needle and hook sizes are normalised to millimetres from
+metric, US, old UK and crochet letter sizes.
+"""
+
+import re
+from decimal import Decimal
+
+METERS_PER_YARD = 0.9144
+GRAMS_PER_OUNCE = 28.349523125
+
+LENGTH_UNITS = {
+    "m": 1.0,
+    "meter": 1.0,
+    "meters": 1.0,
+    "metre": 1.0,
+    "metres": 1.0,
+    "yd": METERS_PER_YARD,
+    "yds": METERS_PER_YARD,
+    "yard": METERS_PER_YARD,
+    "yards": METERS_PER_YARD,
+    "cm": 0.01,
+    "in": 0.0254,
+    "inch": 0.0254,
+    "inches": 0.0254,
+}
+MASS_UNITS = {
+    "g": 1.0,
+    "gr": 1.0,
+    "gram": 1.0,
+    "grams": 1.0,
+    "kg": 1000.0,
+    "oz": GRAMS_PER_OUNCE,
+    "ounce": GRAMS_PER_OUNCE,
+    "ounces": GRAMS_PER_OUNCE,
+    "lb": 16 * GRAMS_PER_OUNCE,
+    "lbs": 16 * GRAMS_PER_OUNCE,
+}
+
+YARN_WEIGHTS = {
+    "thread": "Thread",
+    "cobweb": "Cobweb",
+    "lace": "Lace",
+    "2 ply": "Lace",
+    "light fingering": "Light Fingering",
+    "3 ply": "Light Fingering",
+    "fingering": "Fingering",
+    "sock": "Fingering",
+    "4 ply": "Fingering",
+    "sport": "Sport",
+    "5 ply": "Sport",
+    "dk": "DK",
+    "double knitting": "DK",
+    "8 ply": "DK",
+    "worsted": "Worsted",
+    "10 ply": "Worsted",
+    "aran": "Aran",
+    "12 ply": "Aran",
+    "bulky": "Bulky",
+    "chunky": "Bulky",
+    "14 ply": "Bulky",
+    "super bulky": "Super Bulky",
+    "super chunky": "Super Bulky",
+    "jumbo": "Jumbo",
+}
+
+# Millimetres for each size system's names.
+US_NEEDLE_SIZES = {
+    "0": "2",
+    "1": "2.25",
+    "1.5": "2.5",
+    "2": "2.75",
+    "2.5": "3",
+    "3": "3.25",
+    "4": "3.5",
+    "5": "3.75",
+    "6": "4",
+    "7": "4.5",
+    "8": "5",
+    "9": "5.5",
+    "10": "6",
+    "10.5": "6.5",
+    "11": "8",
+    "13": "9",
+    "15": "10",
+    "17": "12",
+    "19": "15",
+    "35": "19",
+    "50": "25",
+}
+UK_NEEDLE_SIZES = {
+    "14": "2",
+    "13": "2.25",
+    "12": "2.75",
+    "11": "3",
+    "10": "3.25",
+    "9": "3.75",
+    "8": "4",
+    "7": "4.5",
+    "6": "5",
+    "5": "5.5",
+    "4": "6",
+    "3": "6.5",
+    "2": "7",
+    "1": "7.5",
+    "0": "8",
+    "00": "9",
+    "000": "10",
+}
+HOOK_LETTERS = {
+    "b": "2.25",
+    "c": "2.75",
+    "d": "3.25",
+    "e": "3.5",
+    "f": "3.75",
+    "g": "4",
+    "h": "5",
+    "i": "5.5",
+    "j": "6",
+    "k": "6.5",
+    "l": "8",
+    "m": "9",
+    "n": "10",
+    "p": "15",
+}
+
+# Needle sizes are stored with max_digits=4, decimal_places=2.
+MAX_NEEDLE_MM = Decimal(100)
+
+_QUANTITY = re.compile(r"\s*(\d[\d,]*(?:\.\d+)?|\.\d+)\s*([a-z]*)\.?\s*", re.IGNORECASE)
+_PLY = re.compile(r"(\d+)\s*-?\s*(?:ply|pl)\b")
+_METRIC_SIZE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:mm)?")
+_SYSTEM_SIZE = re.compile(r"(us|uk)\s*#?\s*(\d+(?:\.\d+)?)")
+# A letter, optionally followed by the US number: "H", "H-8", "H/8".
+_HOOK_SIZE = re.compile(r"([a-z])(?:\s*[-/]\s*\d+(?:\.\d+)?)?")
+
+
+class UnitError(ValueError):
+    pass
+
+
+def _parse_quantity(
+    value: str | float,
+    units: dict[str, float],
+    default_unit: str,
+) -> float:
+    if isinstance(value, int | float):
+        return float(value) * units[default_unit]
+    match = _QUANTITY.fullmatch(value)
+    if not match:
+        msg = f"{value!r} is not a quantity"
+        raise UnitError(msg)
+    number, unit = match.groups()
+    unit = unit.lower() or default_unit
+    if unit not in units:
+        msg = f"unknown unit {unit!r}"
+        raise UnitError(msg)
+    return float(number.replace(",", "")) * units[unit]
+
+
+def parse_length(value: str | float, default_unit: str = "m") -> float:
+    """Return a length such as ``"220 yds"`` in metres."""
+    return _parse_quantity(value, LENGTH_UNITS, default_unit)
+
+
+def parse_mass(value: str | float, default_unit: str = "g") -> float:
+    """Return a mass such as ``"3.5oz"`` in grams."""
+    return _parse_quantity(value, MASS_UNITS, default_unit)
+
+
+def normalize_yarn_weight(value: str) -> str:
+    """Return the Ravelry name for a yarn weight, e.g. ``"8ply"`` -> ``"DK"``."""
+    key = " ".join(value.casefold().replace("-", " ").split())
+    key = _PLY.sub(r"\1 ply", key)
+    if key in YARN_WEIGHTS:
+        return YARN_WEIGHTS[key]
+    msg = f"unknown yarn weight {value!r}"
+    raise UnitError(msg)
+
+
+def parse_needle_size(value: str) -> Decimal:
+    """
+    Return a needle or hook size such as ``"US 7"`` or ``"H-8"`` in mm.
+
+    Bare numbers are millimetres.
+    """
+    key = " ".join(value.casefold().split())
+    if match := _METRIC_SIZE.fullmatch(key):
+        mm = match.group(1)
+    elif (match := _SYSTEM_SIZE.fullmatch(key)) and match.group(2) in (
+        sizes := US_NEEDLE_SIZES if match.group(1) == "us" else UK_NEEDLE_SIZES
+    ):
+        mm = sizes[match.group(2)]
+    elif (match := _HOOK_SIZE.fullmatch(key)) and match.group(1) in HOOK_LETTERS:
+        mm = HOOK_LETTERS[match.group(1)]
+    else:
+        msg = f"unknown needle size {value!r}"
+        raise UnitError(msg)
+    size = Decimal(mm).quantize(Decimal("0.01"))
+    if not 0 < size < MAX_NEEDLE_MM:
+        msg = f"needle size {value!r} is not between 0 and {MAX_NEEDLE_MM} mm"
+        raise UnitError(msg)
+    return size
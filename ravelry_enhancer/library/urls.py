@@ -0,0 +1,50 @@
+from django.urls import path
+
+from .views import analytics_view
+from .views import data_export_download_view
+from .views import data_export_view
+from .views import needle_list_view
+from .views import pattern_download_view
+from .views import pattern_library_view
+from .views import project_detail_view
+from .views import project_list_view
+from .views import project_needles_view
+from .views import project_rows_view
+from .views import queue_plan_view
+from .views import queue_view
+from .views import stash_duplicates_view
+from .views import stash_import_view
+
+app_name = "library"
+urlpatterns = [
+    path("patterns/", view=pattern_library_view, name="patterns"),
+    path(
+        "patterns/<int:pk>/download/",
+        view=pattern_download_view,
+        name="pattern-download",
+    ),
+    path("stash/import/", view=stash_import_view, name="stash-import"),
+    path(
+        "stash/duplicates/",
+        view=stash_duplicates_view,
+        name="stash-duplicates",
+    ),
+    path("projects/", view=project_list_view, name="projects"),
+    path("projects/<int:pk>/", view=project_detail_view, name="project-detail"),
+    path("projects/<int:pk>/rows/", view=project_rows_view, name="project-rows"),
+    path(
+        "projects/<int:pk>/needles/",
+        view=project_needles_view,
+        name="project-needles",
+    ),
+    path("needles/", view=needle_list_view, name="needles"),
+    path("queue/", view=queue_view, name="queue"),
+    path("queue/plan/", view=queue_plan_view, name="queue-plan"),
+    path("analytics/", view=analytics_view, name="analytics"),
+    path("export/", view=data_export_view, name="data-export"),
+    path(
+        "export/<int:pk>/download/",
+        view=data_export_download_view,
+        name="data-export-download",
+    ),
+]
@@ -0,0 +1,395 @@
+from pathlib import PurePath
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.messages.views import SuccessMessageMixin
+from django.contrib.postgres.search import SearchQuery
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import transaction
+from django.db.models import Max
+from django.db.models import Q
+from django.http import FileResponse
+from django.http import Http404
+from django.http import HttpResponse
+from django.http import HttpResponseBadRequest
+from django.http import JsonResponse
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.shortcuts import redirect
+from django.shortcuts import render
+from django.urls import reverse
+from django.utils.http import content_disposition_header
+from django.utils.translation import gettext_lazy as _
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.csrf import csrf_protect
+from django.views.decorators.http import require_GET
+from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import require_POST
+from django.views.generic import CreateView
+from django.views.generic import DetailView
+from django.views.generic import FormView
+from django.views.generic import ListView
+from django.views.generic import TemplateView
+
+from ravelry_enhancer.library.analytics import analytics_fragment
+from ravelry_enhancer.library.export import export_filename
+from ravelry_enhancer.library.export import in_progress
+from ravelry_enhancer.library.export import iter_export
+from ravelry_enhancer.library.export import should_stream
+from ravelry_enhancer.library.forms import NeedleForm
+from ravelry_enhancer.library.forms import PatternSearchForm
+from ravelry_enhancer.library.forms import PatternUploadForm
+from ravelry_enhancer.library.forms import ProjectNeedlesForm
+from ravelry_enhancer.library.forms import QueuedPatternForm
+from ravelry_enhancer.library.forms import StashMergeForm
+from ravelry_enhancer.library.models import DataExport
+from ravelry_enhancer.library.models import NeedleRequirement
+from ravelry_enhancer.library.models import PatternFile
+from ravelry_enhancer.library.models import Project
+from ravelry_enhancer.library.models import QueuedPattern
+from ravelry_enhancer.library.models import StashImport
+from ravelry_enhancer.library.needles import check_queue
+from ravelry_enhancer.library.needles import set_project_needles
+from ravelry_enhancer.library.needles import with_busy
+from ravelry_enhancer.library.pattern_store import SEARCH_CONFIG
+from ravelry_enhancer.library.pattern_store import iter_document_bytes
+from ravelry_enhancer.library.pattern_store import store_pattern_file
+from ravelry_enhancer.library.planner import current_plan
+from ravelry_enhancer.library.row_counter import MAX_ROWS_PER_TAP
+from ravelry_enhancer.library.row_counter import current_rows
+from ravelry_enhancer.library.row_counter import increment_rows
+from ravelry_enhancer.library.stash_duplicates import merge_stash_items
+from ravelry_enhancer.library.stash_duplicates import stash_duplicates
+from ravelry_enhancer.monitoring.tracing import inject_context
+from ravelry_enhancer.utils.ratelimit import ratelimit
+
+
+class PatternLibraryView(LoginRequiredMixin, SuccessMessageMixin, FormView):
+    """List and search the signed-in user's pattern PDFs, and upload more."""
+
+    form_class = PatternUploadForm
+    template_name = "library/pattern_library.html"
+    success_message = _("Pattern added to your library")
+
+    def get_context_data(self, **kwargs):
+        search_form = PatternSearchForm(self.request.GET)
+        pattern_files = self.request.user.pattern_files.select_related("document")
+        if search_form.is_valid() and (query := search_form.cleaned_data["q"]):
+            pattern_files = pattern_files.filter(
+                Q(name__icontains=query)
+                | Q(document__search_vector=SearchQuery(query, config=SEARCH_CONFIG)),
+            )
+        return super().get_context_data(
+            search_form=search_form,
+            pattern_files=pattern_files,
+            **kwargs,
+        )
+
+    def form_valid(self, form):
+        upload = form.cleaned_data["file"]
+        store_pattern_file(
+            self.request.user,
+            upload,
+            form.cleaned_data["name"] or upload.name,
+        )
+        return super().form_valid(form)
+
+    def get_success_url(self):
+        return reverse("library:patterns")
+
+
+_pattern_library_view = ratelimit("pattern-library")(
+    csrf_protect(PatternLibraryView.as_view()),
+)
+
+
+@csrf_exempt
+def pattern_library_view(request, *args, **kwargs):
+    # Spool uploads to a temporary file rather than into memory; the PDF is
+    # read from it a chunk at a time. The handlers must be set before the
+    # body is read, so the CSRF check waits until after.
+    request.upload_handlers = [TemporaryFileUploadHandler(request)]
+    return _pattern_library_view(request, *args, **kwargs)
+
+
+@login_required
+@ratelimit("pattern-download")
+@require_GET
+def pattern_download_view(request, pk):
+    pattern_file = get_object_or_404(
+        PatternFile.objects.select_related("document"),
+        pk=pk,
+        user=request.user,
+    )
+    response = StreamingHttpResponse(
+        iter_document_bytes(pattern_file.document),
+        content_type="application/pdf",
+    )
+    response["Content-Length"] = pattern_file.document.size
+    response["Content-Disposition"] = content_disposition_header(
+        as_attachment=True,
+        filename=f"{pattern_file.name.removesuffix('.pdf')}.pdf",
+    )
+    return response
+
+
+class StashImportView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
+    """Accept a stash spreadsheet; the worker imports it and reports progress."""
+
+    model = StashImport
+    fields = ["file"]
+    success_message = _("Your stash spreadsheet will be imported shortly")
+
+    def form_valid(self, form):
+        form.instance.user = self.request.user
+        form.instance.trace_context = inject_context()
+        return super().form_valid(form)
+
+    def get_success_url(self):
+        return self.request.user.get_absolute_url()
+
+
+stash_import_view = ratelimit("stash-import", methods=("POST",))(
+    StashImportView.as_view(),
+)
+
+
+class ProjectListView(LoginRequiredMixin, ListView):
+    def get_queryset(self):
+        return self.request.user.projects.all()
+
+
+project_list_view = ProjectListView.as_view()
+
+
+class ProjectDetailView(LoginRequiredMixin, DetailView):
+    def get_queryset(self):
+        return self.request.user.projects.all()
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(
+            rows=current_rows(self.object),
+            needles_form=ProjectNeedlesForm(
+                user=self.request.user,
+                initial={"needles": self.object.needles.all()},
+            ),
+            **kwargs,
+        )
+
+
+project_detail_view = ProjectDetailView.as_view()
+
+
+@login_required
+@require_POST
+def project_needles_view(request, pk):
+    project = get_object_or_404(Project, pk=pk, user=request.user)
+    form = ProjectNeedlesForm(request.POST, user=request.user)
+    if not form.is_valid():
+        return HttpResponseBadRequest()
+    set_project_needles(project, form.cleaned_data["needles"])
+    messages.success(request, _("Needles updated"))
+    return redirect(project)
+
+
+@login_required
+@require_http_methods(["GET", "POST"])
+def stash_duplicates_view(request):
+    """Stash entries that look like the same yarn, each group with a merge button."""
+    if request.method == "POST":
+        form = StashMergeForm(request.POST, user=request.user)
+        if not form.is_valid():
+            return HttpResponseBadRequest()
+        keep = merge_stash_items(
+            form.cleaned_data["keep"],
+            list(form.cleaned_data["items"]),
+        )
+        messages.success(request, _("Merged into %(item)s") % {"item": keep})
+        return redirect("library:stash-duplicates")
+    return render(
+        request,
+        "library/stash_duplicates.html",
+        {"groups": stash_duplicates(request.user)},
+    )
+
+
+class NeedleListView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
+    """The user's needles and hooks, marked free or in use, and a form to add one."""
+
+    form_class = NeedleForm
+    template_name = "library/needle_list.html"
+    success_message = _("Needle added")
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(
+            needles=with_busy(self.request.user.needles.all()),
+            **kwargs,
+        )
+
+    def form_valid(self, form):
+        form.instance.user = self.request.user
+        return super().form_valid(form)
+
+    def get_success_url(self):
+        return reverse("library:needles")
+
+
+needle_list_view = NeedleListView.as_view()
+
+
+class QueueView(LoginRequiredMixin, SuccessMessageMixin, FormView):
+    """The user's queue, each pattern marked startable with the free needles."""
+
+    form_class = QueuedPatternForm
+    template_name = "library/queue.html"
+    success_message = _("Pattern queued")
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(
+            statuses=check_queue(self.request.user),
+            **kwargs,
+        )
+
+    def form_valid(self, form):
+        last = self.request.user.queue.aggregate(last=Max("position"))["last"]
+        pattern = QueuedPattern.objects.create(
+            user=self.request.user,
+            name=form.cleaned_data["name"],
+            yarn_weight=form.cleaned_data["yarn_weight"],
+            yarn_meters=form.cleaned_data["yarn_amount"],
+            position=0 if last is None else last + 1,
+        )
+        for requirement in form.cleaned_data["needles"]:
+            requirement.pattern = pattern
+        NeedleRequirement.objects.bulk_create(form.cleaned_data["needles"])
+        return super().form_valid(form)
+
+    def get_success_url(self):
+        return reverse("library:queue")
+
+
+queue_view = QueueView.as_view()
+
+
+@login_required
+@require_GET
+def queue_plan_view(request):
+    """Show the user's plan for their queue, asking the worker for a new one."""
+    return render(
+        request,
+        "library/queue_plan.html",
+        {"plan": current_plan(request.user)},
+    )
+
+
+@login_required
+@ratelimit("project-rows")
+@require_POST
+@transaction.non_atomic_requests
+def project_rows_view(request, pk):
+    """
+    Count rows on a project.
+
+    Each tap is a Redis script call plus a primary-key read, with no
+    transaction, so rapid tapping never queues behind row locks. Without
+    JavaScript the form posts here and is sent back to the project page.
+    """
+    row_count = (
+        Project.objects.filter(pk=pk, user=request.user)
+        .values_list("row_count", flat=True)
+        .first()
+    )
+    if row_count is None:
+        raise Http404
+    try:
+        by = int(request.POST.get("by", 1))
+    except ValueError:
+        return HttpResponseBadRequest()
+    if abs(by) > MAX_ROWS_PER_TAP:
+        return HttpResponseBadRequest()
+    pending = increment_rows(pk, by)
+    if "application/json" in request.headers.get("Accept", ""):
+        return JsonResponse({"rows": max(row_count + pending, 0)})
+    return redirect("library:project-detail", pk=pk)
+
+
+class AnalyticsView(LoginRequiredMixin, TemplateView):
+    """Knitting and stash totals, read from rollups the worker refreshes."""
+
+    template_name = "library/analytics.html"
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(
+            tables=analytics_fragment(self.request.user),
+            **kwargs,
+        )
+
+
+analytics_view = AnalyticsView.as_view()
+
+
+@login_required
+@ratelimit("data-export", methods=("POST",))
+@require_http_methods(["GET", "POST"])
+def data_export_view(request):
+    """
+    Export everything held about the user: streamed straight away, or built
+    by the worker if their files are large.
+    """
+    if request.method == "POST":
+        if should_stream(request.user):
+            response = StreamingHttpResponse(
+                iter_export(request.user),
+                content_type="application/zip",
+            )
+            response["Content-Disposition"] = content_disposition_header(
+                as_attachment=True,
+                filename=export_filename(request.user),
+            )
+            return response
+        if not in_progress(request.user).exists():
+            DataExport.objects.create(
+                user=request.user,
+                trace_context=inject_context(),
+            )
+        messages.success(
+            request,
+            _("Your export is being prepared; it will be listed here when ready."),
+        )
+        return redirect("library:data-export")
+    return render(
+        request,
+        "library/data_export.html",
+        {"data_exports": request.user.data_exports.all()[:10]},
+    )
+
+
+@login_required
+@require_GET
+def data_export_download_view(request, pk):
+    data_export = get_object_or_404(
+        DataExport,
+        pk=pk,
+        user=request.user,
+        status=DataExport.Status.FINISHED,
+    )
+    filename = PurePath(data_export.file.name).name
+    if settings.DATA_EXPORT_ACCEL_REDIRECT:
+        # The proxy sends the file, so no web worker is held for the download.
+        response = HttpResponse(content_type="application/zip")
+        response["X-Accel-Redirect"] = (
+            f"{settings.DATA_EXPORT_ACCEL_REDIRECT}{data_export.file.name}"
+        )
+        response["Content-Disposition"] = content_disposition_header(
+            as_attachment=True,
+            filename=filename,
+        )
+        return response
+    return FileResponse(
+        data_export.file.open("rb"),
+        as_attachment=True,
+        filename=filename,
+        content_type="application/zip",
+    )
@@ -0,0 +1,71 @@
+"""
+An email backend that queues messages in the database instead of sending them.
+
+Sending returns as soon as the rows are written, so a slow mail API adds
+nothing to the request that sent the mail. The rows are written in the
+request's transaction, so a request that fails sends no mail.
+`ravelry_enhancer.mail.delivery` sends queued messages in batches through
+``settings.MAIL_QUEUE_BACKEND``.
+"""
+
+import base64
+from typing import Any
+
+from django.core.mail import EmailMessage
+from django.core.mail import EmailMultiAlternatives
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .models import QueuedEmail
+
+ADDRESS_FIELDS = ["to", "cc", "bcc", "reply_to"]
+
+
+def serialize(message: EmailMessage) -> dict[str, Any]:
+    """Return ``message`` as JSON-safe fields, for `deserialize`."""
+    attachments = []
+    for attachment in message.attachments:
+        if not isinstance(attachment, tuple):
+            msg = "Only (filename, content, mimetype) attachments can be queued"
+            raise TypeError(msg)
+        filename, content, mimetype = attachment
+        if isinstance(content, str):
+            content = content.encode()
+        attachments.append([filename, base64.b64encode(content).decode(), mimetype])
+    return {
+        "subject": str(message.subject),
+        "body": str(message.body),
+        "from_email": message.from_email,
+        **{field: list(getattr(message, field)) for field in ADDRESS_FIELDS},
+        "headers": message.extra_headers,
+        "content_subtype": message.content_subtype,
+        "alternatives": [
+            list(alternative) for alternative in getattr(message, "alternatives", [])
+        ],
+        "attachments": attachments,
+    }
+
+
+def deserialize(fields: dict[str, Any]) -> EmailMultiAlternatives:
+    message = EmailMultiAlternatives(
+        subject=fields["subject"],
+        body=fields["body"],
+        from_email=fields["from_email"],
+        headers=fields["headers"],
+        alternatives=[tuple(alternative) for alternative in fields["alternatives"]],
+        **{field: fields[field] for field in ADDRESS_FIELDS},
+    )
+    message.content_subtype = fields["content_subtype"]
+    for filename, content, mimetype in fields["attachments"]:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages) -> int:
+        queued = [
+            QueuedEmail(message=serialize(message))
+            for message in email_messages
+            if message.recipients()
+        ]
+        QueuedEmail.objects.bulk_create(queued)
+        return len(queued)
@@ -0,0 +1,124 @@
+"""
+Deliver mail queued by `QueuedEmailBackend`.
+
+Each batch is claimed with ``SELECT ... FOR UPDATE SKIP LOCKED``, so several
+workers can deliver at once without sending anything twice. Every message in
+a batch goes over one connection to ``settings.MAIL_QUEUE_BACKEND``: one SMTP
+session, or one HTTP session for an API backend. A message that fails is
+retried with exponential backoff. After ``MAIL_QUEUE_MAX_ATTEMPTS`` tries it
+is marked failed.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Self
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from ravelry_enhancer.monitoring.metrics import EMAIL_DELIVERIES
+from ravelry_enhancer.monitoring.metrics import EMAIL_DELIVERY_LATENCY
+
+from .backends import deserialize
+from .models import QueuedEmail
+
+logger = logging.getLogger(__name__)
+
+RETRY_DELAY = timedelta(seconds=30)
+MAX_RETRY_DELAY = timedelta(hours=1)
+
+
+@dataclass
+class DeliveryResult:
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+
+    def __iadd__(self, other: "DeliveryResult") -> Self:
+        self.sent += other.sent
+        self.retried += other.retried
+        self.failed += other.failed
+        return self
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+def _failed(email: QueuedEmail, error: Exception, result: DeliveryResult):
+    email.attempts += 1
+    email.last_error = f"{type(error).__name__}: {error}"
+    if email.attempts >= settings.MAIL_QUEUE_MAX_ATTEMPTS:
+        email.status = QueuedEmail.Status.FAILED
+        result.failed += 1
+        EMAIL_DELIVERIES.labels("failed").inc()
+        logger.error("Gave up on email %s: %s", email.pk, email.last_error)
+    else:
+        email.next_attempt = timezone.now() + retry_delay(email.attempts)
+        result.retried += 1
+        EMAIL_DELIVERIES.labels("retried").inc()
+
+
+def _sent(email: QueuedEmail, result: DeliveryResult):
+    email.attempts += 1
+    email.status = QueuedEmail.Status.SENT
+    email.sent = timezone.now()
+    result.sent += 1
+    EMAIL_DELIVERIES.labels("sent").inc()
+    EMAIL_DELIVERY_LATENCY.observe((email.sent - email.created).total_seconds())
+
+
+def _send(batch: list[QueuedEmail], result: DeliveryResult):
+    connection = get_connection(settings.MAIL_QUEUE_BACKEND, fail_silently=False)
+    try:
+        connection.open()
+    except Exception as error:  # noqa: BLE001
+        logger.warning("Could not connect to deliver mail: %s", error)
+        for email in batch:
+            _failed(email, error, result)
+        return
+    try:
+        for email in batch:
+            try:
+                connection.send_messages([deserialize(email.message)])
+            except Exception as error:  # noqa: BLE001
+                _failed(email, error, result)
+            else:
+                _sent(email, result)
+    finally:
+        connection.close()
+
+
+def deliver_batch() -> DeliveryResult:
+    """Send up to ``MAIL_QUEUE_BATCH_SIZE`` due messages over one connection."""
+    result = DeliveryResult()
+    with transaction.atomic():
+        batch = list(
+            QueuedEmail.objects.filter(
+                status=QueuedEmail.Status.PENDING,
+                next_attempt__lte=timezone.now(),
+            )
+            .order_by("next_attempt")
+            .select_for_update(skip_locked=True)[: settings.MAIL_QUEUE_BATCH_SIZE],
+        )
+        if batch:
+            _send(batch, result)
+            QueuedEmail.objects.bulk_update(
+                batch,
+                ["status", "attempts", "last_error", "next_attempt", "sent"],
+            )
+    return result
+
+
+def deliver_queued() -> DeliveryResult:
+    """Send every due message, a batch at a time."""
+    total = DeliveryResult()
+    while True:
+        result = deliver_batch()
+        total += result
+        if not result.sent and not result.failed:
+            # Nothing was due, or everything was put back for later.
+            return total
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ravelry_enhancer.mail.delivery import deliver_queued
+from ravelry_enhancer.monitoring.tracing import job_span
+
+
+class Command(BaseCommand):
+    help = "Deliver email queued by QueuedEmailBackend."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--poll",
+            type=float,
+            metavar="SECONDS",
+            help="Keep running, checking for new mail this often.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            with job_span("send_queued_mail"):
+                result = deliver_queued()
+            if result.sent or result.retried or result.failed:
+                self.stdout.write(
+                    f"Sent {result.sent} emails, {result.retried} to retry, "
+                    f"{result.failed} failed.",
+                )
+            if not options["poll"]:
+                return
+            time.sleep(options["poll"])
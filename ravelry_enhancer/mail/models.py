@@ -0,0 +1,38 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class QueuedEmail(models.Model):
+    """A message accepted by `QueuedEmailBackend`, waiting for the worker."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        SENT = "sent", _("Sent")
+        FAILED = "failed", _("Failed")
+
+    # The message's fields; see `ravelry_enhancer.mail.backends.serialize`.
+    message = models.JSONField()
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    next_attempt = models.DateTimeField(default=timezone.now)
+    sent = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["next_attempt"],
+                condition=Q(status="pending"),
+                name="mail_queuedemail_due",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return self.message.get("subject", "")
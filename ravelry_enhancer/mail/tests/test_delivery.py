@@ -0,0 +1,118 @@
+from datetime import timedelta
+from smtplib import SMTPRecipientsRefused
+
+import pytest
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives
+from django.core.mail import send_mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import transaction
+from django.utils import timezone
+from prometheus_client import REGISTRY
+
+from ravelry_enhancer.mail.delivery import deliver_queued
+from ravelry_enhancer.mail.delivery import retry_delay
+from ravelry_enhancer.mail.models import QueuedEmail
+
+pytestmark = pytest.mark.django_db
+
+BOUNCE = "bounce@example.com"
+
+
+class SinkBackend(EmailBackend):
+    """The locmem outbox, counting connections and refusing `BOUNCE`."""
+
+    opened = 0
+
+    def open(self):
+        SinkBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        if any(BOUNCE in message.recipients() for message in messages):
+            raise SMTPRecipientsRefused({BOUNCE: (550, b"No such user")})
+        return super().send_messages(messages)
+
+
+@pytest.fixture(autouse=True)
+def _queued(settings):
+    settings.EMAIL_BACKEND = "ravelry_enhancer.mail.backends.QueuedEmailBackend"
+    settings.MAIL_QUEUE_BACKEND = f"{__name__}.SinkBackend"
+    SinkBackend.opened = 0
+
+
+def _sample(outcome: str) -> float:
+    return (
+        REGISTRY.get_sample_value("django_email_deliveries_total", {"outcome": outcome})
+        or 0
+    )
+
+
+def test_sending_queues_without_delivering():
+    send_mail("Confirm", "Click", "site@example.com", ["knitter@example.com"])
+
+    assert mail.outbox == []
+    assert QueuedEmail.objects.get().status == QueuedEmail.Status.PENDING
+
+
+def test_mail_from_a_failed_transaction_is_not_queued():
+    @transaction.atomic
+    def signup():
+        send_mail("Confirm", "Click", "site@example.com", ["knitter@example.com"])
+        raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        signup()
+
+    assert not QueuedEmail.objects.exists()
+
+
+def test_delivers_batch_over_one_connection():
+    message = EmailMultiAlternatives(
+        "Confirm",
+        "Click",
+        "site@example.com",
+        ["knitter@example.com"],
+        headers={"X-Tag": "signup"},
+    )
+    message.attach_alternative("<p>Click</p>", "text/html")
+    message.attach("gauge.txt", "20 sts", "text/plain")
+    message.send()
+    send_mail("Reset", "Here", "site@example.com", ["other@example.com"])
+    sent_before = _sample("sent")
+
+    result = deliver_queued()
+
+    assert result.sent == 2  # noqa: PLR2004
+    assert SinkBackend.opened == 1
+    confirm, reset = sorted(mail.outbox, key=lambda message: message.subject)
+    assert confirm.alternatives == [("<p>Click</p>", "text/html")]
+    assert confirm.attachments == [("gauge.txt", "20 sts", "text/plain")]
+    assert confirm.extra_headers == {"X-Tag": "signup"}
+    assert reset.to == ["other@example.com"]
+    assert not QueuedEmail.objects.filter(sent=None).exists()
+    assert _sample("sent") == sent_before + 2
+
+
+def test_failures_are_retried_then_given_up(settings):
+    settings.MAIL_QUEUE_MAX_ATTEMPTS = 2
+    send_mail("Confirm", "Click", "site@example.com", [BOUNCE])
+
+    result = deliver_queued()
+
+    email = QueuedEmail.objects.get()
+    assert result.retried == 1
+    assert email.status == QueuedEmail.Status.PENDING
+    assert email.next_attempt > timezone.now()
+    assert "SMTPRecipientsRefused" in email.last_error
+    assert deliver_queued().retried == 0  # Not due yet.
+
+    QueuedEmail.objects.update(next_attempt=timezone.now())
+    assert deliver_queued().failed == 1
+    assert QueuedEmail.objects.get().status == QueuedEmail.Status.FAILED
+
+
+def test_retry_delay_backs_off_to_a_cap():
+    assert retry_delay(1) == timedelta(seconds=30)
+    assert retry_delay(3) == timedelta(minutes=2)
+    assert retry_delay(20) == timedelta(hours=1)
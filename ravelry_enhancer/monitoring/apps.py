@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+from django.utils.translation import gettext_lazy as _
+
+
+class MonitoringConfig(AppConfig):
+    name = "ravelry_enhancer.monitoring"
+    verbose_name = _("Monitoring")
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .slow_queries import install
+        from .tracing import configure
+
+        configure()
+        connection_created.connect(install, dispatch_uid="slow-query-log")
@@ -0,0 +1,54 @@
+import time
+
+from django.core.cache.backends.locmem import LocMemCache as DjangoLocMemCache
+from django_redis.cache import RedisCache as DjangoRedisCache
+
+from .metrics import CACHE_OPERATION_DURATION
+from .tracing import child_span
+
+TIMED_OPERATIONS = (
+    "add",
+    "get",
+    "set",
+    "touch",
+    "delete",
+    "get_many",
+    "set_many",
+    "delete_many",
+    "has_key",
+    "incr",
+    "decr",
+    "clear",
+)
+
+
+def _timed(backend_class, operation):
+    wrapped = getattr(backend_class, operation)
+
+    def method(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            with child_span(
+                f"cache.{operation}",
+                **{"cache.backend": backend_class.__name__},
+            ):
+                return wrapped(self, *args, **kwargs)
+        finally:
+            CACHE_OPERATION_DURATION.labels(backend_class.__name__, operation).observe(
+                time.perf_counter() - start,
+            )
+
+    method.__name__ = operation
+    return method
+
+
+def instrumented(backend_class):
+    """Subclass a cache backend so each public call is timed and traced."""
+    namespace = {
+        operation: _timed(backend_class, operation) for operation in TIMED_OPERATIONS
+    }
+    return type(backend_class.__name__, (backend_class,), namespace)
+
+
+RedisCache = instrumented(DjangoRedisCache)
+LocMemCache = instrumented(DjangoLocMemCache)
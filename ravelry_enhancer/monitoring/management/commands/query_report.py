@@ -0,0 +1,99 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Avg
+from django.db.models import Count
+from django.db.models import Max
+from django.db.models import Sum
+from django.utils import timezone
+
+from ravelry_enhancer.monitoring.models import SlowQuery
+from ravelry_enhancer.monitoring.slow_queries import missing_indexes
+
+STATEMENT_WIDTH = 300
+CALL_SITES_SHOWN = 3
+
+
+class Command(BaseCommand):
+    help = (
+        "Rank logged slow queries by total time and suggest indexes for the "
+        "sequential scans in their plans."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=7,
+            help="Report on queries logged in this many days (default: 7).",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=20,
+            help="Show this many fingerprints (default: 20).",
+        )
+
+    def handle(self, *args, **options):
+        logged = SlowQuery.objects.filter(
+            created__gte=timezone.now() - timedelta(days=options["days"]),
+        )
+        ranked = (
+            logged.values("fingerprint")
+            .annotate(
+                total=Sum("duration"),
+                calls=Count("id"),
+                mean=Avg("duration"),
+                slowest=Max("duration"),
+            )
+            .order_by("-total")[: options["limit"]]
+        )
+        suggestions: dict[tuple[str, tuple[str, ...]], float] = {}
+        for row in ranked:
+            queries = logged.filter(fingerprint=row["fingerprint"]).order_by("-created")
+            latest = queries.first()
+            self.stdout.write(
+                f"{row['total']:10.0f} ms total  {row['calls']:6d} calls  "
+                f"{row['mean']:8.1f} ms mean  {row['slowest']:8.1f} ms max  "
+                f"{row['fingerprint']}",
+            )
+            self.stdout.write(f"    {latest.statement[:STATEMENT_WIDTH]}")
+            call_sites = Counter(queries.values_list("call_site", flat=True))
+            for call_site, count in call_sites.most_common(CALL_SITES_SHOWN):
+                self.stdout.write(f"    {count:6d} from {call_site or '?'}")
+            planned = queries.exclude(plan=None).first()
+            for index in missing_indexes(planned.plan) if planned else []:
+                suggestions[index] = suggestions.get(index, 0) + row["total"]
+
+        self._suggest(suggestions)
+
+    def _suggest(self, suggestions: dict[tuple[str, tuple[str, ...]], float]):
+        with connection.cursor() as cursor:
+            suggested = [
+                (table, columns)
+                for (table, columns), _ in sorted(
+                    suggestions.items(),
+                    key=lambda item: item[1],
+                    reverse=True,
+                )
+                if not self._indexed(cursor, table, columns[0])
+            ]
+        if not suggested:
+            return
+        self.stdout.write("")
+        self.stdout.write(
+            self.style.WARNING("Sequential scans that an index may avoid:"),
+        )
+        for table, columns in suggested:
+            self.stdout.write(f"    CREATE INDEX ON {table} ({', '.join(columns)});")
+
+    def _indexed(self, cursor, table: str, column: str) -> bool:
+        constraints = connection.introspection.get_constraints(cursor, table)
+        return any(
+            (constraint["index"] or constraint["unique"])
+            and constraint["columns"]
+            and constraint["columns"][0] == column
+            for constraint in constraints.values()
+        )
@@ -0,0 +1,79 @@
+"""
+Prometheus metrics shared by the web and worker processes.
+
+When ``PROMETHEUS_MULTIPROC_DIR`` is set (as `config.gunicorn` expects) every
+process writes its samples to mmap files in that directory and `registry()`
+aggregates them, so a scrape sees the whole gunicorn pool rather than whichever
+worker answered it.
+"""
+
+import os
+
+from prometheus_client import REGISTRY
+from prometheus_client import CollectorRegistry
+from prometheus_client import Counter
+from prometheus_client import Histogram
+from prometheus_client import multiprocess
+
+# Seconds; covers fast cache hits through slow multi-second syncs.
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+REQUEST_DURATION = Histogram(
+    "django_http_request_duration_seconds",
+    "Time spent handling a request, by URL name.",
+    ["view", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERY_DURATION = Histogram(
+    "django_db_query_duration_seconds",
+    "Time spent executing database queries.",
+    ["alias"],
+    buckets=LATENCY_BUCKETS,
+)
+CACHE_OPERATION_DURATION = Histogram(
+    "django_cache_operation_duration_seconds",
+    "Time spent in cache backend calls.",
+    ["backend", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+RATE_LIMITED_REQUESTS = Counter(
+    "django_http_rate_limited_requests",
+    "Requests refused for exceeding a rate limit, by scope.",
+    ["scope"],
+)
+
+# Seconds from queueing an email to handing it to the mail service.
+EMAIL_LATENCY_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 900.0, 3600.0)
+EMAIL_DELIVERY_LATENCY = Histogram(
+    "django_email_delivery_latency_seconds",
+    "Time from queueing an email to its delivery.",
+    buckets=EMAIL_LATENCY_BUCKETS,
+)
+EMAIL_DELIVERIES = Counter(
+    "django_email_deliveries",
+    "Attempts to deliver queued email, by outcome.",
+    ["outcome"],
+)
+
+
+def registry() -> CollectorRegistry:
+    """Return the registry to expose, merging worker files in multiprocess mode."""
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    merged = CollectorRegistry()
+    multiprocess.MultiProcessCollector(merged)
+    return merged
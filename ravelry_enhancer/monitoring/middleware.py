@@ -0,0 +1,102 @@
+import threading
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+from django.http import HttpResponse
+from opentelemetry import propagate
+from opentelemetry.trace import SpanKind
+from opentelemetry.trace import StatusCode
+
+from . import tracing
+from .metrics import DB_QUERY_DURATION
+from .metrics import REQUEST_DURATION
+from .profiling import Sampler
+
+
+def _time_query(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        DB_QUERY_DURATION.labels(context["connection"].alias).observe(
+            time.perf_counter() - start,
+        )
+
+
+class MetricsMiddleware:
+    """Record request latency per URL name and the time spent in queries."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_time_query))
+            response = self.get_response(request)
+        resolver_match = getattr(request, "resolver_match", None)
+        REQUEST_DURATION.labels(
+            resolver_match.view_name if resolver_match else "<unresolved>",
+            request.method,
+            response.status_code,
+        ).observe(time.perf_counter() - start)
+        return response
+
+
+class TracingMiddleware:
+    """Trace each request, continuing any trace named in its headers."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with (
+            tracing.tracer.start_as_current_span(
+                request.method,
+                context=propagate.extract(request.headers),
+                kind=SpanKind.SERVER,
+                attributes={
+                    "http.request.method": request.method,
+                    "url.path": request.path,
+                },
+            ) as span,
+            tracing.traced_queries(span),
+        ):
+            response = self.get_response(request)
+            resolver_match = getattr(request, "resolver_match", None)
+            if resolver_match and span.is_recording():
+                route = resolver_match.route
+                span.update_name(f"{request.method} {route}")
+                span.set_attribute("http.route", route)
+            span.set_attribute("http.response.status_code", response.status_code)
+            if response.status_code >= 500:  # noqa: PLR2004
+                span.set_status(StatusCode.ERROR)
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Answer a staff request sent with ``X-Profile`` with its sampled stacks.
+
+    The page is still rendered, but the response is replaced by the
+    collapsed stacks of the thread that handled it, sampled every
+    millisecond.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if "X-Profile" not in request.headers or not request.user.is_staff:
+            return self.get_response(request)
+        sampler = Sampler(interval=0.001, thread_ids={threading.get_ident()})
+        sampler.start()
+        try:
+            self.get_response(request)
+        finally:
+            sampler.stop()
+        response = HttpResponse(sampler.collapsed(), content_type="text/plain")
+        response["Content-Disposition"] = 'attachment; filename="request.collapsed"'
+        return response
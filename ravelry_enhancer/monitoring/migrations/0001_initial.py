@@ -0,0 +1,29 @@
+# Generated by Django 4.2.11 on 2026-10-19 16:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(db_index=True, max_length=16)),
+                ('statement', models.TextField()),
+                ('call_site', models.CharField(blank=True, max_length=255)),
+                ('duration', models.FloatField(verbose_name='duration in ms')),
+                ('plan', models.JSONField(blank=True, null=True)),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name_plural': 'slow queries',
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class SlowQuery(models.Model):
+    """One query over ``settings.SLOW_QUERY_MS``; see `.slow_queries`."""
+
+    fingerprint = models.CharField(max_length=16, db_index=True)
+    # The SQL with literals and placeholder lists normalised away.
+    statement = models.TextField()
+    call_site = models.CharField(max_length=255, blank=True)
+    duration = models.FloatField(_("duration in ms"))
+    # EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) output, for some SELECTs.
+    plan = models.JSONField(null=True, blank=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name_plural = "slow queries"
+
+    def __str__(self) -> str:
+        return f"{self.fingerprint} ({self.duration:.0f} ms)"
@@ -0,0 +1,186 @@
+"""
+Profile a live worker: sampled CPU stacks and tracemalloc memory diffs.
+
+`Sampler` reads every thread's stack with ``sys._current_frames()`` at a fixed
+interval from a background thread. Nothing is hooked into the code being
+profiled, so the cost stays low enough to run in production. Samples are
+written in the collapsed-stack format (``outer;inner count``) that
+flamegraph.pl, speedscope and inferno read.
+
+Each gunicorn worker profiles only itself. Results are files in
+``settings.PROFILE_DIR``, named after the worker's pid, so a later request
+can list and download them whichever worker answers it.
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Callable
+from datetime import UTC
+from datetime import datetime
+from pathlib import Path
+from types import FrameType
+
+from django.conf import settings
+
+DEFAULT_INTERVAL = 0.01
+MAX_PROFILE_SECONDS = 120
+# Frames tracemalloc keeps per allocation; more shows more of the caller.
+TRACEMALLOC_FRAMES = 10
+MEMORY_REPORT_LINES = 50
+
+_lock = threading.Lock()
+_running: "Sampler | None" = None
+_last_snapshot: tracemalloc.Snapshot | None = None
+
+
+def _label(frame: FrameType) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    return f"{frame.f_code.co_name} ({module}:{frame.f_lineno})"
+
+
+def collapse(frame: FrameType | None) -> str:
+    """Return a stack as ``outermost;...;innermost``."""
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame).replace(";", ":"))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class Sampler:
+    """
+    Count the stacks seen in ``thread_ids`` (default: every other thread).
+
+    Runs until `stop` is called or ``duration`` seconds pass, then calls
+    ``on_finish`` with itself.
+    """
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_INTERVAL,
+        duration: float | None = None,
+        thread_ids: set[int] | None = None,
+        on_finish: Callable[["Sampler"], None] | None = None,
+    ):
+        self.interval = interval
+        self.duration = duration
+        self.thread_ids = thread_ids
+        self.on_finish = on_finish
+        self.stacks: Counter[str] = Counter()
+        self.started = datetime.now(UTC)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampler", daemon=True)
+
+    def start(self) -> "Sampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> "Sampler":
+        self._stopped.set()
+        self._thread.join()
+        return self
+
+    def sample(self):
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():  # noqa: SLF001
+            if thread_id == own or (
+                self.thread_ids is not None and thread_id not in self.thread_ids
+            ):
+                continue
+            self.stacks[collapse(frame)] += 1
+
+    def _run(self):
+        deadline = time.monotonic() + self.duration if self.duration else None
+        while not self._stopped.wait(self.interval):
+            self.sample()
+            if deadline and time.monotonic() >= deadline:
+                break
+        if self.on_finish:
+            self.on_finish(self)
+
+    def collapsed(self) -> str:
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+
+def profile_dir() -> Path:
+    path = Path(settings.PROFILE_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _save(sampler: Sampler):
+    global _running  # noqa: PLW0603
+    name = f"{os.getpid()}-{sampler.started:%Y%m%dT%H%M%S%f}.collapsed"
+    (profile_dir() / name).write_text(sampler.collapsed())
+    with _lock:
+        _running = None
+
+
+def start_profile(seconds: float) -> Sampler | None:
+    """
+    Sample this worker in the background for ``seconds``, then save the result.
+
+    Returns None if this worker is already being profiled.
+    """
+    global _running  # noqa: PLW0603
+    with _lock:
+        if _running is not None:
+            return None
+        _running = Sampler(
+            duration=min(seconds, MAX_PROFILE_SECONDS),
+            on_finish=_save,
+        )
+        return _running.start()
+
+
+def saved_profiles() -> list[Path]:
+    """Saved results from every worker, newest first."""
+    return sorted(
+        (*profile_dir().glob("*.collapsed"), *profile_dir().glob("*.memory.txt")),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    )
+
+
+def memory_snapshot() -> str:
+    """
+    Report this worker's allocations and what changed since the last call.
+
+    The first call starts tracemalloc, which only sees allocations made from
+    then on.
+    """
+    global _last_snapshot  # noqa: PLW0603
+    pid = os.getpid()
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        _last_snapshot = None
+        return f"Worker {pid}: started tracing allocations; take another snapshot."
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(inclusive=False, filename_pattern=tracemalloc.__file__)],
+    )
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [f"Worker {pid}: {current / 1e6:.1f} MB traced, {peak / 1e6:.1f} MB peak"]
+    if _last_snapshot is None:
+        lines.append("Largest allocations:")
+        stats = snapshot.statistics("lineno")
+    else:
+        lines.append("Growth since the last snapshot:")
+        stats = snapshot.compare_to(_last_snapshot, "lineno")
+    lines.extend(str(stat) for stat in stats[:MEMORY_REPORT_LINES])
+    _last_snapshot = snapshot
+    report = "\n".join(lines) + "\n"
+    name = f"{pid}-{datetime.now(UTC):%Y%m%dT%H%M%S%f}.memory.txt"
+    (profile_dir() / name).write_text(report)
+    return report
+
+
+def stop_memory_tracing():
+    global _last_snapshot  # noqa: PLW0603
+    tracemalloc.stop()
+    _last_snapshot = None
@@ -0,0 +1,226 @@
+"""
+A slow query log, for when ``pg_stat_statements`` is not available.
+
+`log_slow_queries` wraps every database connection. A query slower than
+``settings.SLOW_QUERY_MS`` is recorded as a `SlowQuery` with:
+
+- its fingerprint, which is the SQL with literals and placeholder lists
+  normalised away;
+- the line of project code that ran it;
+- for SELECTs, an ``EXPLAIN (ANALYZE, BUFFERS)`` plan, at most once per
+  fingerprint per ``SLOW_QUERY_EXPLAIN_INTERVAL`` seconds in each process.
+
+Plans and inserts are done by a background thread on its own connection, so
+the request that ran the slow query does not wait for them. If that thread
+falls behind, entries are dropped rather than queued without bound.
+``manage.py query_report`` ranks fingerprints by total time and uses
+`missing_indexes` to point out sequential scans that an index would avoid.
+"""
+
+import hashlib
+import json
+import logging
+import queue
+import re
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from typing import Any
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db import close_old_connections
+from django.db import connection as default_connection
+from django.db import transaction
+
+from .models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 100
+# Tables the index advisor looks at, by name prefix.
+ADVISED_TABLES = ("library_", "users_user", "django_session")
+# Sequential scans that discard fewer rows than this are cheap enough.
+SEQ_SCAN_MIN_ROWS_REMOVED = 1000
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_REPEATED_LIST = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_SPACE = re.compile(r"\s+")
+# Partitions' names add a suffix to their table's: hash partitions such as
+# "library_stashitem_h8_3" and monthly ones such as "library_activity_p2024_01".
+_PARTITION_SUFFIX = re.compile(r"_(?:h\d+_\d+|p\d{4}_\d{2})$")
+# A column compared in a Filter, e.g. "(colorway)::text = 'Teal'::text".
+_FILTER_COLUMN = re.compile(
+    r"\(*([a-z_][a-z0-9_]*)\)*(?:::[a-z ]+(?:\[\])?)?\s*(?:=|<=|>=|<|>|IS\b)",
+)
+
+_queue: queue.Queue[dict[str, Any]] = queue.Queue(maxsize=QUEUE_SIZE)
+_explained: dict[str, float] = {}
+_worker: threading.Thread | None = None
+_worker_lock = threading.Lock()
+# Set while recording, so the log's own queries are never logged.
+_recording = threading.local()
+
+
+def fingerprint(sql: str) -> str:
+    """Return ``sql`` with literals replaced by ``?`` and lists collapsed."""
+    sql = _STRING.sub("?", sql).replace("%s", "?")
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    sql = _REPEATED_LIST.sub("(...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def fingerprint_hash(statement: str) -> str:
+    return hashlib.sha256(statement.encode()).hexdigest()[:16]
+
+
+def call_site() -> str:
+    """The innermost project frame outside this module, as ``module:line func``."""
+    frame = sys._getframe(1)  # noqa: SLF001
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("ravelry_enhancer.") and module != __name__:
+            return f"{module}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return ""
+
+
+def install(sender, connection, **kwargs):
+    """
+    Wrap each new connection with `log_slow_queries`; a `connection_created`
+    receiver.
+    """
+    # First in the list: execute_wrapper() blocks pop the last one on exit.
+    if log_slow_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, log_slow_queries)
+
+
+def log_slow_queries(execute, sql, params, many, context):
+    """A connection ``execute_wrapper`` that records queries over the threshold."""
+    threshold = settings.SLOW_QUERY_MS
+    if threshold is None or getattr(_recording, "active", False):
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = (time.perf_counter() - start) * 1000
+        if duration >= threshold:
+            _slow_query(sql, params, many, duration)
+
+
+def _slow_query(sql, params, many, duration):
+    statement = fingerprint(sql)
+    digest = fingerprint_hash(statement)
+    now = time.monotonic()
+    wants_plan = (
+        not many
+        and sql.lstrip()[:6].upper() == "SELECT"
+        and now - _explained.get(digest, -float("inf"))
+        >= settings.SLOW_QUERY_EXPLAIN_INTERVAL
+    )
+    if wants_plan:
+        _explained[digest] = now
+    _submit(
+        {
+            "fingerprint": digest,
+            "statement": statement,
+            "call_site": call_site(),
+            "duration": duration,
+            "sql": sql if wants_plan else None,
+            "params": params if wants_plan else None,
+        },
+    )
+
+
+def _submit(entry: dict[str, Any]):
+    global _worker  # noqa: PLW0603
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_work, name="slow-queries", daemon=True)
+            _worker.start()
+    try:
+        _queue.put_nowait(entry)
+    except queue.Full:
+        logger.warning("Slow query log is behind; dropped %s", entry["fingerprint"])
+
+
+def _work():
+    while True:
+        entry = _queue.get()
+        try:
+            close_old_connections()
+            capture(entry)
+        except DatabaseError:
+            logger.exception("Could not record slow query %s", entry["fingerprint"])
+        finally:
+            _queue.task_done()
+
+
+def explain(sql: str, params) -> list[dict[str, Any]]:
+    """Run ``sql`` under ``EXPLAIN (ANALYZE, BUFFERS)`` and return the JSON plan."""
+    with transaction.atomic(), default_connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT set_config('statement_timeout', %s, true)",
+            [str(settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS)],
+        )
+        cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+        (plan,) = cursor.fetchone()
+    # psycopg decodes json columns; other drivers may hand back text.
+    return plan if isinstance(plan, list) else json.loads(plan)
+
+
+def capture(entry: dict[str, Any]):
+    """Save a slow query from `_slow_query`, explaining it first if it has SQL."""
+    _recording.active = True
+    try:
+        plan = None
+        if entry["sql"] is not None:
+            try:
+                plan = explain(entry["sql"], entry["params"])
+            except DatabaseError:
+                logger.warning("Could not explain slow query %s", entry["fingerprint"])
+        SlowQuery.objects.create(
+            fingerprint=entry["fingerprint"],
+            statement=entry["statement"],
+            call_site=entry["call_site"][:255],
+            duration=entry["duration"],
+            plan=plan,
+        )
+    finally:
+        _recording.active = False
+
+
+def _plan_nodes(node: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def missing_indexes(plan: list[dict[str, Any]]) -> list[tuple[str, tuple[str, ...]]]:
+    """
+    Return ``(table, columns)`` for each costly sequential scan in ``plan``.
+
+    Only tables in `ADVISED_TABLES` count. A scan is costly if its filter
+    discarded at least `SEQ_SCAN_MIN_ROWS_REMOVED` rows. Scans of a partition
+    are reported against its partitioned table, where an index covers every
+    partition.
+    """
+    found = []
+    for node in _plan_nodes(plan[0]["Plan"]):
+        table = _PARTITION_SUFFIX.sub("", node.get("Relation Name", ""))
+        if (
+            node.get("Node Type") != "Seq Scan"
+            or not table.startswith(ADVISED_TABLES)
+            or "Filter" not in node
+            or node.get("Rows Removed by Filter", 0) < SEQ_SCAN_MIN_ROWS_REMOVED
+        ):
+            continue
+        columns = tuple(dict.fromkeys(_FILTER_COLUMN.findall(node["Filter"])))
+        if columns:
+            found.append((table, columns))
+    return found
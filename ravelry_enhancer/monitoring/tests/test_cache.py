@@ -0,0 +1,25 @@
+from prometheus_client import REGISTRY
+
+from ravelry_enhancer.monitoring.cache import LocMemCache
+
+
+def test_times_cache_operations():
+    labels = {"backend": "LocMemCache", "operation": "get"}
+    before = (
+        REGISTRY.get_sample_value(
+            "django_cache_operation_duration_seconds_count",
+            labels,
+        )
+        or 0
+    )
+    cache = LocMemCache("test-metrics", {})
+    cache.set("key", "value")
+
+    assert cache.get("key") == "value"
+    assert (
+        REGISTRY.get_sample_value(
+            "django_cache_operation_duration_seconds_count",
+            labels,
+        )
+        == before + 1
+    )
@@ -0,0 +1,43 @@
+import pytest
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from ravelry_enhancer.users.models import User
+
+
+def _sample(name: str, labels: dict[str, str]) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.django_db()
+def test_records_request_and_query_durations(client, user: User):
+    request_labels = {"view": "users:detail", "method": "GET", "status": "200"}
+    requests_before = _sample(
+        "django_http_request_duration_seconds_count",
+        request_labels,
+    )
+    queries_before = _sample(
+        "django_db_query_duration_seconds_count",
+        {"alias": "default"},
+    )
+    client.force_login(user)
+
+    client.get(reverse("users:detail", kwargs={"pk": user.pk}))
+
+    assert (
+        _sample("django_http_request_duration_seconds_count", request_labels)
+        == requests_before + 1
+    )
+    assert (
+        _sample("django_db_query_duration_seconds_count", {"alias": "default"})
+        > queries_before
+    )
+
+
+def test_unresolved_requests(client):
+    labels = {"view": "<unresolved>", "method": "GET", "status": "404"}
+    before = _sample("django_http_request_duration_seconds_count", labels)
+
+    client.get("/no-such-page/")
+
+    assert _sample("django_http_request_duration_seconds_count", labels) == before + 1
@@ -0,0 +1,125 @@
+import threading
+import time
+from http import HTTPStatus
+
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+
+from ravelry_enhancer.monitoring import profiling
+from ravelry_enhancer.monitoring.middleware import ProfilingMiddleware
+from ravelry_enhancer.monitoring.profiling import Sampler
+
+
+@pytest.fixture(autouse=True)
+def _profile_dir(settings, tmp_path):
+    settings.PROFILE_DIR = str(tmp_path)
+
+
+def spin(seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+
+
+def test_sampler_collapses_stacks():
+    worker = threading.Thread(target=spin, args=(0.2,))
+    worker.start()
+    sampler = Sampler(interval=0.005, thread_ids={worker.ident}).start()
+    worker.join()
+    sampler.stop()
+
+    stack, count = sampler.collapsed().splitlines()[0].rsplit(" ", 1)
+    frames = stack.split(";")
+    assert frames[0].startswith("_bootstrap (threading:")
+    assert frames[-1].startswith(f"spin ({__name__}:")
+    assert int(count) > 1
+
+
+def test_sampler_stops_after_duration():
+    finished = threading.Event()
+
+    Sampler(interval=0.001, duration=0.01, on_finish=lambda s: finished.set()).start()
+
+    assert finished.wait(timeout=5)
+
+
+def test_profiling_is_staff_only(client, user):
+    client.force_login(user)
+
+    response = client.get(reverse("monitoring:profiling"))
+
+    assert response.status_code == HTTPStatus.FOUND
+    assert response["Location"].startswith(reverse("admin:login"))
+
+
+@pytest.mark.django_db()
+def test_profile_worker_and_download(admin_client):
+    response = admin_client.post(
+        reverse("monitoring:profiling"),
+        {"action": "profile", "seconds": 60},
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    sampler = profiling._running  # noqa: SLF001
+    assert admin_client.post(
+        reverse("monitoring:profiling"),
+        {"action": "profile"},
+        follow=True,
+    ).context["messages"]
+    sampler.stop()
+
+    (path,) = profiling.saved_profiles()
+    response = admin_client.get(reverse("monitoring:profiling"))
+    assert path.name in response.content.decode()
+    response = admin_client.get(
+        reverse("monitoring:profile-download", kwargs={"name": path.name}),
+    )
+    assert response["Content-Disposition"] == f'attachment; filename="{path.name}"'
+    assert profiling._running is None  # noqa: SLF001
+
+
+@pytest.mark.django_db()
+def test_download_rejects_other_files(admin_client):
+    response = admin_client.get(
+        reverse("monitoring:profile-download", kwargs={"name": "settings.py"}),
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db()
+def test_memory_snapshots(admin_client):
+    url = reverse("monitoring:profiling")
+    try:
+        first = admin_client.post(url, {"action": "memory"}).content.decode()
+        leak = [bytearray(1024) for _ in range(1000)]
+        second = admin_client.post(url, {"action": "memory"}).content.decode()
+        third = admin_client.post(url, {"action": "memory"}).content.decode()
+    finally:
+        admin_client.post(url, {"action": "stop-memory"})
+
+    assert "started tracing allocations" in first
+    assert "Largest allocations:" in second
+    assert __file__ in second
+    assert "Growth since the last snapshot:" in third
+    assert len(profiling.saved_profiles()) == 2  # noqa: PLR2004
+    assert leak
+
+
+@pytest.mark.django_db()
+def test_request_profile_for_staff(admin_user, user):
+    def slow_view(request):
+        spin(0.05)
+        return HttpResponse("page")
+
+    middleware = ProfilingMiddleware(slow_view)
+    request = RequestFactory().get("/", HTTP_X_PROFILE="1")
+
+    request.user = user
+    assert middleware(request).content == b"page"
+
+    request.user = admin_user
+    response = middleware(request)
+    assert response["Content-Type"] == "text/plain"
+    assert "slow_view" in response.content.decode()
@@ -0,0 +1,106 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from ravelry_enhancer.library.models import StashItem
+from ravelry_enhancer.monitoring import slow_queries
+from ravelry_enhancer.monitoring.models import SlowQuery
+from ravelry_enhancer.monitoring.slow_queries import capture
+from ravelry_enhancer.monitoring.slow_queries import fingerprint
+from ravelry_enhancer.monitoring.slow_queries import missing_indexes
+
+
+@pytest.mark.parametrize(
+    ("sql", "expected"),
+    [
+        (
+            'SELECT "a"."id" FROM "a" WHERE "a"."id" IN (%s, %s, %s) LIMIT 21',
+            'SELECT "a"."id" FROM "a" WHERE "a"."id" IN (...) LIMIT ?',
+        ),
+        (
+            "INSERT INTO t (x, y)\n  VALUES (%s, %s), (%s, %s), (%s, %s)",
+            "INSERT INTO t (x, y) VALUES (...)",
+        ),
+        (
+            "SELECT * FROM t0 WHERE name = 'O''Brien' AND size > 1.5",
+            "SELECT * FROM t0 WHERE name = ? AND size > ?",
+        ),
+    ],
+)
+def test_fingerprint(sql, expected):
+    assert fingerprint(sql) == expected
+
+
+def test_missing_indexes():
+    scan = {
+        "Node Type": "Seq Scan",
+        "Relation Name": "library_stashitem",
+        "Filter": "(((colorway)::text = 'Teal'::text) AND (user_id = 3))",
+        "Rows Removed by Filter": 50_000,
+    }
+    plan = [
+        {
+            "Plan": {
+                "Node Type": "Hash Join",
+                "Plans": [
+                    scan,
+                    {**scan, "Relation Name": "account_emailaddress"},
+                    {**scan, "Rows Removed by Filter": 10},
+                    {**scan, "Node Type": "Index Scan"},
+                ],
+            },
+        },
+    ]
+
+    assert missing_indexes(plan) == [("library_stashitem", ("colorway", "user_id"))]
+
+
+@pytest.mark.parametrize(
+    ("partition", "table"),
+    [
+        ("library_stashitem_h8_3", "library_stashitem"),
+        ("library_activity_p2024_01", "library_activity"),
+    ],
+)
+def test_missing_indexes_on_partitions(partition, table):
+    plan = [
+        {
+            "Plan": {
+                "Node Type": "Seq Scan",
+                "Relation Name": partition,
+                "Filter": "((colorway)::text = 'Teal'::text)",
+                "Rows Removed by Filter": 50_000,
+            },
+        },
+    ]
+
+    assert missing_indexes(plan) == [(table, ("colorway",))]
+
+
+@pytest.mark.django_db()
+def test_slow_queries_are_logged_and_reported(user, settings, monkeypatch):
+    settings.SLOW_QUERY_MS = 0
+    monkeypatch.setattr(slow_queries, "_submit", capture)
+    monkeypatch.setattr(slow_queries, "_explained", {})
+    monkeypatch.setattr(slow_queries, "SEQ_SCAN_MIN_ROWS_REMOVED", 1)
+    StashItem.objects.bulk_create(
+        StashItem(user=user, name="Rios", colorway=str(index), import_key=str(index))
+        for index in range(20)
+    )
+
+    for colorway in ["1", "2", "3"]:
+        list(StashItem.objects.filter(colorway=colorway))
+    settings.SLOW_QUERY_MS = None
+
+    logged = SlowQuery.objects.filter(statement__contains='"colorway" = ?')
+    assert logged.count() == 3  # noqa: PLR2004
+    assert logged.exclude(plan=None).count() == 1
+    assert logged.first().call_site.startswith(f"{__name__}:")
+
+    out = StringIO()
+    call_command("query_report", stdout=out)
+    report = out.getvalue()
+    assert f"3 from {__name__}:" in report
+    assert "CREATE INDEX ON library_stashitem (colorway);" in report
+    assert "CREATE INDEX ON library_stashitem (user_id" not in report
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import SpanKind
+
+from ravelry_enhancer.library import stash_import
+from ravelry_enhancer.library.stash_import import run_stash_import
+from ravelry_enhancer.monitoring import tracing
+from ravelry_enhancer.monitoring.cache import LocMemCache
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+
+@pytest.fixture()
+def spans(monkeypatch):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(tracing, "tracer", provider.get_tracer("test"))
+    return exporter
+
+
+def by_name(exporter, name):
+    return [span for span in exporter.get_finished_spans() if span.name == name]
+
+
+@pytest.mark.django_db()
+def test_request_span_continues_incoming_trace(client, user, spans):
+    client.force_login(user)
+
+    client.get(
+        reverse("users:detail", kwargs={"pk": user.pk}),
+        HTTP_TRACEPARENT=f"00-{TRACE_ID}-00f067aa0ba902b7-01",
+    )
+
+    (request,) = by_name(spans, "GET users/<int:pk>/")
+    assert request.kind == SpanKind.SERVER
+    assert format(request.context.trace_id, "032x") == TRACE_ID
+    assert request.attributes["http.response.status_code"] == 200  # noqa: PLR2004
+    queries = by_name(spans, "db.query")
+    assert queries
+    assert all(query.parent.span_id == request.context.span_id for query in queries)
+
+
+def test_cache_calls_only_traced_inside_a_span(spans):
+    cache = LocMemCache("test-tracing", {})
+    cache.get("key")
+    assert not spans.get_finished_spans()
+
+    with tracing.tracer.start_as_current_span("page"):
+        cache.get("key")
+
+    (get,) = by_name(spans, "cache.get")
+    assert get.attributes["cache.backend"] == "LocMemCache"
+
+
+@pytest.mark.django_db()
+def test_stash_import_continues_the_upload_trace(client, user, spans, monkeypatch):
+    monkeypatch.setattr(stash_import, "publish_progress", lambda *a, **k: None)
+    client.force_login(user)
+
+    client.post(
+        reverse("library:stash-import"),
+        {"file": SimpleUploadedFile("stash.csv", b"Yarn\nRios\n")},
+    )
+    upload = user.stash_imports.get()
+    run_stash_import(upload)
+
+    (request,) = by_name(spans, "POST library/stash/import/")
+    (job,) = by_name(spans, "stash import")
+    assert job.kind == SpanKind.CONSUMER
+    assert job.context.trace_id == request.context.trace_id
+    assert job.attributes["stash_import.id"] == upload.pk
+    assert any(
+        span.parent.span_id == job.context.span_id
+        for span in by_name(spans, "db.query")
+    )
+
+
+def test_file_exporter(settings, tmp_path):
+    settings.TRACING_EXPORTER = "file"
+    settings.TRACING_FILE = str(tmp_path / "traces.jsonl")
+    settings.TRACING_SAMPLE_RATE = 1.0
+    provider = tracing.build_provider()
+
+    with provider.get_tracer("test").start_as_current_span("sync"):
+        pass
+    provider.shutdown()
+
+    (line,) = (tmp_path / "traces.jsonl").read_text().splitlines()
+    assert json.loads(line)["name"] == "sync"
+
+
+def test_sample_rate(settings, tmp_path):
+    settings.TRACING_EXPORTER = "file"
+    settings.TRACING_FILE = str(tmp_path / "traces.jsonl")
+    settings.TRACING_SAMPLE_RATE = 0.0
+    provider = tracing.build_provider()
+
+    with provider.get_tracer("test").start_as_current_span("sync") as span:
+        assert not span.is_recording()
+    provider.shutdown()
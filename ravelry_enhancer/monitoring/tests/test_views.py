@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+from http import HTTPStatus
+
+from django.urls import reverse
+from prometheus_client import CONTENT_TYPE_LATEST
+
+
+def test_metrics(client):
+    response = client.get(reverse("metrics"))
+
+    assert response.status_code == HTTPStatus.OK
+    assert response["Content-Type"] == CONTENT_TYPE_LATEST
+    assert b"django_http_request_duration_seconds" in response.content
+
+
+def run_worker(code: str, env: dict[str, str]) -> str:
+    """Run ``code`` in a new interpreter, as a gunicorn worker would be."""
+    return subprocess.run(
+        [sys.executable, "-c", code],  # noqa: S603
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+
+def test_metrics_multiprocess(client, monkeypatch, tmp_path):
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    for taps in (2, 3):
+        run_worker(
+            f"from prometheus_client import Counter; Counter('taps', 'T').inc({taps})",
+            dict(os.environ),
+        )
+
+    response = client.get(reverse("metrics"))
+
+    assert response.status_code == HTTPStatus.OK
+    # Summed across both processes.
+    assert b"taps_total 5.0" in response.content
+
+
+def test_gunicorn_config_writes_metrics_to_files(monkeypatch):
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+
+    value_class = run_worker(
+        "import runpy; runpy.run_path('config/gunicorn.py'); "
+        "from prometheus_client import values; print(values.ValueClass.__name__)",
+        dict(os.environ),
+    )
+
+    assert value_class.strip() != "MutexValue"
@@ -0,0 +1,136 @@
+"""
+OpenTelemetry traces covering requests, queries, cache calls and background jobs.
+
+``TRACING_EXPORTER`` picks where spans go. ``otlp`` sends them to a collector
+at ``TRACING_OTLP_ENDPOINT``. ``file`` appends them to ``TRACING_FILE`` as
+JSON lines. When it is empty no provider is installed, so every span is the
+API's no-op span.
+
+``TRACING_SAMPLE_RATE`` sets the share of new traces that are recorded. A
+span whose parent was sampled is always recorded, so traces are never cut
+short. Query and cache spans are only made inside a recording span, which
+keeps unsampled requests close to free.
+
+Jobs queued from a request store `inject_context()` alongside the job. The
+worker passes that to `job_span`, so one trace covers the page that queued a
+job and the job itself.
+"""
+
+from collections.abc import Iterator
+from contextlib import ExitStack
+from contextlib import contextmanager
+from contextlib import nullcontext
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from opentelemetry import propagate
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+from opentelemetry.sdk.trace.export import SpanExporter
+from opentelemetry.sdk.trace.sampling import ParentBased
+from opentelemetry.sdk.trace.sampling import TraceIdRatioBased
+from opentelemetry.trace import Span
+from opentelemetry.trace import SpanKind
+
+tracer = trace.get_tracer("ravelry_enhancer")
+
+
+def _json_line(span: ReadableSpan) -> str:
+    return span.to_json(indent=None) + "\n"
+
+
+def _exporter() -> SpanExporter:
+    if settings.TRACING_EXPORTER == "file":
+        # Line buffered, so a crash loses at most the batch being written.
+        out = Path(settings.TRACING_FILE).open("a", buffering=1)  # noqa: SIM115
+        return ConsoleSpanExporter(out=out, formatter=_json_line)
+    if settings.TRACING_EXPORTER == "otlp":
+        # Pulls in protobuf, so only import it where it is used.
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        return OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+    msg = f"Unknown TRACING_EXPORTER {settings.TRACING_EXPORTER!r}"
+    raise ImproperlyConfigured(msg)
+
+
+def build_provider() -> TracerProvider:
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.TRACING_SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATE)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(_exporter()))
+    return provider
+
+
+def configure():
+    """Install the tracer provider, if an exporter is configured."""
+    if settings.TRACING_EXPORTER:
+        trace.set_tracer_provider(build_provider())
+
+
+def child_span(name: str, **attributes):
+    """A client span under the current one, or nothing if that is not recorded."""
+    if not trace.get_current_span().is_recording():
+        return nullcontext()
+    return tracer.start_as_current_span(
+        name,
+        kind=SpanKind.CLIENT,
+        attributes=attributes,
+    )
+
+
+def _trace_query(execute, sql, params, many, context):
+    connection = context["connection"]
+    with child_span(
+        "db.query",
+        **{
+            "db.system": connection.vendor,
+            "db.name": connection.alias,
+            "db.statement": sql,
+        },
+    ):
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def traced_queries(span: Span) -> Iterator[None]:
+    """Give each query run inside the block its own span under ``span``."""
+    with ExitStack() as stack:
+        if span.is_recording():
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_trace_query))
+        yield
+
+
+def inject_context() -> dict[str, str]:
+    """Return the current trace context, to be stored with a queued job."""
+    carrier: dict[str, str] = {}
+    propagate.inject(carrier)
+    return carrier
+
+
+@contextmanager
+def job_span(name: str, carrier: dict[str, str] | None = None, **attributes):
+    """
+    Trace a background job, continuing the trace in ``carrier`` if given.
+
+    Exceptions are recorded on the span and re-raised.
+    """
+    with (
+        tracer.start_as_current_span(
+            name,
+            context=propagate.extract(carrier or {}),
+            kind=SpanKind.CONSUMER,
+            attributes=attributes,
+        ) as span,
+        traced_queries(span),
+    ):
+        yield span
@@ -0,0 +1,14 @@
+from django.urls import path
+
+from .views import profile_download_view
+from .views import profiling_view
+
+app_name = "monitoring"
+urlpatterns = [
+    path("profiling/", view=profiling_view, name="profiling"),
+    path(
+        "profiling/<str:name>/",
+        view=profile_download_view,
+        name="profile-download",
+    ),
+]
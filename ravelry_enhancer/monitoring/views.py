@@ -0,0 +1,86 @@
+import re
+
+from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import transaction
+from django.http import FileResponse
+from django.http import Http404
+from django.http import HttpResponse
+from django.http import HttpResponseBadRequest
+from django.shortcuts import redirect
+from django.shortcuts import render
+from django.views.decorators.http import require_GET
+from django.views.decorators.http import require_http_methods
+from prometheus_client import CONTENT_TYPE_LATEST
+from prometheus_client import generate_latest
+
+from .metrics import registry
+from .profiling import MAX_PROFILE_SECONDS
+from .profiling import memory_snapshot
+from .profiling import profile_dir
+from .profiling import saved_profiles
+from .profiling import start_profile
+from .profiling import stop_memory_tracing
+
+SAVED_PROFILE_NAME = re.compile(r"\d+-\d{8}T\d{12}\.(collapsed|memory\.txt)")
+
+
+# Scrapes must not open a database transaction under ATOMIC_REQUESTS.
+@transaction.non_atomic_requests
+def metrics_view(request):
+    """Expose metrics in the Prometheus text format."""
+    return HttpResponse(generate_latest(registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+@staff_member_required
+@require_http_methods(["GET", "POST"])
+@transaction.non_atomic_requests
+def profiling_view(request):
+    """
+    Profile the worker that answers: sample its stacks for a while, or report
+    its memory. Lists saved results from every worker.
+    """
+    action = request.POST.get("action")
+    if action == "profile":
+        try:
+            seconds = min(
+                max(int(request.POST.get("seconds", 10)), 1),
+                MAX_PROFILE_SECONDS,
+            )
+        except ValueError:
+            return HttpResponseBadRequest()
+        if start_profile(seconds):
+            messages.success(request, f"Profiling this worker for {seconds} seconds.")
+        else:
+            messages.warning(request, "This worker is already being profiled.")
+        return redirect("monitoring:profiling")
+    if action == "memory":
+        return HttpResponse(memory_snapshot(), content_type="text/plain")
+    if action == "stop-memory":
+        stop_memory_tracing()
+        messages.success(request, "Stopped tracing allocations.")
+        return redirect("monitoring:profiling")
+    if request.method == "POST":
+        return HttpResponseBadRequest()
+    return render(
+        request,
+        "monitoring/profiling.html",
+        {"profiles": saved_profiles(), "max_seconds": MAX_PROFILE_SECONDS},
+    )
+
+
+@staff_member_required
+@require_GET
+@transaction.non_atomic_requests
+def profile_download_view(request, name):
+    if not SAVED_PROFILE_NAME.fullmatch(name):
+        raise Http404
+    path = profile_dir() / name
+    if not path.is_file():
+        raise Http404
+    return FileResponse(
+        path.open("rb"),
+        as_attachment=True,
+        filename=name,
+        content_type="text/plain",
+    )
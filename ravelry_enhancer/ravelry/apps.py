@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+from django.utils.translation import gettext_lazy as _
+
+
+class RavelryConfig(AppConfig):
+    name = "ravelry_enhancer.ravelry"
+    verbose_name = _("Ravelry")
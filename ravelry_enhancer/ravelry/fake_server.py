@@ -0,0 +1,424 @@
+"""
+A local stand-in for the Ravelry API and its OAuth2 endpoints.
+
+Responses come from a cassette directory when a recording matches the request
+path (``<cassette_dir>/patterns/123.json`` answers ``GET /patterns/123.json``),
+and are otherwise synthesised from a seed. Synthetic objects are derived from
+``(seed, kind, id)`` on demand, so a catalogue of millions of patterns costs no
+memory and the same seed always yields the same data.
+"""
+
+import json
+import math
+import random
+import re
+import secrets
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from dataclasses import replace
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs
+from urllib.parse import urlencode
+from urllib.parse import urlsplit
+
+CRAFTS = ["Knitting", "Crochet"]
+CATEGORIES = ["Pullover", "Cardigan", "Shawl", "Hat", "Socks", "Mittens", "Cowl"]
+WEIGHTS = ["Lace", "Fingering", "Sport", "DK", "Worsted", "Aran", "Bulky"]
+FIBERS = ["Merino", "Alpaca", "Cotton", "Silk", "Mohair", "Linen", "Nylon"]
+COLORS = ["Oatmeal", "Teal", "Rust", "Charcoal", "Mustard", "Plum", "Sage"]
+PROJECT_STATUSES = ["In progress", "Finished", "Hibernating", "Frogged"]
+NEEDLE_SIZES_MM = [2.0, 2.25, 2.75, 3.0, 3.25, 3.5, 3.75, 4.0, 4.5, 5.0, 5.5, 6.0]
+
+DEFAULT_USERNAME = "knitter"
+MAX_PAGE_SIZE = 500
+
+
+@dataclass
+class FakeRavelryConfig:
+    seed: int = 0
+    patterns: int = 100_000
+    yarns: int = 50_000
+    stash_per_user: int = 200
+    projects_per_user: int = 100
+    # Seconds added to every API response: latency plus up to `jitter` more.
+    latency: float = 0.0
+    jitter: float = 0.0
+    # API requests allowed per `rate_window` seconds before answering 429.
+    # Zero disables rate limiting.
+    rate_limit: int = 0
+    rate_window: float = 60.0
+    token_lifetime: int = 86400
+    cassette_dir: Path | None = None
+
+
+class SyntheticCatalog:
+    """Deterministic Ravelry-shaped objects generated lazily from a seed."""
+
+    def __init__(self, config: FakeRavelryConfig):
+        self.config = config
+
+    def _rng(self, *key) -> random.Random:
+        return random.Random(":".join(map(str, (self.config.seed, *key))))  # noqa: S311
+
+    def user_id(self, username: str) -> int:
+        return zlib.crc32(username.encode()) % 10_000_000 + 1
+
+    def user(self, username: str) -> dict[str, Any]:
+        return {
+            "id": self.user_id(username),
+            "username": username,
+            "first_name": username.title(),
+            "small_photo_url": None,
+        }
+
+    def pattern(self, pattern_id: int) -> dict[str, Any] | None:
+        if not 1 <= pattern_id <= self.config.patterns:
+            return None
+        rng = self._rng("pattern", pattern_id)
+        category = rng.choice(CATEGORIES)
+        weight = rng.choice(WEIGHTS)
+        return {
+            "id": pattern_id,
+            "name": f"{rng.choice(COLORS)} {category} {pattern_id}",
+            "permalink": f"{category.lower()}-{pattern_id}",
+            "craft": {"name": rng.choice(CRAFTS)},
+            "pattern_categories": [{"name": category}],
+            "yarn_weight": {"name": weight},
+            "yardage": rng.randrange(100, 2000, 10),
+            "gauge": rng.randrange(12, 36),
+            "pattern_needle_sizes": [{"metric": rng.choice(NEEDLE_SIZES_MM)}],
+            "free": rng.random() < 0.3,  # noqa: PLR2004
+            "designer": {"name": f"Designer {rng.randrange(1, 5000)}"},
+        }
+
+    def yarn(self, yarn_id: int) -> dict[str, Any] | None:
+        if not 1 <= yarn_id <= self.config.yarns:
+            return None
+        rng = self._rng("yarn", yarn_id)
+        fiber = rng.choice(FIBERS)
+        weight = rng.choice(WEIGHTS)
+        return {
+            "id": yarn_id,
+            "name": f"{fiber} {weight} {yarn_id}",
+            "yarn_company_name": f"Mill {rng.randrange(1, 800)}",
+            "yarn_weight": {"name": weight},
+            "yardage": rng.randrange(50, 600, 5),
+            "grams": rng.choice([25, 50, 100, 115, 200]),
+            "yarn_fibers": [{"fiber_type": {"name": fiber}, "percentage": 100}],
+        }
+
+    def stash(self, username: str, index: int) -> dict[str, Any]:
+        rng = self._rng("stash", username, index)
+        yarn_id = rng.randrange(1, self.config.yarns + 1)
+        return {
+            "id": self.user_id(username) * 100_000 + index,
+            "colorway_name": rng.choice(COLORS),
+            "skeins": rng.randrange(1, 12),
+            "yarn": self.yarn(yarn_id),
+            "user": {"username": username},
+        }
+
+    def project(self, username: str, index: int) -> dict[str, Any]:
+        rng = self._rng("project", username, index)
+        pattern_id = rng.randrange(1, self.config.patterns + 1)
+        pattern = self.pattern(pattern_id)
+        return {
+            "id": self.user_id(username) * 100_000 + index,
+            "name": pattern["name"],
+            "pattern_id": pattern_id,
+            "status_name": rng.choice(PROJECT_STATUSES),
+            "progress": rng.randrange(0, 101),
+            "started": f"20{rng.randrange(10, 25)}-{rng.randrange(1, 13):02d}-01",
+            "user": {"username": username},
+        }
+
+
+class FakeRavelryServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering a subset of the Ravelry API."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int] = ("127.0.0.1", 0),
+        config: FakeRavelryConfig | None = None,
+    ):
+        self.initial_config = config or FakeRavelryConfig()
+        self._state_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.reset()
+        super().__init__(address, FakeRavelryRequestHandler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset(self):
+        """Restore the initial config and forget tokens and rate-limit state."""
+        self.config = replace(self.initial_config)
+        self.catalog = SyntheticCatalog(self.config)
+        self.codes: dict[str, str] = {}
+        self.tokens: dict[str, str] = {}
+        self.refresh_tokens: dict[str, str] = {}
+        self.request_count = 0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def check_rate_limit(self) -> float | None:
+        """Count an API request; return seconds to wait if over the limit."""
+        with self._state_lock:
+            self.request_count += 1
+            if not self.config.rate_limit:
+                return None
+            now = time.monotonic()
+            if now - self._window_start >= self.config.rate_window:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            if self._window_count > self.config.rate_limit:
+                return self.config.rate_window - (now - self._window_start)
+            return None
+
+    def issue_tokens(self, username: str) -> dict[str, Any]:
+        access_token = secrets.token_urlsafe(24)
+        refresh_token = secrets.token_urlsafe(24)
+        with self._state_lock:
+            self.tokens[access_token] = username
+            self.refresh_tokens[refresh_token] = username
+        return {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "token_type": "bearer",
+            "expires_in": self.config.token_lifetime,
+            "scope": "offline profile-only",
+        }
+
+
+class FakeRavelryRequestHandler(BaseHTTPRequestHandler):
+    server: FakeRavelryServer
+
+    routes = [
+        ("GET", r"/current_user\.json", "current_user"),
+        ("GET", r"/patterns/search\.json", "pattern_search"),
+        ("GET", r"/patterns/(?P<pk>\d+)\.json", "pattern_detail"),
+        ("GET", r"/patterns\.json", "pattern_batch"),
+        ("GET", r"/yarns/search\.json", "yarn_search"),
+        ("GET", r"/yarns/(?P<pk>\d+)\.json", "yarn_detail"),
+        ("GET", r"/yarns\.json", "yarn_batch"),
+        ("GET", r"/people/(?P<username>[^/]+)/stash/list\.json", "stash_list"),
+        ("GET", r"/projects/(?P<username>[^/]+)/list\.json", "project_list"),
+        ("GET", r"/oauth2/auth", "oauth_authorize"),
+        ("POST", r"/oauth2/token", "oauth_token"),
+    ]
+
+    def do_GET(self):  # noqa: N802
+        self.dispatch("GET")
+
+    def do_POST(self):  # noqa: N802
+        self.dispatch("POST")
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+    def dispatch(self, method: str):
+        url = urlsplit(self.path)
+        self.query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        handler_name, match = next(
+            (
+                (name, match)
+                for route_method, pattern, name in self.routes
+                if route_method == method and (match := re.fullmatch(pattern, url.path))
+            ),
+            (None, None),
+        )
+        if handler_name is None:
+            self.send_json({"errors": ["Not found"]}, HTTPStatus.NOT_FOUND)
+            return
+
+        if not handler_name.startswith("oauth_"):
+            if (retry_after := self.server.check_rate_limit()) is not None:
+                self.send_json(
+                    {"errors": ["Rate limit exceeded"]},
+                    HTTPStatus.TOO_MANY_REQUESTS,
+                    headers={"Retry-After": str(math.ceil(retry_after))},
+                )
+                return
+            self.delay()
+            if self.send_cassette(url.path):
+                return
+        getattr(self, handler_name)(**match.groupdict())
+
+    def delay(self):
+        config = self.server.config
+        if config.latency or config.jitter:
+            time.sleep(config.latency + random.uniform(0, config.jitter))  # noqa: S311
+
+    def send_cassette(self, path: str) -> bool:
+        cassette_dir = self.server.config.cassette_dir
+        if cassette_dir is None:
+            return False
+        recording = Path(cassette_dir) / path.lstrip("/")
+        if not recording.is_file():
+            return False
+        body = recording.read_bytes()
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return True
+
+    def send_json(
+        self,
+        data: Any,
+        status: HTTPStatus = HTTPStatus.OK,
+        headers: dict[str, str] | None = None,
+    ):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def paginate(self, total: int) -> tuple[range, dict[str, int]]:
+        page = max(1, int(self.query.get("page", 1)))
+        page_size = min(max(1, int(self.query.get("page_size", 50))), MAX_PAGE_SIZE)
+        page_count = max(1, math.ceil(total / page_size))
+        start = (page - 1) * page_size
+        return range(start, min(start + page_size, total)), {
+            "page": page,
+            "page_size": page_size,
+            "page_count": page_count,
+            "last_page": page_count,
+            "results": total,
+        }
+
+    def authenticated_username(self) -> str | None:
+        scheme, _, token = self.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer":
+            return None
+        return self.server.tokens.get(token)
+
+    # API endpoints
+    # --------------------------------------------------------------------------
+    def current_user(self):
+        username = self.authenticated_username()
+        if username is None:
+            self.send_json({"errors": ["Unauthorized"]}, HTTPStatus.UNAUTHORIZED)
+            return
+        self.send_json({"user": self.server.catalog.user(username)})
+
+    def _detail(self, key: str, obj: dict[str, Any] | None):
+        if obj is None:
+            self.send_json({"errors": ["Not found"]}, HTTPStatus.NOT_FOUND)
+        else:
+            self.send_json({key: obj})
+
+    def _batch(self, key: str, build):
+        ids = [int(pk) for pk in re.split(r"[+ ]", self.query.get("ids", "")) if pk]
+        self.send_json({key: {str(pk): build(pk) for pk in ids if build(pk)}})
+
+    def _search(self, key: str, total: int, build):
+        ids, paginator = self.paginate(total)
+        self.send_json({key: [build(pk + 1) for pk in ids], "paginator": paginator})
+
+    def pattern_detail(self, pk: str):
+        self._detail("pattern", self.server.catalog.pattern(int(pk)))
+
+    def pattern_batch(self):
+        self._batch("patterns", self.server.catalog.pattern)
+
+    def pattern_search(self):
+        catalog = self.server.catalog
+        self._search("patterns", catalog.config.patterns, catalog.pattern)
+
+    def yarn_detail(self, pk: str):
+        self._detail("yarn", self.server.catalog.yarn(int(pk)))
+
+    def yarn_batch(self):
+        self._batch("yarns", self.server.catalog.yarn)
+
+    def yarn_search(self):
+        catalog = self.server.catalog
+        self._search("yarns", catalog.config.yarns, catalog.yarn)
+
+    def stash_list(self, username: str):
+        catalog = self.server.catalog
+        ids, paginator = self.paginate(catalog.config.stash_per_user)
+        self.send_json(
+            {
+                "stash": [catalog.stash(username, index) for index in ids],
+                "paginator": paginator,
+            },
+        )
+
+    def project_list(self, username: str):
+        catalog = self.server.catalog
+        ids, paginator = self.paginate(catalog.config.projects_per_user)
+        self.send_json(
+            {
+                "projects": [catalog.project(username, index) for index in ids],
+                "paginator": paginator,
+            },
+        )
+
+    # OAuth2
+    # --------------------------------------------------------------------------
+    def oauth_authorize(self):
+        """Approve immediately and redirect back with a code, as a user would."""
+        redirect_uri = self.query.get("redirect_uri")
+        if not redirect_uri:
+            self.send_json({"error": "invalid_request"}, HTTPStatus.BAD_REQUEST)
+            return
+        code = secrets.token_urlsafe(16)
+        self.server.codes[code] = self.query.get("username", DEFAULT_USERNAME)
+        params = {"code": code}
+        if "state" in self.query:
+            params["state"] = self.query["state"]
+        separator = "&" if "?" in redirect_uri else "?"
+        self.send_response(HTTPStatus.FOUND)
+        self.send_header("Location", f"{redirect_uri}{separator}{urlencode(params)}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def oauth_token(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = {
+            key: values[-1]
+            for key, values in parse_qs(self.rfile.read(length).decode()).items()
+        }
+        grant_type = form.get("grant_type")
+        if grant_type == "authorization_code":
+            username = self.server.codes.pop(form.get("code", ""), None)
+        elif grant_type == "refresh_token":
+            username = self.server.refresh_tokens.pop(
+                form.get("refresh_token", ""),
+                None,
+            )
+        else:
+            self.send_json({"error": "unsupported_grant_type"}, HTTPStatus.BAD_REQUEST)
+            return
+        if username is None:
+            self.send_json({"error": "invalid_grant"}, HTTPStatus.BAD_REQUEST)
+            return
+        self.send_json(self.server.issue_tokens(username))
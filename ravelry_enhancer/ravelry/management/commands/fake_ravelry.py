@@ -0,0 +1,81 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from ravelry_enhancer.ravelry.fake_server import FakeRavelryConfig
+from ravelry_enhancer.ravelry.fake_server import FakeRavelryServer
+
+
+class Command(BaseCommand):
+    help = "Serve a local stand-in for the Ravelry API for offline development."
+
+    def add_arguments(self, parser):
+        defaults = FakeRavelryConfig()
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--seed", type=int, default=defaults.seed)
+        parser.add_argument("--patterns", type=int, default=defaults.patterns)
+        parser.add_argument("--yarns", type=int, default=defaults.yarns)
+        parser.add_argument(
+            "--stash-per-user",
+            type=int,
+            default=defaults.stash_per_user,
+        )
+        parser.add_argument(
+            "--projects-per-user",
+            type=int,
+            default=defaults.projects_per_user,
+        )
+        parser.add_argument(
+            "--latency-ms",
+            type=float,
+            default=0,
+            help="Delay added to every API response.",
+        )
+        parser.add_argument(
+            "--jitter-ms",
+            type=float,
+            default=0,
+            help="Extra random delay of up to this much per response.",
+        )
+        parser.add_argument(
+            "--rate-limit",
+            type=int,
+            default=defaults.rate_limit,
+            help="Requests per --rate-window before answering 429 (0 disables).",
+        )
+        parser.add_argument(
+            "--rate-window",
+            type=float,
+            default=defaults.rate_window,
+        )
+        parser.add_argument(
+            "--cassettes",
+            type=Path,
+            help="Directory of recorded responses laid out by request path.",
+        )
+
+    def handle(self, *args, **options):
+        config = FakeRavelryConfig(
+            seed=options["seed"],
+            patterns=options["patterns"],
+            yarns=options["yarns"],
+            stash_per_user=options["stash_per_user"],
+            projects_per_user=options["projects_per_user"],
+            latency=options["latency_ms"] / 1000,
+            jitter=options["jitter_ms"] / 1000,
+            rate_limit=options["rate_limit"],
+            rate_window=options["rate_window"],
+            cassette_dir=options["cassettes"],
+        )
+        server = FakeRavelryServer((options["host"], options["port"]), config)
+        self.stdout.write(
+            f"Fake Ravelry API at {server.url}; set RAVELRY_API_URL={server.url} "
+            f"and RAVELRY_OAUTH_URL={server.url}/oauth2",
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
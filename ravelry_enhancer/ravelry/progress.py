@@ -0,0 +1,97 @@
+"""
+Sync progress events, published by the worker and streamed to browsers.
+
+The worker calls `publish_progress` as it goes; each browser holds one
+server-sent events connection (`progress_events`) subscribed to its user's
+Redis channel, so nothing polls while a long sync runs.
+
+Pages only open a stream while `sync_running`, and a stream ends after
+`IDLE_SECONDS` without an event or `MAX_STREAM_SECONDS` in all. Neither the
+ASGI server nor Django notices a browser going away mid-stream, and under
+WSGI each stream holds a worker, so streams must end on their own. The
+browser reconnects when one ends, and is told to stop (with a 204) once
+nothing is running.
+"""
+
+import json
+import time
+from collections.abc import AsyncIterator
+from functools import cache
+
+import redis
+import redis.asyncio
+from django.conf import settings
+
+from ravelry_enhancer.library.models import StashImport
+
+# Comment frames keep proxies from closing an idle stream.
+HEARTBEAT_SECONDS = 15
+IDLE_SECONDS = 120
+MAX_STREAM_SECONDS = 600
+FINAL_STATES = {"finished", "failed"}
+
+
+def channel_name(user_id: int) -> str:
+    return f"sync-progress:{user_id}"
+
+
+@cache
+def _publisher() -> redis.Redis:
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+
+def publish_progress(user_id: int, **event):
+    """
+    Send a progress event to any open streams for ``user_id``.
+
+    Events are free-form JSON; the page understands ``state`` (``running``,
+    ``finished`` or ``failed``), ``stage``, ``done`` and ``total``.
+    """
+    _publisher().publish(channel_name(user_id), json.dumps(event))
+
+
+def sync_running(user_id: int) -> bool:
+    """Whether anything that publishes progress for ``user_id`` is under way."""
+    return StashImport.objects.filter(
+        user_id=user_id,
+        status__in=[StashImport.Status.PENDING, StashImport.Status.RUNNING],
+    ).exists()
+
+
+def format_event(data: dict | None) -> bytes:
+    """Encode one SSE frame; ``None`` gives a heartbeat comment."""
+    if data is None:
+        return b": heartbeat\n\n"
+    return f"event: progress\ndata: {json.dumps(data)}\n\n".encode()
+
+
+async def progress_events(user_id: int) -> AsyncIterator[bytes]:
+    """
+    Yield SSE frames for ``user_id`` until a sync finishes or fails, or the
+    stream has been idle or open too long.
+    """
+    client = redis.asyncio.Redis.from_url(settings.REDIS_URL)
+    opened = last_event = time.monotonic()
+    try:
+        async with client.pubsub() as pubsub:
+            await pubsub.subscribe(channel_name(user_id))
+            while True:
+                now = time.monotonic()
+                if now - opened >= MAX_STREAM_SECONDS or (
+                    now - last_event >= IDLE_SECONDS
+                ):
+                    return
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=HEARTBEAT_SECONDS,
+                )
+                if message is None:
+                    yield format_event(None)
+                    continue
+                last_event = time.monotonic()
+                data = json.loads(message["data"])
+                yield format_event(data)
+                if data.get("state") in FINAL_STATES:
+                    return
+    finally:
+        await client.aclose()
@@ -0,0 +1,161 @@
+import json
+import urllib.error
+import urllib.request
+from http import HTTPStatus
+from urllib.parse import parse_qs
+from urllib.parse import urlencode
+from urllib.parse import urlsplit
+
+import pytest
+
+from ravelry_enhancer.ravelry.fake_server import FakeRavelryConfig
+from ravelry_enhancer.ravelry.fake_server import FakeRavelryServer
+from ravelry_enhancer.ravelry.fake_server import SyntheticCatalog
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def _request(url: str, data: dict | None = None, token: str | None = None):
+    request = urllib.request.Request(  # noqa: S310
+        url,
+        data=urlencode(data).encode() if data is not None else None,
+    )
+    if token:
+        request.add_header("Authorization", f"Bearer {token}")
+    opener = urllib.request.build_opener(_NoRedirect)
+    try:
+        with opener.open(request) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as error:
+        return error.code, error.headers, error.read()
+
+
+def _get_json(url: str, **kwargs):
+    status, _, body = _request(url, **kwargs)
+    return status, json.loads(body)
+
+
+class TestSyntheticCatalog:
+    def test_same_seed_same_objects(self):
+        first = SyntheticCatalog(FakeRavelryConfig(seed=7))
+        second = SyntheticCatalog(FakeRavelryConfig(seed=7))
+
+        assert first.pattern(42) == second.pattern(42)
+        assert first.stash("ann", 3) == second.stash("ann", 3)
+
+    def test_scales_without_materialising(self):
+        catalog = SyntheticCatalog(FakeRavelryConfig(patterns=5_000_000))
+
+        assert catalog.pattern(4_999_999)["id"] == 4_999_999  # noqa: PLR2004
+        assert catalog.pattern(5_000_001) is None
+
+
+class TestFakeRavelryServer:
+    def test_pattern_detail(self, fake_ravelry: FakeRavelryServer):
+        status, data = _get_json(f"{fake_ravelry.url}/patterns/12.json")
+
+        assert status == HTTPStatus.OK
+        assert data["pattern"] == fake_ravelry.catalog.pattern(12)
+
+    def test_missing_pattern(self, fake_ravelry: FakeRavelryServer):
+        status, _ = _get_json(f"{fake_ravelry.url}/patterns/0.json")
+
+        assert status == HTTPStatus.NOT_FOUND
+
+    def test_pattern_batch(self, fake_ravelry: FakeRavelryServer):
+        _, data = _get_json(f"{fake_ravelry.url}/patterns.json?ids=1+2")
+
+        assert set(data["patterns"]) == {"1", "2"}
+
+    def test_search_pagination(self, fake_ravelry: FakeRavelryServer):
+        fake_ravelry.config.yarns = 25
+
+        _, data = _get_json(f"{fake_ravelry.url}/yarns/search.json?page=3&page_size=10")
+
+        assert [yarn["id"] for yarn in data["yarns"]] == list(range(21, 26))
+        assert data["paginator"] == {
+            "page": 3,
+            "page_size": 10,
+            "page_count": 3,
+            "last_page": 3,
+            "results": 25,
+        }
+
+    def test_stash_and_projects(self, fake_ravelry: FakeRavelryServer):
+        _, stash = _get_json(f"{fake_ravelry.url}/people/ann/stash/list.json")
+        _, projects = _get_json(f"{fake_ravelry.url}/projects/ann/list.json")
+
+        assert stash["paginator"]["results"] == fake_ravelry.config.stash_per_user
+        assert stash["stash"][0]["user"]["username"] == "ann"
+        assert projects["projects"][0] == fake_ravelry.catalog.project("ann", 0)
+
+    def test_cassette_overrides_synthetic(self, fake_ravelry, tmp_path):
+        recording = tmp_path / "patterns" / "12.json"
+        recording.parent.mkdir()
+        recording.write_text(json.dumps({"pattern": {"id": 12, "name": "Recorded"}}))
+        fake_ravelry.config.cassette_dir = tmp_path
+
+        _, data = _get_json(f"{fake_ravelry.url}/patterns/12.json")
+
+        assert data["pattern"]["name"] == "Recorded"
+
+    def test_rate_limit(self, fake_ravelry: FakeRavelryServer):
+        fake_ravelry.config.rate_limit = 2
+
+        statuses = [
+            _request(f"{fake_ravelry.url}/patterns/1.json")[0] for _ in range(3)
+        ]
+        status, headers, _ = _request(f"{fake_ravelry.url}/patterns/1.json")
+
+        assert statuses == [HTTPStatus.OK, HTTPStatus.OK, HTTPStatus.TOO_MANY_REQUESTS]
+        assert status == HTTPStatus.TOO_MANY_REQUESTS
+        assert int(headers["Retry-After"]) > 0
+
+    def test_oauth_flow(self, fake_ravelry: FakeRavelryServer, settings):
+        status, headers, _ = _request(
+            f"{settings.RAVELRY_OAUTH_URL}/auth?"
+            + urlencode(
+                {
+                    "redirect_uri": "http://testserver/callback/",
+                    "state": "xyz",
+                    "username": "ann",
+                },
+            ),
+        )
+        assert status == HTTPStatus.FOUND
+        query = parse_qs(urlsplit(headers["Location"]).query)
+        assert query["state"] == ["xyz"]
+
+        status, tokens = _get_json(
+            f"{settings.RAVELRY_OAUTH_URL}/token",
+            data={"grant_type": "authorization_code", "code": query["code"][0]},
+        )
+        assert status == HTTPStatus.OK
+        _, data = _get_json(
+            f"{settings.RAVELRY_API_URL}/current_user.json",
+            token=tokens["access_token"],
+        )
+        assert data["user"]["username"] == "ann"
+
+        status, refreshed = _get_json(
+            f"{settings.RAVELRY_OAUTH_URL}/token",
+            data={
+                "grant_type": "refresh_token",
+                "refresh_token": tokens["refresh_token"],
+            },
+        )
+        assert status == HTTPStatus.OK
+        assert refreshed["access_token"] != tokens["access_token"]
+
+    @pytest.mark.parametrize("grant_type", ["authorization_code", "refresh_token"])
+    def test_oauth_invalid_grant(self, fake_ravelry, grant_type):
+        status, data = _get_json(
+            f"{fake_ravelry.url}/oauth2/token",
+            data={"grant_type": grant_type, "code": "nope", "refresh_token": "nope"},
+        )
+
+        assert status == HTTPStatus.BAD_REQUEST
+        assert data == {"error": "invalid_grant"}
@@ -0,0 +1,169 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+
+from ravelry_enhancer.library.models import StashImport
+from ravelry_enhancer.ravelry import progress
+from ravelry_enhancer.ravelry.views import sync_progress_view
+from ravelry_enhancer.users.models import User
+
+
+class FakePubSub:
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.channels = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def subscribe(self, channel):
+        self.channels.append(channel)
+
+    async def get_message(self, ignore_subscribe_messages, timeout):
+        return self.messages.pop(0)
+
+
+class FakeAsyncRedis:
+    def __init__(self, messages):
+        self._pubsub = FakePubSub(messages)
+        self.closed = False
+
+    def pubsub(self):
+        return self._pubsub
+
+    async def aclose(self):
+        self.closed = True
+
+
+async def _collect(frames):
+    return [frame async for frame in frames]
+
+
+def test_format_event():
+    assert progress.format_event({"done": 1}) == (
+        b'event: progress\ndata: {"done": 1}\n\n'
+    )
+    assert progress.format_event(None) == b": heartbeat\n\n"
+
+
+def test_publish_progress(monkeypatch):
+    published = []
+
+    class FakeRedis:
+        def publish(self, channel, message):
+            published.append((channel, json.loads(message)))
+
+    monkeypatch.setattr(progress, "_publisher", FakeRedis)
+
+    progress.publish_progress(7, state="running", done=3, total=10)
+
+    assert published == [
+        ("sync-progress:7", {"state": "running", "done": 3, "total": 10}),
+    ]
+
+
+def test_progress_events_until_finished(monkeypatch):
+    client = FakeAsyncRedis(
+        [
+            None,
+            {"data": json.dumps({"state": "running", "done": 1})},
+            {"data": json.dumps({"state": "finished", "done": 2})},
+            {"data": json.dumps({"state": "running", "done": 3})},
+        ],
+    )
+    monkeypatch.setattr(
+        progress.redis.asyncio.Redis,
+        "from_url",
+        lambda url: client,
+    )
+
+    frames = async_to_sync(_collect)(progress.progress_events(5))
+
+    assert frames == [
+        b": heartbeat\n\n",
+        progress.format_event({"state": "running", "done": 1}),
+        progress.format_event({"state": "finished", "done": 2}),
+    ]
+    assert client.pubsub().channels == ["sync-progress:5"]
+    assert client.closed
+
+
+def test_progress_events_end_when_idle(monkeypatch):
+    client = FakeAsyncRedis([None] * 100)
+    monkeypatch.setattr(
+        progress.redis.asyncio.Redis,
+        "from_url",
+        lambda url: client,
+    )
+    # Each call is a heartbeat's wait later.
+    clock = iter(range(0, 10_000, progress.HEARTBEAT_SECONDS))
+    monkeypatch.setattr(progress.time, "monotonic", lambda: next(clock))
+
+    frames = async_to_sync(_collect)(progress.progress_events(5))
+
+    assert set(frames) == {progress.format_event(None)}
+    assert len(frames) <= progress.IDLE_SECONDS // progress.HEARTBEAT_SECONDS
+    assert client.closed
+
+
+def test_progress_events_end_after_max_lifetime(monkeypatch):
+    running = {"data": json.dumps({"state": "running"})}
+    client = FakeAsyncRedis([running] * 1000)
+    monkeypatch.setattr(
+        progress.redis.asyncio.Redis,
+        "from_url",
+        lambda url: client,
+    )
+    clock = iter(range(10_000))
+    monkeypatch.setattr(progress.time, "monotonic", lambda: next(clock))
+
+    frames = async_to_sync(_collect)(progress.progress_events(5))
+
+    assert len(frames) < progress.MAX_STREAM_SECONDS
+
+
+class TestSyncProgressView:
+    def test_not_authenticated(self, rf: RequestFactory):
+        request = rf.get("/fake-url/")
+        request.user = AnonymousUser()
+
+        response = async_to_sync(sync_progress_view)(request)
+
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+    @pytest.mark.django_db()
+    def test_nothing_running(self, user: User, rf: RequestFactory):
+        request = rf.get("/fake-url/")
+        request.user = user
+
+        response = async_to_sync(sync_progress_view)(request)
+
+        assert response.status_code == HTTPStatus.NO_CONTENT
+
+    @pytest.mark.django_db()
+    def test_streams_events(self, user: User, rf: RequestFactory, monkeypatch):
+        StashImport.objects.create(user=user, file="stash.csv")
+
+        async def fake_events(user_id):
+            yield progress.format_event({"state": "finished", "user": user_id})
+
+        monkeypatch.setattr(
+            "ravelry_enhancer.ravelry.views.progress_events",
+            fake_events,
+        )
+        request = rf.get("/fake-url/")
+        request.user = user
+
+        response = async_to_sync(sync_progress_view)(request)
+
+        assert response["Content-Type"] == "text/event-stream"
+        assert response["Cache-Control"] == "no-cache"
+        frames = async_to_sync(_collect)(response.streaming_content)
+        assert frames == [progress.format_event({"state": "finished", "user": user.pk})]
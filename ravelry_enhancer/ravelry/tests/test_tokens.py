@@ -0,0 +1,161 @@
+from datetime import timedelta
+
+import pytest
+from allauth.socialaccount.models import SocialAccount
+from allauth.socialaccount.models import SocialToken
+from django.utils import timezone
+from fakeredis import FakeRedis
+
+from ravelry_enhancer.ravelry import tokens
+from ravelry_enhancer.ravelry.fake_server import FakeRavelryServer
+from ravelry_enhancer.ravelry.tokens import TokenError
+from ravelry_enhancer.ravelry.tokens import access_token
+from ravelry_enhancer.ravelry.tokens import invalidate
+from ravelry_enhancer.ravelry.tokens import refresh
+from ravelry_enhancer.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def _process_cache(monkeypatch):
+    monkeypatch.setattr(tokens, "_tokens", {})
+
+
+@pytest.fixture(params=["redis", "local"])
+def backend(request, monkeypatch):
+    client = FakeRedis() if request.param == "redis" else None
+    monkeypatch.setattr(tokens, "_client", lambda: client)
+    # Refresh inline, so the refresh shares the test's transaction.
+    background = []
+    monkeypatch.setattr(
+        tokens,
+        "_refresh_in_background",
+        lambda user_id: background.append(refresh(user_id, blocking=False)),
+    )
+    return background
+
+
+def connect(user: User, fake_ravelry: FakeRavelryServer, expires_in: float):
+    issued = fake_ravelry.issue_tokens(user.email)
+    account = SocialAccount.objects.create(
+        user=user,
+        provider="ravelry",
+        uid=user.email,
+    )
+    return SocialToken.objects.create(
+        account=account,
+        token=issued["access_token"],
+        token_secret=issued["refresh_token"],
+        expires_at=timezone.now() + timedelta(seconds=expires_in),
+    )
+
+
+def test_valid_token_is_cached(user, fake_ravelry, backend, django_assert_num_queries):
+    social_token = connect(user, fake_ravelry, expires_in=3600)
+
+    with django_assert_num_queries(1):
+        assert access_token(user.pk) == social_token.token
+    with django_assert_num_queries(0):
+        assert access_token(user.pk) == social_token.token
+    assert backend == []
+
+
+def test_token_cached_in_redis_is_shared(user, fake_ravelry, monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(tokens, "_client", lambda: client)
+    social_token = connect(user, fake_ravelry, expires_in=3600)
+    access_token(user.pk)
+    # Another worker's empty process cache.
+    tokens._tokens.clear()  # noqa: SLF001
+
+    social_token.delete()
+
+    assert access_token(user.pk) == social_token.token
+
+
+def test_expired_token_is_refreshed(user, fake_ravelry, backend):
+    social_token = connect(user, fake_ravelry, expires_in=-10)
+    old_refresh_token = social_token.token_secret
+
+    token = access_token(user.pk)
+
+    social_token.refresh_from_db()
+    assert token == social_token.token
+    assert token in fake_ravelry.tokens
+    assert social_token.token_secret != old_refresh_token
+    assert social_token.expires_at > timezone.now() + timedelta(hours=1)
+
+
+def test_token_near_expiry_is_refreshed_in_background(user, fake_ravelry, backend):
+    social_token = connect(user, fake_ravelry, expires_in=300)
+
+    assert access_token(user.pk) == social_token.token
+
+    (refreshed,) = backend
+    assert refreshed.access_token != social_token.token
+    assert access_token(user.pk) == refreshed.access_token
+
+
+def test_refresh_skipped_when_another_worker_refreshed(user, fake_ravelry, backend):
+    connect(user, fake_ravelry, expires_in=-10)
+    first = refresh(user.pk)
+    issued = len(fake_ravelry.tokens)
+
+    # A second worker that saw the expired token waits for the lock, then
+    # finds the new one instead of spending the used refresh token.
+    assert refresh(user.pk) == first
+    assert len(fake_ravelry.tokens) == issued
+
+
+def test_refresh_without_waiting_skips_when_locked(user, fake_ravelry, monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(tokens, "_client", lambda: client)
+    connect(user, fake_ravelry, expires_in=-10)
+    client.lock(f"ravelry-token-refresh:{user.pk}").acquire()
+
+    assert refresh(user.pk, blocking=False) is None
+
+
+def test_uncommitted_refresh_is_seen_through_redis(user, fake_ravelry, monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(tokens, "_client", lambda: client)
+    social_token = connect(user, fake_ravelry, expires_in=-10)
+    stale = SocialToken.objects.values_list("token", "token_secret").get()
+    first = refresh(user.pk)
+    # As if the refreshing request rolled back.
+    SocialToken.objects.filter(pk=social_token.pk).update(
+        token=stale[0],
+        token_secret=stale[1],
+        expires_at=social_token.expires_at - timedelta(hours=2),
+    )
+    tokens._tokens.clear()  # noqa: SLF001
+    issued = len(fake_ravelry.tokens)
+
+    assert access_token(user.pk) == first.access_token
+    assert refresh(user.pk) == first
+    assert len(fake_ravelry.tokens) == issued
+
+
+def test_rejected_refresh(user, fake_ravelry, backend):
+    social_token = connect(user, fake_ravelry, expires_in=-10)
+    fake_ravelry.refresh_tokens.clear()
+
+    with pytest.raises(TokenError):
+        access_token(user.pk)
+    assert SocialToken.objects.get().token == social_token.token
+
+
+def test_not_connected(user, backend):
+    with pytest.raises(TokenError):
+        access_token(user.pk)
+
+
+def test_invalidate(user, fake_ravelry, backend, django_assert_num_queries):
+    connect(user, fake_ravelry, expires_in=3600)
+    access_token(user.pk)
+
+    invalidate(user.pk)
+
+    with django_assert_num_queries(1):
+        access_token(user.pk)
@@ -0,0 +1,7 @@
+from django.urls import resolve
+from django.urls import reverse
+
+
+def test_sync_progress():
+    assert reverse("ravelry:sync-progress") == "/ravelry/sync/progress/"
+    assert resolve("/ravelry/sync/progress/").view_name == "ravelry:sync-progress"
@@ -0,0 +1,264 @@
+"""
+Ravelry access tokens for API calls, refreshed at most once at a time.
+
+`access_token` looks in this process's memory first, then Redis, and only
+then reads the user's allauth `SocialToken`. Most API calls therefore make no
+query. A token due to expire within `REFRESH_AHEAD` seconds is still
+returned, and a background thread refreshes it. A token within
+`REFRESH_MARGIN` seconds of expiry is refreshed before returning.
+
+Ravelry rotates refresh tokens, so each one works only once. A refresh takes
+a per-account Redis lock. Once it has the lock, it re-reads the latest token
+and skips the refresh if another worker has just done one. So at most one
+refresh per account is in flight across all workers.
+
+Redis also keeps the refreshed token, including the new refresh token. Other
+workers can use it before the request that refreshed it commits, and even if
+that request rolls back. Without Redis, the lock and cache are per process.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextlib import suppress
+from dataclasses import asdict
+from dataclasses import dataclass
+from datetime import timedelta
+from http import HTTPStatus
+
+import redis
+import requests
+from allauth.socialaccount.models import SocialToken
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django_redis import get_redis_connection
+from redis.exceptions import LockError
+
+logger = logging.getLogger(__name__)
+
+PROVIDER = "ravelry"
+REFRESH_MARGIN = 60
+REFRESH_AHEAD = 600
+# Longer than a refresh request can take, so a lock is never lost mid-refresh.
+LOCK_TIMEOUT = 30
+REQUEST_TIMEOUT = 10
+# Keep refreshed tokens in Redis for as long as a refresh token might live.
+REDIS_TTL = 30 * 24 * 60 * 60
+
+
+class TokenError(Exception):
+    """The user has no usable Ravelry token; they must connect Ravelry again."""
+
+
+@dataclass(frozen=True)
+class Token:
+    access_token: str
+    refresh_token: str
+    # Seconds since the epoch, or None if the token does not expire.
+    expires_at: float | None
+
+    def remaining(self) -> float:
+        if self.expires_at is None:
+            return float("inf")
+        return self.expires_at - time.time()
+
+
+_lock = threading.Lock()
+_tokens: dict[int, Token] = {}
+_refreshing: set[int] = set()
+# Used instead of the Redis lock when the cache is not Redis.
+_local_locks: dict[int, threading.Lock] = {}
+
+
+def _client() -> redis.Redis | None:
+    try:
+        return get_redis_connection("default")
+    except NotImplementedError:
+        # Not a django-redis cache, as in development and tests.
+        return None
+
+
+def _cache_key(user_id: int) -> str:
+    return f"ravelry-token:{user_id}"
+
+
+def _stored(user_id: int) -> Token | None:
+    client = _client()
+    if client is None:
+        return None
+    try:
+        stored = client.get(_cache_key(user_id))
+    except redis.RedisError:
+        logger.warning("Could not read the Ravelry token for user %s", user_id)
+        return None
+    return Token(**json.loads(stored)) if stored else None
+
+
+def _store(user_id: int, token: Token):
+    with _lock:
+        _tokens[user_id] = token
+    client = _client()
+    if client is None:
+        return
+    try:
+        client.set(_cache_key(user_id), json.dumps(asdict(token)), ex=REDIS_TTL)
+    except redis.RedisError:
+        logger.warning("Could not cache the Ravelry token for user %s", user_id)
+
+
+def _social_token(user_id: int) -> SocialToken:
+    try:
+        return SocialToken.objects.select_related("app").get(
+            account__user_id=user_id,
+            account__provider=PROVIDER,
+        )
+    except SocialToken.DoesNotExist as error:
+        msg = f"User {user_id} has not connected Ravelry"
+        raise TokenError(msg) from error
+
+
+def _from_model(social_token: SocialToken) -> Token:
+    return Token(
+        social_token.token,
+        social_token.token_secret,
+        social_token.expires_at.timestamp() if social_token.expires_at else None,
+    )
+
+
+def invalidate(user_id: int):
+    """Forget a cached token, e.g. after Ravelry rejects it."""
+    with _lock:
+        _tokens.pop(user_id, None)
+    client = _client()
+    if client is not None:
+        with suppress(redis.RedisError):
+            client.delete(_cache_key(user_id))
+
+
+def access_token(user_id: int) -> str:
+    """Return a current access token for ``user_id``'s Ravelry account."""
+    with _lock:
+        token = _tokens.get(user_id)
+    if token is None or token.remaining() <= REFRESH_MARGIN:
+        token = _stored(user_id)
+        if token is None or token.remaining() <= REFRESH_MARGIN:
+            token = _from_model(_social_token(user_id))
+            if token.remaining() <= REFRESH_MARGIN:
+                token = refresh(user_id)
+        _store(user_id, token)
+    if token.remaining() <= REFRESH_AHEAD:
+        _refresh_in_background(user_id)
+    return token.access_token
+
+
+@contextmanager
+def _refresh_lock(user_id: int, *, blocking: bool) -> Iterator[bool]:
+    client = _client()
+    if client is not None:
+        lock = client.lock(
+            f"ravelry-token-refresh:{user_id}",
+            timeout=LOCK_TIMEOUT,
+            blocking_timeout=LOCK_TIMEOUT,
+        )
+        try:
+            acquired = lock.acquire(blocking=blocking)
+        except redis.RedisError:
+            logger.warning("Could not lock the Ravelry token for user %s", user_id)
+        else:
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    # Fails only if the lock timed out, which it should not.
+                    with suppress(LockError, redis.RedisError):
+                        lock.release()
+            return
+    with _lock:
+        local = _local_locks.setdefault(user_id, threading.Lock())
+    acquired = local.acquire(blocking, LOCK_TIMEOUT if blocking else -1)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            local.release()
+
+
+def _request_refresh(social_token: SocialToken, refresh_token: str) -> Token:
+    app = social_token.app
+    try:
+        response = requests.post(
+            f"{settings.RAVELRY_OAUTH_URL}/token",
+            data={"grant_type": "refresh_token", "refresh_token": refresh_token},
+            auth=(app.client_id, app.secret) if app else None,
+            timeout=REQUEST_TIMEOUT,
+        )
+    except requests.RequestException as error:
+        msg = f"Could not reach Ravelry to refresh a token: {error}"
+        raise TokenError(msg) from error
+    if response.status_code != HTTPStatus.OK:
+        msg = f"Ravelry refused to refresh a token ({response.status_code})"
+        raise TokenError(msg)
+    data = response.json()
+    expires_at = None
+    if "expires_in" in data:
+        expires_at = timezone.now() + timedelta(seconds=data["expires_in"])
+    social_token.token = data["access_token"]
+    social_token.token_secret = data.get("refresh_token", refresh_token)
+    social_token.expires_at = expires_at
+    social_token.save(update_fields=["token", "token_secret", "expires_at"])
+    return _from_model(social_token)
+
+
+def refresh(user_id: int, *, blocking: bool = True) -> Token | None:
+    """
+    Refresh ``user_id``'s token, unless another worker just has.
+
+    Waits for a refresh already in flight, or returns None at once if
+    ``blocking`` is false.
+    """
+    with _refresh_lock(user_id, blocking=blocking) as acquired:
+        if not acquired:
+            if blocking:
+                msg = f"Timed out waiting to refresh user {user_id}'s token"
+                raise TokenError(msg)
+            return None
+        social_token = _social_token(user_id)
+        latest = _from_model(social_token)
+        stored = _stored(user_id)
+        if stored is not None and stored.remaining() > latest.remaining():
+            # Refreshed by a request that has not committed, or rolled back.
+            latest = stored
+        if latest.remaining() > REFRESH_AHEAD:
+            token = latest
+        else:
+            token = _request_refresh(social_token, latest.refresh_token)
+        _store(user_id, token)
+        return token
+
+
+def _background_refresh(user_id: int):
+    try:
+        refresh(user_id, blocking=False)
+    except TokenError:
+        logger.warning("Could not refresh the Ravelry token for user %s", user_id)
+    finally:
+        with _lock:
+            _refreshing.discard(user_id)
+        connection.close()
+
+
+def _refresh_in_background(user_id: int):
+    with _lock:
+        if user_id in _refreshing:
+            return
+        _refreshing.add(user_id)
+    threading.Thread(
+        target=_background_refresh,
+        args=(user_id,),
+        name="ravelry-token-refresh",
+        daemon=True,
+    ).start()
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from .views import sync_progress_view
+
+app_name = "ravelry"
+urlpatterns = [
+    path("sync/progress/", view=sync_progress_view, name="sync-progress"),
+]
@@ -0,0 +1,33 @@
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import HttpResponse
+from django.http import HttpResponseForbidden
+from django.http import StreamingHttpResponse
+
+from .progress import progress_events
+from .progress import sync_running
+
+
+@sync_to_async
+def _authenticated_user_id(request) -> int | None:
+    return request.user.pk if request.user.is_authenticated else None
+
+
+# An async view holding a stream open must not sit inside ATOMIC_REQUESTS.
+@transaction.non_atomic_requests
+async def sync_progress_view(request):
+    """Stream the current user's sync progress as server-sent events."""
+    user_id = await _authenticated_user_id(request)
+    if user_id is None:
+        return HttpResponseForbidden()
+    if not await sync_to_async(sync_running)(user_id):
+        # No Content tells EventSource not to reconnect.
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(
+        progress_events(user_id),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    # Tell nginx not to buffer the stream.
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -1 +1,59 @@
 /* Project specific Javascript goes here. */
+
+// Offline support: see templates/sw.js.
+if ('serviceWorker' in navigator) {
+  window.addEventListener('load', () => {
+    navigator.serviceWorker.register('/sw.js');
+  });
+}
+
+// Live sync progress: an element with data-sync-progress-url listens to the
+// server-sent events stream at that URL and fills in its descendants marked
+// data-sync-field="<event key>". It stays hidden until the first event.
+document.addEventListener('DOMContentLoaded', () => {
+  document
+    .querySelectorAll('[data-sync-progress-url]')
+    .forEach((container) => {
+      const source = new EventSource(container.dataset.syncProgressUrl);
+      source.addEventListener('progress', (message) => {
+        const event = JSON.parse(message.data);
+        container.hidden = false;
+        Object.entries(event).forEach(([key, value]) => {
+          container
+            .querySelectorAll(`[data-sync-field="${key}"]`)
+            .forEach((field) => {
+              field.textContent = value;
+            });
+        });
+        if (event.state === 'finished' || event.state === 'failed') {
+          // Otherwise EventSource reconnects when the server ends the stream.
+          source.close();
+        }
+      });
+    });
+});
+
+// Row counter: buttons with data-row-step inside an element with
+// data-row-counter-url POST the step there and show the returned count in
+// data-row-count. The CSRF token comes from the form the buttons sit in.
+document.addEventListener('DOMContentLoaded', () => {
+  document
+    .querySelectorAll('[data-row-counter-url]')
+    .forEach((counter) => {
+      const count = counter.querySelector('[data-row-count]');
+      const token = counter.querySelector('[name=csrfmiddlewaretoken]').value;
+      counter.querySelectorAll('[data-row-step]').forEach((button) => {
+        button.addEventListener('click', async (event) => {
+          event.preventDefault();
+          const response = await fetch(counter.dataset.rowCounterUrl, {
+            method: 'POST',
+            headers: { Accept: 'application/json', 'X-CSRFToken': token },
+            body: new URLSearchParams({ by: button.dataset.rowStep }),
+          });
+          if (response.ok) {
+            count.textContent = (await response.json()).rows;
+          }
+        });
+      });
+    });
+});
@@ -0,0 +1,100 @@
+/*
+ * Service worker: keeps static files, and the library pages the server lists
+ * in OFFLINE_PAGES, usable without a connection. Cached pages belong to the
+ * signed-in user, so they are dropped when the user signs out.
+ */
+const VERSION = '{{ version }}';
+const STATIC_CACHE = `static-${VERSION}`;
+const PAGE_CACHE = `pages-${VERSION}`;
+const STATIC_URL = '{{ static_url }}';
+// Hashed static names never change content, so they can be served from cache.
+const IMMUTABLE_STATIC = {{ immutable_static|yesno:"true,false" }};
+const PRECACHE = {{ precache|safe }};
+// Pages, and the pages under them, that are cached for reading offline.
+const OFFLINE_PAGES = {{ offline_pages|safe }};
+const LOGOUT_URL = '{{ logout_url }}';
+
+self.addEventListener('install', (event) => {
+  event.waitUntil(
+    caches
+      .open(STATIC_CACHE)
+      .then((cache) => cache.addAll(PRECACHE))
+      .then(() => self.skipWaiting()),
+  );
+});
+
+self.addEventListener('activate', (event) => {
+  const current = [STATIC_CACHE, PAGE_CACHE];
+  event.waitUntil(
+    caches
+      .keys()
+      .then((names) =>
+        Promise.all(
+          names
+            .filter((name) => !current.includes(name))
+            .map((name) => caches.delete(name)),
+        ),
+      )
+      .then(() => self.clients.claim()),
+  );
+});
+
+const cacheFirst = async (request) => {
+  const cached = await caches.match(request);
+  if (cached) {
+    return cached;
+  }
+  const response = await fetch(request);
+  if (response.ok) {
+    const cache = await caches.open(STATIC_CACHE);
+    cache.put(request, response.clone());
+  }
+  return response;
+};
+
+// Only HTML is kept from the offline pages, not files downloaded from them.
+const isPage = (response) =>
+  (response.headers.get('Content-Type') || '').startsWith('text/html');
+
+const networkFirst = async (request, cacheName, shouldCache = () => true) => {
+  try {
+    const response = await fetch(request);
+    // A redirect, such as to the sign-in page, is not the page asked for.
+    if (response.ok && !response.redirected && shouldCache(response)) {
+      const cache = await caches.open(cacheName);
+      cache.put(request, response.clone());
+    }
+    return response;
+  } catch (error) {
+    const cached = await caches.match(request);
+    if (cached) {
+      return cached;
+    }
+    throw error;
+  }
+};
+
+self.addEventListener('fetch', (event) => {
+  const { request } = event;
+  const url = new URL(request.url);
+  if (url.origin !== self.location.origin) {
+    return;
+  }
+  if (request.method === 'POST' && url.pathname === LOGOUT_URL) {
+    event.waitUntil(caches.delete(PAGE_CACHE));
+    return;
+  }
+  if (request.method !== 'GET') {
+    return;
+  }
+  if (url.pathname.startsWith(STATIC_URL)) {
+    event.respondWith(
+      IMMUTABLE_STATIC ? cacheFirst(request) : networkFirst(request, STATIC_CACHE),
+    );
+  } else if (
+    request.mode === 'navigate' &&
+    OFFLINE_PAGES.some((prefix) => url.pathname.startsWith(prefix))
+  ) {
+    event.respondWith(networkFirst(request, PAGE_CACHE, isPage));
+  }
+});
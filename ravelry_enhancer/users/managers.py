@@ -1,10 +1,62 @@
+import os
+from collections.abc import Iterable
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from enum import StrEnum
 from typing import TYPE_CHECKING
+from typing import Any
 
+import django
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import UserManager as DjangoUserManager
+from django.db import IntegrityError
+from django.db import transaction
 
 if TYPE_CHECKING:
-    from .models import User  # noqa: F401
+    from .models import User
+
+
+class BulkUserStatus(StrEnum):
+    CREATED = "created"
+    DUPLICATE = "duplicate"
+    INVALID = "invalid"
+
+
+@dataclass
+class BulkUserResult:
+    """Outcome of one input row passed to `UserManager.bulk_create_users`."""
+
+    row: int
+    email: str
+    status: BulkUserStatus
+    user: "User | None" = None
+    error: str = ""
+
+
+def _setup_hasher_process():
+    # Spawned workers start without app registry or settings loaded.
+    django.setup()
+
+
+def _hash_passwords(
+    passwords: list[str],
+    hasher: str,
+    workers: int | None,
+) -> list[str]:
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(passwords) < workers:
+        return [make_password(password, hasher=hasher) for password in passwords]
+    with ProcessPoolExecutor(workers, initializer=_setup_hasher_process) as pool:
+        return list(
+            pool.map(
+                make_password,
+                passwords,
+                [None] * len(passwords),
+                [hasher] * len(passwords),
+                chunksize=max(1, len(passwords) // (workers * 4)),
+            ),
+        )
 
 
 class UserManager(DjangoUserManager["User"]):
@@ -40,3 +92,103 @@ class UserManager(DjangoUserManager["User"]):
             raise ValueError(msg)
 
         return self._create_user(email, password, **extra_fields)
+
+    def bulk_create_users(
+        self,
+        rows: Iterable[Mapping[str, Any]],
+        *,
+        batch_size: int = 1000,
+        workers: int | None = None,
+        hasher: str = "default",
+    ) -> list[BulkUserResult]:
+        """
+        Create many users at once and report what happened to each input row.
+
+        Each row needs an ``email`` and may carry a ``password`` plus any other
+        ``User`` field. Emails are normalised as in `create_user`; rows whose
+        email already exists, or repeats an earlier row, are reported as
+        duplicates instead of raising. Passwords are hashed in a pool of
+        ``workers`` processes (``None`` means one per CPU) and users are
+        inserted ``batch_size`` at a time.
+
+        For load-test seeding pass ``hasher="md5"``; the default hasher is
+        deliberately slow.
+        """
+        results: list[BulkUserResult] = []
+        pending: list[BulkUserResult] = []
+        passwords: list[str] = []
+        seen: set[str] = set()
+        for index, row in enumerate(rows):
+            extra_fields = dict(row)
+            email = self.normalize_email(extra_fields.pop("email", None) or "")
+            password = extra_fields.pop("password", None)
+            if not email:
+                results.append(
+                    BulkUserResult(
+                        index,
+                        email,
+                        BulkUserStatus.INVALID,
+                        error="The given email must be set",
+                    ),
+                )
+                continue
+            if email in seen:
+                results.append(BulkUserResult(index, email, BulkUserStatus.DUPLICATE))
+                continue
+            seen.add(email)
+            extra_fields.setdefault("is_staff", False)
+            extra_fields.setdefault("is_superuser", False)
+            result = BulkUserResult(
+                index,
+                email,
+                BulkUserStatus.CREATED,
+                user=self.model(email=email, **extra_fields),
+            )
+            results.append(result)
+            pending.append(result)
+            passwords.append(password)
+
+        existing = set(
+            self.filter(email__in=seen).values_list("email", flat=True),
+        )
+        new_pending, new_passwords = [], []
+        for result, password in zip(pending, passwords, strict=True):
+            if result.email in existing:
+                result.status = BulkUserStatus.DUPLICATE
+                result.user = None
+            else:
+                new_pending.append(result)
+                new_passwords.append(password)
+        pending, passwords = new_pending, new_passwords
+
+        # Unusable passwords are cheap random strings; only real ones go to the pool.
+        to_hash = [index for index, password in enumerate(passwords) if password]
+        hashed = _hash_passwords([passwords[i] for i in to_hash], hasher, workers)
+        for index, password in zip(to_hash, hashed, strict=True):
+            pending[index].user.password = password
+        for index, password in enumerate(passwords):
+            if not password:
+                pending[index].user.password = make_password(None)
+
+        for start in range(0, len(pending), batch_size):
+            self._bulk_insert_batch(pending[start : start + batch_size])
+        return results
+
+    def _bulk_insert_batch(self, batch: list[BulkUserResult]):
+        try:
+            with transaction.atomic(using=self.db):
+                self.bulk_create([result.user for result in batch])
+        except IntegrityError:
+            # Another writer took some of these emails since we checked.
+            taken = set(
+                self.filter(
+                    email__in=[result.email for result in batch],
+                ).values_list("email", flat=True),
+            )
+            for result in batch:
+                if result.email in taken:
+                    result.status = BulkUserStatus.DUPLICATE
+                    result.user = None
+            self.bulk_create(
+                [result.user for result in batch if result.email not in taken],
+            )
@@ -5,6 +5,7 @@ from importlib import reload
 import pytest
 from django.contrib import admin
 from django.contrib.auth.models import AnonymousUser
+from django.db import connection
 from django.urls import reverse
 from pytest_django.asserts import assertRedirects
 
@@ -22,6 +23,24 @@ class TestUserAdmin:
         response = admin_client.get(url, data={"q": "test"})
         assert response.status_code == HTTPStatus.OK
 
+    def test_search_uses_trigram_indexes(self, admin_client, rf):
+        request = rf.get("/fake-url/")
+        request.user = User.objects.get(email="admin@example.com")
+        model_admin = admin.site._registry[User]  # noqa: SLF001
+        queryset, _ = model_admin.get_search_results(
+            request,
+            User.objects.all(),
+            "knit",
+        )
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {sql}", params)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+
+        assert "users_user_name_trgm" in plan
+        assert "users_user_email_trgm" in plan
+
     def test_add(self, admin_client):
         url = reverse("admin:users_user_add")
         response = admin_client.get(url)
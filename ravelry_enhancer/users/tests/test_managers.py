@@ -3,6 +3,7 @@ from io import StringIO
 import pytest
 from django.core.management import call_command
 
+from ravelry_enhancer.users.managers import BulkUserStatus
 from ravelry_enhancer.users.models import User
 
 
@@ -37,6 +38,71 @@ class TestUserManager:
         assert user.username is None
 
 
+@pytest.mark.django_db()
+class TestBulkCreateUsers:
+    def test_creates_users(self):
+        results = User.objects.bulk_create_users(
+            [
+                {"email": "ann@EXAMPLE.com", "password": "something-r@nd0m!"},
+                {"email": "bob@example.com", "name": "Bob"},
+            ],
+            workers=1,
+        )
+
+        assert [result.status for result in results] == [
+            BulkUserStatus.CREATED,
+            BulkUserStatus.CREATED,
+        ]
+        ann = User.objects.get(email="ann@example.com")
+        assert ann.check_password("something-r@nd0m!")
+        assert not ann.is_staff
+        bob = User.objects.get(email="bob@example.com")
+        assert bob.name == "Bob"
+        assert not bob.has_usable_password()
+        assert results[1].user == bob
+
+    def test_reports_duplicates_and_invalid_rows(self, user: User):
+        results = User.objects.bulk_create_users(
+            [
+                {"email": user.email},
+                {"email": "new@example.com"},
+                {"email": "new@example.com"},
+                {"email": ""},
+            ],
+            workers=1,
+        )
+
+        assert [(result.row, result.status) for result in results] == [
+            (0, BulkUserStatus.DUPLICATE),
+            (1, BulkUserStatus.CREATED),
+            (2, BulkUserStatus.DUPLICATE),
+            (3, BulkUserStatus.INVALID),
+        ]
+        assert results[3].error == "The given email must be set"
+        assert User.objects.filter(email="new@example.com").count() == 1
+
+    def test_batches_inserts(self, django_assert_num_queries):
+        rows = [{"email": f"user{i}@example.com"} for i in range(5)]
+
+        # One duplicate check, then three INSERTs each in its own savepoint.
+        with django_assert_num_queries(1 + 3 * 3):
+            User.objects.bulk_create_users(rows, batch_size=2, workers=1)
+
+        emails = [row["email"] for row in rows]
+        assert User.objects.filter(email__in=emails).count() == len(rows)
+
+    def test_hashes_in_process_pool(self):
+        rows = [
+            {"email": f"user{i}@example.com", "password": f"p@ssw0rd-{i}"}
+            for i in range(4)
+        ]
+
+        User.objects.bulk_create_users(rows, workers=2)
+
+        user = User.objects.get(email="user3@example.com")
+        assert user.check_password("p@ssw0rd-3")
+
+
 @pytest.mark.django_db()
 def test_createsuperuser_command():
     """Ensure createsuperuser command works with our custom manager."""
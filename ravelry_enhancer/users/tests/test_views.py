@@ -12,6 +12,7 @@ from django.test import RequestFactory
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
+from ravelry_enhancer.library.models import StashImport
 from ravelry_enhancer.users.forms import UserAdminChangeForm
 from ravelry_enhancer.users.models import User
 from ravelry_enhancer.users.tests.factories import UserFactory
@@ -90,6 +91,18 @@ class TestUserDetailView:
 
         assert response.status_code == HTTPStatus.OK
 
+    def test_progress_stream_only_while_syncing(self, user: User, rf: RequestFactory):
+        request = rf.get("/fake-url/")
+        request.user = user
+        progress_url = reverse("ravelry:sync-progress")
+
+        response = user_detail_view(request, pk=user.pk).render()
+        assert progress_url not in response.content.decode()
+
+        StashImport.objects.create(user=user, file="stash.csv")
+        response = user_detail_view(request, pk=user.pk).render()
+        assert progress_url in response.content.decode()
+
     def test_not_authenticated(self, user: User, rf: RequestFactory):
         request = rf.get("/fake-url/")
         request.user = AnonymousUser()
@@ -6,6 +6,7 @@ from django.views.generic import DetailView
 from django.views.generic import RedirectView
 from django.views.generic import UpdateView
 
+from ravelry_enhancer.ravelry.progress import sync_running
 from ravelry_enhancer.users.models import User
 
 
@@ -14,6 +15,13 @@ class UserDetailView(LoginRequiredMixin, DetailView):
     slug_field = "id"
     slug_url_kwarg = "id"
 
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(
+            sync_running=self.object == self.request.user
+            and sync_running(self.object.pk),
+            **kwargs,
+        )
+
 
 user_detail_view = UserDetailView.as_view()
 
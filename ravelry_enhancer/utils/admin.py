@@ -0,0 +1,14 @@
+from .pagination import EstimatedCountPaginator
+
+
+class LargeTableAdminMixin:
+    """
+    ModelAdmin mixin for tables that grow past what an exact count can serve.
+
+    Pair it with trigram GIN indexes on the ``search_fields`` (see the
+    ``users_user`` indexes) so that admin search can avoid sequential scans.
+    """
+
+    paginator = EstimatedCountPaginator
+    # Skip the second, unfiltered COUNT(*) the changelist runs while searching.
+    show_full_result_count = False
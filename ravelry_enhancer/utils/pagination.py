@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that trusts the planner's row estimate for large, unfiltered tables.
+
+    An exact ``COUNT(*)`` is a full scan in Postgres. When the queryset has no
+    filters and ``pg_class.reltuples`` is above
+    ``settings.ESTIMATED_COUNT_THRESHOLD`` the estimate is used instead; filtered
+    querysets and small tables still get an exact count.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        estimate = self._estimated_count()
+        if estimate is not None:
+            return estimate
+        return super().count
+
+    def _estimated_count(self) -> int | None:
+        query = getattr(self.object_list, "query", None)
+        if query is None or query.where or query.distinct or query.combinator:
+            return None
+        connection = connections[self.object_list.db]
+        if connection.vendor != "postgresql":
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [query.model._meta.db_table],  # noqa: SLF001
+            )
+            row = cursor.fetchone()
+        # reltuples is -1 until the table has been vacuumed or analyzed.
+        if row is None or row[0] < settings.ESTIMATED_COUNT_THRESHOLD:
+            return None
+        return row[0]
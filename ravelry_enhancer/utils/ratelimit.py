@@ -0,0 +1,237 @@
+"""
+Rate limits for expensive views, shared across processes through Redis.
+
+Budgets live in ``settings.RATE_LIMITS``, keyed by scope::
+
+    RATE_LIMITS = {"pattern-download": {"client": "30/m", "global": "600/m"}}
+
+``client`` is per signed-in user, or per IP address for anonymous requests.
+``global`` is shared by everyone. Either may be left out. Scopes missing
+from the setting are not limited.
+
+Each limit is a sliding window. The count for the current fixed window is
+added to the previous window's count, weighted by how much of the previous
+window is still inside the sliding one. One Lua script checks and bumps every
+limit for a request in a single round trip. If the cache is not Redis, or
+Redis is down, limits are kept per process instead. This matches the cache's
+``IGNORE_EXCEPTIONS`` behaviour: the site degrades rather than failing.
+"""
+
+import math
+import threading
+import time
+from dataclasses import dataclass
+from functools import cache
+from functools import wraps
+from http import HTTPStatus
+
+import redis
+from django.conf import settings
+from django.http import HttpResponse
+from django_redis import get_redis_connection
+from redis.commands.core import Script
+
+from ravelry_enhancer.monitoring.metrics import RATE_LIMITED_REQUESTS
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# KEYS: current and previous window counters for each limit, in pairs.
+# ARGV: now in ms, then the count allowed and the window in ms for each limit.
+# Returns 0 if the request is allowed, else the ms to wait before retrying.
+_SLIDING_WINDOW = """
+local now = tonumber(ARGV[1])
+local wait = 0
+for i = 1, #KEYS / 2 do
+    local limit = tonumber(ARGV[i * 2])
+    local period = tonumber(ARGV[i * 2 + 1])
+    local current = tonumber(redis.call('GET', KEYS[i * 2 - 1]) or '0')
+    local previous = tonumber(redis.call('GET', KEYS[i * 2]) or '0')
+    local elapsed = now % period
+    local weight = 1 - elapsed / period
+    if previous * weight + current >= limit then
+        local until_allowed
+        if current >= limit then
+            until_allowed = period - elapsed + period * (1 - limit / current)
+        else
+            until_allowed = period * (1 - (limit - current) / previous) - elapsed
+        end
+        wait = math.max(wait, until_allowed, 1)
+    end
+end
+if wait > 0 then
+    return math.ceil(wait)
+end
+for i = 1, #KEYS / 2 do
+    redis.call('INCR', KEYS[i * 2 - 1])
+    redis.call('PEXPIRE', KEYS[i * 2 - 1], tonumber(ARGV[i * 2 + 1]) * 2)
+end
+return 0
+"""
+
+
+@dataclass(frozen=True)
+class Limit:
+    key: str
+    count: int
+    period_ms: int
+
+    @classmethod
+    def parse(cls, key: str, rate: str) -> "Limit":
+        """Build a limit from a rate such as ``"30/m"`` or ``"1000/h"``."""
+        count, _, period = rate.partition("/")
+        try:
+            limit = cls(key, int(count), PERIODS[period] * 1000)
+        except (KeyError, ValueError) as error:
+            msg = f"Invalid rate {rate!r}; expected e.g. '30/m'"
+            raise ValueError(msg) from error
+        if limit.count < 1:
+            msg = f"Invalid rate {rate!r}; allow at least one request"
+            raise ValueError(msg)
+        return limit
+
+    def window_keys(self, now_ms: int) -> tuple[str, str]:
+        window = now_ms // self.period_ms
+        return f"{self.key}:{window}", f"{self.key}:{window - 1}"
+
+
+def _retry_after_ms(limit: Limit, current: int, previous: int, now_ms: int) -> float:
+    elapsed = now_ms % limit.period_ms
+    if previous * (1 - elapsed / limit.period_ms) + current < limit.count:
+        return 0
+    if current >= limit.count:
+        # Wait out this window, then until enough of it has slid away.
+        return limit.period_ms - elapsed + limit.period_ms * (1 - limit.count / current)
+    return limit.period_ms * (1 - (limit.count - current) / previous) - elapsed
+
+
+class LocalLimiter:
+    """The sliding-window algorithm of the Lua script, for one process."""
+
+    # Above this many keys, forget those not counted in the last two windows.
+    MAX_KEYS = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Limit key -> (window number, count in it, count in the one before).
+        self._windows: dict[str, tuple[int, int, int]] = {}
+        self._periods: dict[str, int] = {}
+
+    def _counts(self, limit: Limit, now_ms: int) -> tuple[int, int]:
+        window = now_ms // limit.period_ms
+        seen, current, previous = self._windows.get(limit.key, (window, 0, 0))
+        if seen == window:
+            return current, previous
+        if seen == window - 1:
+            return 0, current
+        return 0, 0
+
+    def _prune(self, now_ms: int):
+        for key, (window, _, _) in list(self._windows.items()):
+            if window < now_ms // self._periods[key] - 1:
+                del self._windows[key]
+                del self._periods[key]
+
+    def hit(self, limits: list[Limit], now_ms: int) -> int:
+        with self._lock:
+            counts = [self._counts(limit, now_ms) for limit in limits]
+            wait = max(
+                _retry_after_ms(limit, current, previous, now_ms)
+                for limit, (current, previous) in zip(limits, counts, strict=True)
+            )
+            if wait:
+                return math.ceil(max(wait, 1))
+            if len(self._windows) > self.MAX_KEYS:
+                self._prune(now_ms)
+            for limit, (current, previous) in zip(limits, counts, strict=True):
+                window = now_ms // limit.period_ms
+                self._windows[limit.key] = (window, current + 1, previous)
+                self._periods[limit.key] = limit.period_ms
+            return 0
+
+
+_local = LocalLimiter()
+
+
+def _client() -> redis.Redis | None:
+    try:
+        return get_redis_connection("default")
+    except NotImplementedError:
+        # Not a django-redis cache, as in development and tests.
+        return None
+
+
+@cache
+def _script(client: redis.Redis) -> Script:
+    return client.register_script(_SLIDING_WINDOW)
+
+
+def _hit_redis(client: redis.Redis, limits: list[Limit], now_ms: int) -> int:
+    keys = []
+    args = [now_ms]
+    for limit in limits:
+        keys.extend(limit.window_keys(now_ms))
+        args.extend([limit.count, limit.period_ms])
+    return _script(client)(keys=keys, args=args, client=client)
+
+
+def client_id(request) -> str:
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+def limits_for(scope: str, request) -> list[Limit]:
+    budget = settings.RATE_LIMITS.get(scope, {})
+    limits = []
+    if "client" in budget:
+        key = f"ratelimit:{scope}:{client_id(request)}"
+        limits.append(Limit.parse(key, budget["client"]))
+    if "global" in budget:
+        limits.append(Limit.parse(f"ratelimit:{scope}", budget["global"]))
+    return limits
+
+
+def check_rate_limit(scope: str, request) -> int:
+    """Count a request against ``scope``; return the seconds to wait, or 0."""
+    limits = limits_for(scope, request)
+    if not limits:
+        return 0
+    now_ms = int(time.time() * 1000)
+    client = _client()
+    if client is None:
+        wait_ms = _local.hit(limits, now_ms)
+    else:
+        try:
+            wait_ms = _hit_redis(client, limits, now_ms)
+        except redis.RedisError:
+            wait_ms = _local.hit(limits, now_ms)
+    return math.ceil(wait_ms / 1000)
+
+
+def ratelimit(scope: str, methods: tuple[str, ...] | None = None):
+    """
+    Answer 429 Too Many Requests, with ``Retry-After``, once a view's budget
+    in ``settings.RATE_LIMITS[scope]`` is spent.
+
+    Only requests whose method is in ``methods`` count, if given.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if methods is None or request.method in methods:
+                retry_after = check_rate_limit(scope, request)
+                if retry_after:
+                    RATE_LIMITED_REQUESTS.labels(scope).inc()
+                    response = HttpResponse(
+                        "Too many requests; please try again later.",
+                        content_type="text/plain",
+                        status=HTTPStatus.TOO_MANY_REQUESTS,
+                    )
+                    response["Retry-After"] = str(retry_after)
+                    return response
+            return view(request, *args, **kwargs)
+
+        return wrapped
+
+    return decorator
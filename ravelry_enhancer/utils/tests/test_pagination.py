@@ -0,0 +1,51 @@
+import pytest
+from django.db import connection
+
+from ravelry_enhancer.users.models import User
+from ravelry_enhancer.users.tests.factories import UserFactory
+from ravelry_enhancer.utils.pagination import EstimatedCountPaginator
+
+pytestmark = pytest.mark.django_db
+
+
+def _analyze_users():
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE users_user")
+
+
+class TestEstimatedCountPaginator:
+    def test_small_table_uses_exact_count(self, settings):
+        settings.ESTIMATED_COUNT_THRESHOLD = 10_000
+        UserFactory.create_batch(3)
+        _analyze_users()
+
+        paginator = EstimatedCountPaginator(User.objects.order_by("id"), 2)
+
+        assert paginator.count == User.objects.count()
+
+    def test_large_table_uses_estimate(self, settings, django_assert_num_queries):
+        settings.ESTIMATED_COUNT_THRESHOLD = 1
+        UserFactory.create_batch(3)
+        _analyze_users()
+
+        expected = User.objects.count()
+        paginator = EstimatedCountPaginator(User.objects.order_by("id"), 2)
+
+        with django_assert_num_queries(1) as captured:
+            assert paginator.count == expected
+        assert "reltuples" in captured[0]["sql"]
+
+    def test_filtered_queryset_uses_exact_count(self, settings):
+        settings.ESTIMATED_COUNT_THRESHOLD = 1
+        users = UserFactory.create_batch(3)
+        _analyze_users()
+
+        paginator = EstimatedCountPaginator(
+            User.objects.filter(pk=users[0].pk).order_by("id"),
+            2,
+        )
+
+        assert paginator.count == 1
+
+    def test_plain_list(self):
+        assert EstimatedCountPaginator([1, 2, 3], 2).count == 3  # noqa: PLR2004
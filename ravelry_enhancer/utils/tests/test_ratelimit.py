@@ -0,0 +1,130 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory
+from fakeredis import FakeRedis
+from fakeredis import FakeServer
+
+from ravelry_enhancer.users.tests.factories import UserFactory
+from ravelry_enhancer.utils import ratelimit as ratelimit_module
+from ravelry_enhancer.utils.ratelimit import Limit
+from ravelry_enhancer.utils.ratelimit import LocalLimiter
+from ravelry_enhancer.utils.ratelimit import check_rate_limit
+from ravelry_enhancer.utils.ratelimit import ratelimit
+
+# The start of an hour, so tests control where in the window they are.
+START = 1_699_999_200.0
+
+
+@pytest.fixture(params=["redis", "local", "redis down"])
+def backend(request, monkeypatch):
+    if request.param == "redis":
+        client = FakeRedis()
+    elif request.param == "redis down":
+        server = FakeServer()
+        server.connected = False
+        client = FakeRedis(server=server)
+    else:
+        client = None
+    monkeypatch.setattr(ratelimit_module, "_client", lambda: client)
+    monkeypatch.setattr(ratelimit_module, "_local", LocalLimiter())
+    return request.param
+
+
+@pytest.fixture()
+def clock(monkeypatch):
+    now = [START]
+    monkeypatch.setattr(ratelimit_module.time, "time", lambda: now[0])
+    return now
+
+
+def make_request(user=None, method="get", address="10.0.0.1"):
+    request = getattr(RequestFactory(), method)("/", REMOTE_ADDR=address)
+    request.user = user or AnonymousUser()
+    return request
+
+
+@pytest.mark.parametrize(
+    ("rate", "expected"),
+    [("30/m", (30, 60_000)), ("1000/h", (1000, 3_600_000)), ("5/s", (5, 1000))],
+)
+def test_parse_rate(rate, expected):
+    limit = Limit.parse("key", rate)
+
+    assert (limit.count, limit.period_ms) == expected
+
+
+@pytest.mark.parametrize("rate", ["30", "30/w", "many/m", "0/m"])
+def test_parse_invalid_rate(rate):
+    with pytest.raises(ValueError, match="Invalid rate"):
+        Limit.parse("key", rate)
+
+
+def test_sliding_window(backend, clock, settings):
+    settings.RATE_LIMITS = {"search": {"client": "4/m"}}
+    request = make_request()
+
+    assert [check_rate_limit("search", request) for _ in range(4)] == [0, 0, 0, 0]
+    # Blocked until the window ends and enough of it has slid past.
+    assert check_rate_limit("search", request) == 60  # noqa: PLR2004
+
+    # A third of the way into the next minute, the last one's four requests
+    # still count for two thirds of that.
+    clock[0] += 80
+    assert check_rate_limit("search", request) == 0
+    assert check_rate_limit("search", request) == 0
+    assert check_rate_limit("search", request) == 10  # noqa: PLR2004
+
+    clock[0] += 11
+    assert check_rate_limit("search", request) == 0
+
+
+def test_clients_have_separate_budgets(backend, clock, settings):
+    settings.RATE_LIMITS = {"search": {"client": "1/m"}}
+
+    assert check_rate_limit("search", make_request(address="10.0.0.1")) == 0
+    assert check_rate_limit("search", make_request(address="10.0.0.2")) == 0
+    assert check_rate_limit("search", make_request(address="10.0.0.1"))
+
+
+@pytest.mark.django_db()
+def test_global_budget_is_shared(backend, clock, settings):
+    settings.RATE_LIMITS = {"export": {"client": "5/m", "global": "2/m"}}
+
+    assert check_rate_limit("export", make_request(UserFactory())) == 0
+    assert check_rate_limit("export", make_request(UserFactory())) == 0
+    assert check_rate_limit("export", make_request(UserFactory()))
+
+
+def test_unconfigured_scope_is_not_limited(backend, settings):
+    settings.RATE_LIMITS = {}
+
+    assert all(check_rate_limit("search", make_request()) == 0 for _ in range(100))
+
+
+class TestRatelimitDecorator:
+    @pytest.fixture(autouse=True)
+    def _budget(self, backend, clock, settings):
+        settings.RATE_LIMITS = {"upload": {"client": "1/h"}}
+
+    def test_too_many_requests(self):
+        view = ratelimit("upload")(lambda request: HttpResponse("ok"))
+
+        assert view(make_request()).status_code == HTTPStatus.OK
+        response = view(make_request())
+
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+        assert response["Retry-After"] == "3600"
+
+    def test_only_counts_given_methods(self):
+        view = ratelimit("upload", methods=("POST",))(
+            lambda request: HttpResponse("ok"),
+        )
+
+        assert view(make_request()).status_code == HTTPStatus.OK
+        assert view(make_request()).status_code == HTTPStatus.OK
+        assert view(make_request(method="post")).status_code == HTTPStatus.OK
+        response = view(make_request(method="post"))
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
@@ -0,0 +1,39 @@
+from http import HTTPStatus
+
+from django.urls import reverse
+
+from ravelry_enhancer.utils import views
+
+
+def test_service_worker_in_development(client):
+    response = client.get(reverse("service-worker"))
+
+    assert response.status_code == HTTPStatus.OK
+    assert response["Content-Type"] == "application/javascript"
+    assert response["Cache-Control"] == "no-cache"
+    content = response.content.decode()
+    assert "const VERSION = 'dev';" in content
+    assert "const IMMUTABLE_STATIC = false;" in content
+    assert '"/static/js/project.js"' in content
+
+
+def test_service_worker_versioned_by_manifest(client, monkeypatch):
+    monkeypatch.setattr(
+        views.staticfiles_storage,
+        "manifest_hash",
+        "abc123",
+        raising=False,
+    )
+
+    content = client.get(reverse("service-worker")).content.decode()
+
+    assert "const VERSION = 'abc123';" in content
+    assert "const IMMUTABLE_STATIC = true;" in content
+
+
+def test_service_worker_caches_only_library_pages(client, settings):
+    content = client.get(reverse("service-worker")).content.decode()
+
+    assert f'"{reverse("library:projects")}"' in content
+    assert f"const LOGOUT_URL = '{reverse('account_logout')}';" in content
+    assert settings.ADMIN_URL not in content
@@ -0,0 +1,13 @@
+import pytest
+from django.urls import get_resolver
+
+from ravelry_enhancer.utils.warmup import warm_process
+
+
+@pytest.mark.django_db()
+def test_warm_process_loads_urls_and_templates():
+    loaded = warm_process()
+
+    assert loaded["urls"] == len(get_resolver().reverse_dict)
+    assert loaded["urls"] > 0
+    assert loaded["templates"] > 0
@@ -0,0 +1,52 @@
+import json
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db import transaction
+from django.shortcuts import render
+from django.templatetags.static import static
+from django.urls import reverse
+from django.views.decorators.http import require_GET
+
+# Fetched by the service worker on install so pages render offline.
+PRECACHED_STATIC = [
+    "css/project.css",
+    "js/project.js",
+    "images/favicons/favicon.ico",
+]
+# URL names of the only pages kept for offline reading, with the pages under
+# them. Nothing else, the admin and account pages included, is ever cached.
+OFFLINE_PAGES = [
+    "library:projects",
+    "library:patterns",
+    "library:needles",
+    "library:queue",
+]
+
+
+@require_GET
+@transaction.non_atomic_requests
+def service_worker_view(request):
+    """
+    Serve the service worker from the site root so its scope covers every page.
+
+    The cache version is the staticfiles manifest hash, so each deploy that
+    changes a static file retires the previous caches. Without a manifest (in
+    development) static files are not treated as immutable.
+    """
+    manifest_hash = getattr(staticfiles_storage, "manifest_hash", "")
+    response = render(
+        request,
+        "sw.js",
+        {
+            "version": manifest_hash or "dev",
+            "immutable_static": bool(manifest_hash),
+            "static_url": static(""),
+            "precache": json.dumps([static(path) for path in PRECACHED_STATIC]),
+            "offline_pages": json.dumps([reverse(name) for name in OFFLINE_PAGES]),
+            "logout_url": reverse("account_logout"),
+        },
+        content_type="application/javascript",
+    )
+    # Browsers must always see a new worker promptly after a deploy.
+    response["Cache-Control"] = "no-cache"
+    return response
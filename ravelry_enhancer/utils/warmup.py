@@ -0,0 +1,60 @@
+"""
+Work a fresh worker process would otherwise do while answering its first
+requests.
+
+Django builds the URL resolver, compiles templates and imports most modules
+(compiling their regexes) lazily, on first use. Gunicorn's
+``post_worker_init`` hook calls `warm_process` after the application is loaded
+and before the worker accepts connections, so none of that lands on a user.
+"""
+
+import logging
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db import connection
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.urls import get_resolver
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+
+def _template_names() -> list[str]:
+    names = []
+    for directory in map(Path, settings.TEMPLATES[0]["DIRS"]):
+        names.extend(
+            path.relative_to(directory).as_posix()
+            for path in sorted(directory.rglob("*.html"))
+        )
+    return names
+
+
+def warm_process() -> dict[str, int]:
+    """Populate this process's lazy caches; return what was loaded."""
+    start = time.monotonic()
+    resolver = get_resolver()
+    # Imports every view module, and so the module-level regexes they use.
+    resolver.reverse_dict  # noqa: B018
+    templates = 0
+    for name in _template_names():
+        try:
+            get_template(name)
+        except TemplateDoesNotExist:
+            continue
+        templates += 1
+    translation.activate(settings.LANGUAGE_CODE)
+    try:
+        connection.ensure_connection()
+    except DatabaseError:
+        logger.warning("Warm-up could not connect to the database")
+    logger.info(
+        "Warmed worker: %d URL patterns, %d templates in %.2fs",
+        len(resolver.reverse_dict),
+        templates,
+        time.monotonic() - start,
+    )
+    return {"urls": len(resolver.reverse_dict), "templates": templates}